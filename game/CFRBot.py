@@ -1,151 +1,161 @@
 from player import *
-from game_state import *
+from abstraction import Abstraction
+from infoset_table import fingerprint
+from policy_file import FrozenPolicy, is_frozen_policy
+import pickle
 import random
 
+ACTIONS = ["fold", "call", "bet", "check"]
+ACTION_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+
+
+def card_key(hole_cards, community_cards, abstraction=None):
+    """Card part of an information set key: the exact cards, or their bucket."""
+    if abstraction is not None:
+        return f"b{abstraction.bucket(hole_cards, community_cards)}"
+    # The flop is unordered; the turn and river keep their position
+    board = sorted(community_cards[:3]) + list(community_cards[3:])
+    hole = ",".join(str(card) for card in sorted(hole_cards))
+    return f"{hole}|{','.join(str(card) for card in board)}"
+
+
+def infoset_key(hole_cards, community_cards, history, abstraction=None):
+    """Information set key: own hole cards (or bucket), visible board and betting history."""
+    return f"{card_key(hole_cards, community_cards, abstraction)}|{history}"
+
+
+def load_policy(path):
+    """
+    Load a policy written by cfr_trainer. Frozen policy files are memory-mapped
+    and read lazily; older pickled {infoset fingerprint: strategy} dicts are
+    loaded whole. Either way the result supports policy.get(fingerprint).
+    """
+    if is_frozen_policy(path):
+        return FrozenPolicy(path)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
 
 class CFRBot(Player):
-    def __init__(self, name, chips):
+    def __init__(
+        self,
+        name,
+        chips,
+        policy_path=None,
+        abstraction_path=None,
+        rng=None,
+        search_budget=None,
+    ):
         super().__init__(name, chips)
-        self.actions = ["fold", "call", "bet", "check"]
-        self.regret_sum = {action: 0 for action in self.actions}
-        self.strategy = {action: 1.0 / len(self.actions) for action in self.actions}
-        self.strategy_sum = {action: 0 for action in self.actions}
+        self.rng = rng if rng is not None else random  # Seeded in batch matches
+        self.actions = list(ACTIONS)
+        self.policy = load_policy(policy_path) if policy_path else None
+        # Card buckets the policy was trained with (None for exact cards)
+        self.abstraction = Abstraction(abstraction_path) if abstraction_path else None
+        # Seconds of real-time subgame search per heads-up decision (None: off)
+        self.search_budget = search_budget
+        self.search = None
+        if search_budget:
+            from subgame_search import SubgameSearch  # Builds on this module
+
+            self.search = SubgameSearch(self.policy, self.abstraction, self.rng)
         self.num_actions = len(self.actions)
+        # Regrets and strategies are lists in ACTIONS order; for one information
+        # set, list arithmetic beats NumPy call overhead
+        self.regret_sum = [0.0] * self.num_actions
+        self.strategy = [1.0 / self.num_actions] * self.num_actions
+        self.strategy_sum = [0.0] * self.num_actions
 
     def get_strategy(self):
         """
         Get the current strategy based on the regret-matching approach.
         """
-        total_positive_regret = sum(max(0, self.regret_sum[a]) for a in self.actions)
+        positive = [regret if regret > 0 else 0.0 for regret in self.regret_sum]
+        total_positive_regret = sum(positive)
 
         # If there is any positive regret, we update the strategy based on regret values
         if total_positive_regret > 0:
-            for action in self.actions:
-                self.strategy[action] = (
-                    max(0, self.regret_sum[action]) / total_positive_regret
-                )
+            self.strategy = [regret / total_positive_regret for regret in positive]
         else:
             # If no regret, choose actions uniformly
-            self.strategy = {a: 1.0 / self.num_actions for a in self.actions}
+            self.strategy = [1.0 / self.num_actions] * self.num_actions
 
         # Sum up strategy for future regret-matching updates
-        for action in self.actions:
-            self.strategy_sum[action] += self.strategy[action]
-
+        self.strategy_sum = [
+            total + p for total, p in zip(self.strategy_sum, self.strategy)
+        ]
         return self.strategy
 
+    def get_policy_strategy(self, game_state):
+        """Trained average strategy for the current situation, or None if unknown."""
+        if self.policy is None:
+            return None
+        key = infoset_key(
+            self.hand,
+            game_state.community_cards,
+            game_state.history_string(),
+            self.abstraction,
+        )
+        probabilities = self.policy.get(fingerprint(key))
+        if probabilities is None:
+            return None
+        return probabilities
+
     def choose_action(self, game_state):
         """Choose an action based on the current strategy, but filter out illegal actions."""
-        strategy = self.get_strategy()
+        if self.search is not None and len(game_state.players) == 2:
+            strategy = self.search.solve(game_state, self, self.search_budget)
+        else:
+            strategy = self.get_policy_strategy(game_state)
+            if strategy is None:
+                strategy = self.get_strategy()
 
         # List valid actions
         valid_actions = self.get_valid_actions(game_state)
         if not valid_actions:
             return "fold"
 
-        # Filter strategy to include only valid actions
-        actions = list(strategy.keys())
-        probabilities = [
-            strategy[action] if action in valid_actions else 0 for action in actions
-        ]
-
-        total_prob = sum(probabilities)
-        if total_prob > 0:
-            probabilities = [p / total_prob for p in probabilities]
-        else:
-            probabilities = [1.0 / len(valid_actions)] * len(actions)
-
-        return random.choices(actions, probabilities)[0]
+        # Filter strategy to include only valid actions (uniform over them if
+        # the strategy gives them no weight)
+        weights = [0.0] * self.num_actions
+        for action in valid_actions:
+            weights[ACTION_INDEX[action]] = strategy[ACTION_INDEX[action]]
+        if sum(weights) <= 0:
+            for action in valid_actions:
+                weights[ACTION_INDEX[action]] = 1.0
+        return self.rng.choices(self.actions, weights)[0]
 
     def get_valid_actions(self, game_state):
-        valid_actions = []
-        current_bet = self.current_bet
-        game_current_bet = game_state.current_bet
-
-        # Can check if the player's current bet equals the game's current bet
-        if current_bet == game_current_bet:
-            valid_actions.append("check")
-
-        # The player can fold at any time
-        valid_actions.append("fold")
-
-        # If the current bet is less than the game's current bet and the player has enough chips, they can call
-        if current_bet < game_current_bet and self.chips >= (
-            game_current_bet - current_bet
-        ):
-            valid_actions.append("call")
+        """Legal actions by the engine's rules (the ones the trainer uses)."""
+        return game_state.legal_actions(self)
 
-        # If the player still has chips, they can always bet
-        if self.chips > 0:
-            valid_actions.append("bet")
-
-        return valid_actions
-
-    def act(self, game_state, deck, chat_log):
+    def decide(self, game_state):
+        """Choose an action without applying it; returns (action, amount)."""
         action = self.choose_action(game_state)  # The bot chooses an action
 
-        if action == "fold" and self.current_bet < game_state.current_bet:
-            if self.chips >= (game_state.current_bet - self.current_bet):
-                print(f"{self.name} avoided folding and will call.")
+        # Without a trained policy, avoid folding when the bot can afford to call
+        if self.policy is None and action == "fold":
+            if 0 < game_state.current_bet - self.current_bet <= self.chips:
                 action = "call"
 
-        if action == "fold":
-            game_state.handle_fold(
-                self, chat_log
-            )  # Pass 'self' which refers to the Player (CFRBot)
-
-        elif action == "call":
-            amount_to_call = game_state.current_bet - self.current_bet
-            if amount_to_call > 0:
-                game_state.handle_bet(
-                    self, amount_to_call, chat_log
-                )  # Pass 'self' which refers to the Player (CFRBot)
-
-        elif action == "bet":
-            # Ensure the bot bets at least the minimum required
-            bet_amount = max(
-                game_state.current_bet, 20
-            )  # Set a minimum bet of 20 or the current bet
-            bet_amount = min(
-                bet_amount, self.chips
-            )  # Make sure the bet doesn't exceed the bot's available chips
-            game_state.handle_bet(
-                self, bet_amount, chat_log
-            )  # Pass 'self' which refers to the Player (CFRBot)
-
-        elif action == "check":
-            if (
-                self.current_bet == game_state.current_bet
-            ):  # Ensure the bot can check only if bets are equal
-                game_state.handle_check(
-                    self, chat_log
-                )  # Pass 'self' which refers to the Player (CFRBot)
-
-        # Log the bot's action in the chat log
-        chat_log.add_message(f"{self.name} chose to {action}")
-
-    def update_regret(self, action_taken, action_value, baseline_value):
-        """
-        Update the regret for each action based on the outcome of the action taken.
-        action_value: the utility gained by the action taken.
-        baseline_value: the baseline utility (for comparison).
-        """
-        for action in self.actions:
-            if action == action_taken:
-                regret = 0  # No regret for the action that was taken
-            else:
-                # Regret is the difference between the utility for not taking the action and the utility gained
-                regret = action_value - baseline_value
+        amount = 0
+        if action == "bet":
+            # Raise by the engine's fixed bet size, the same size the trainer uses
+            amount = game_state.bet_amount(self)
+        return action, amount
+
+    def act(self, game_state, chat_log=None):
+        """Choose an action and apply it to the game; returns the action taken."""
+        action, amount = self.decide(game_state)
 
-            # Add regret to regret_sum
-            self.regret_sum[action] += regret
+        # Log the bot's action before the engine moves play on
+        game_state.log(f"{self.name} chose to {action}", chat_log)
+        game_state.apply_action(self, action, amount, chat_log)
+        return action
 
     def get_average_strategy(self):
-        total_strategy_sum = sum(self.strategy_sum[action] for action in self.actions)
+        """Average strategy so far, as a list in ACTIONS order."""
+        total_strategy_sum = sum(self.strategy_sum)
         if total_strategy_sum > 0:
-            return {
-                action: self.strategy_sum[action] / total_strategy_sum
-                for action in self.actions
-            }
-        else:
-            return {action: 1.0 / self.num_actions for action in self.actions}
+            return [total / total_strategy_sum for total in self.strategy_sum]
+        return [1.0 / self.num_actions] * self.num_actions
@@ -0,0 +1,87 @@
+from player import *
+from cards import card_rank, card_suit, make_card
+from engine import MAX_RAISES_PER_STAGE
+from equity import EquityCalculator
+from functools import lru_cache
+import random
+
+# Raise with at least this much equity; otherwise call when the pot odds allow it
+RAISE_EQUITY = 0.65
+
+# Equity estimates only need to be good enough to act on, so enumerate exactly
+# only on the river and otherwise stop sampling early
+EXACT_LIMIT = 1_000
+TARGET_ERROR = 0.03
+MAX_SAMPLES = 1_000
+BATCH_SIZE = 500
+
+
+@lru_cache(maxsize=None)
+def preflop_equity(high_rank, low_rank, suited, num_opponents):
+    """
+    Equity of a starting hand class (e.g. AKs) against random hands. Cached,
+    since there are only 169 classes per number of opponents.
+    """
+    hole_cards = [make_card(high_rank, 0), make_card(low_rank, 0 if suited else 1)]
+    calculator = EquityCalculator(
+        target_error=TARGET_ERROR / 3, max_samples=10 * MAX_SAMPLES, seed=0
+    )
+    return calculator.calculate(hole_cards, (), num_opponents).equity
+
+
+class RuleBot(Player):
+    """
+    A simple equity-based bot: raise strong hands, call when the pot odds
+    justify it, otherwise check or fold. Useful as a baseline opponent.
+    """
+
+    def __init__(self, name, chips, rng=None):
+        super().__init__(name, chips)
+        self.rng = rng if rng is not None else random
+        self.calculator = EquityCalculator(
+            exact_limit=EXACT_LIMIT,
+            target_error=TARGET_ERROR,
+            max_samples=MAX_SAMPLES,
+            batch_size=BATCH_SIZE,
+            seed=self.rng.getrandbits(64),
+        )
+
+    def equity(self, game_state):
+        num_opponents = len(game_state.active_players()) - 1
+        if not game_state.community_cards:
+            ranks = sorted((card_rank(card) for card in self.hand), reverse=True)
+            suited = card_suit(self.hand[0]) == card_suit(self.hand[1])
+            return preflop_equity(ranks[0], ranks[1], suited, num_opponents)
+        result = self.calculator.calculate(
+            self.hand, game_state.community_cards, num_opponents
+        )
+        return result.equity
+
+    def choose_action(self, game_state):
+        to_call = game_state.amount_to_call(self)
+        equity = self.equity(game_state)
+
+        can_raise = (
+            game_state.raises_this_stage() < MAX_RAISES_PER_STAGE
+            and self.chips > to_call
+        )
+        if equity >= RAISE_EQUITY and can_raise:
+            return "bet"
+        if to_call == 0:
+            return "check"
+        # Call when our share of the final pot beats the price of calling
+        if equity >= to_call / (game_state.pot + to_call):
+            return "call"
+        return "fold"
+
+    def decide(self, game_state):
+        """Choose an action without applying it; returns (action, amount)."""
+        action = self.choose_action(game_state)
+        return action, game_state.bet_amount(self) if action == "bet" else 0
+
+    def act(self, game_state, chat_log=None):
+        """Choose an action and apply it to the game; returns the action taken."""
+        action, amount = self.decide(game_state)
+        game_state.log(f"{self.name} chose to {action}", chat_log)
+        game_state.apply_action(self, action, amount, chat_log)
+        return action
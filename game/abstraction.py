@@ -0,0 +1,415 @@
+"""
+Card abstraction: cluster strategically similar hands into buckets per street.
+
+Offline, build_abstraction enumerates (or samples) suit-canonical hands for
+each street, describes each by its equity distribution (a histogram of river
+equities over random runouts, or plain equity on the river), clusters them
+with k-means and writes a compact hashed bucket table per street:
+
+    python abstraction.py --output abstraction --buckets 169 200 200 200 --processes 8
+
+At decision time Abstraction.bucket(hand, community_cards) canonicalises the
+cards and finds the bucket id with a couple of array lookups.
+"""
+
+import argparse
+import json
+import os
+from itertools import combinations
+from multiprocessing import Pool
+
+import numpy as np
+
+from cards import NUM_CARDS, NUM_RANKS
+from engine import FLOP, PRE_FLOP, RIVER, TURN
+from evaluator import evaluate_batch
+from infoset_table import probe_insert
+
+STREETS = [PRE_FLOP, FLOP, TURN, RIVER]
+BOARD_SIZES = {PRE_FLOP: 0, FLOP: 3, TURN: 4, RIVER: 5}
+STREET_CARDS = {FLOP: 3, TURN: 1, RIVER: 1}  # Cards dealt to reach each street
+
+# Card groups whose order does not matter: hole cards, flop, turn, river
+GROUP_BOUNDS = [(0, 2), (2, 5), (5, 6), (6, 7)]
+
+DEFAULT_BUCKETS = {PRE_FLOP: 169, FLOP: 200, TURN: 200, RIVER: 200}
+# None enumerates every canonical hand; a number samples that many deals instead
+DEFAULT_MAX_HANDS = {PRE_FLOP: None, FLOP: None, TURN: 2_000_000, RIVER: 2_000_000}
+HISTOGRAM_BINS = 10
+ROLLOUTS = 32  # Runouts to the river per hand
+OPPONENT_SAMPLES = 16  # Opponent hands per runout
+CHUNK_SIZE = 4096
+
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+MAX_LOAD_FACTOR = 0.5
+
+META_FILE = "meta.json"
+
+
+def canonical_code(hand, community_cards=()):
+    """
+    Suit-isomorphism class of a hand and board as one int (6 bits per card).
+    Suits are relabelled by their (hole, flop, turn, river) rank pattern, so
+    hands that differ only by a suit permutation share a code.
+    """
+    cards = list(hand) + list(community_cards)
+    signatures = [0, 0, 0, 0]
+    for group, (start, end) in enumerate(GROUP_BOUNDS):
+        shift = NUM_RANKS * (3 - group)
+        for card in cards[start:end]:
+            signatures[card // NUM_RANKS] |= 1 << (card % NUM_RANKS + shift)
+
+    order = sorted(range(4), key=signatures.__getitem__, reverse=True)
+    new_suit = [0] * 4
+    for new, old in enumerate(order):
+        new_suit[old] = new
+
+    code = 0
+    for start, end in GROUP_BOUNDS:
+        relabelled = sorted(
+            new_suit[card // NUM_RANKS] * NUM_RANKS + card % NUM_RANKS
+            for card in cards[start:end]
+        )
+        for card in relabelled:
+            code = (code << 6) | (card + 1)
+    return code
+
+
+def canonical_codes(cards):
+    """Vectorised canonical_code for an (N, 2 + board size) card array."""
+    cards = np.asarray(cards, dtype=np.int64)
+    n, width = cards.shape
+    ranks, suits = cards % NUM_RANKS, cards // NUM_RANKS
+
+    signatures = np.zeros((n, 4), dtype=np.int64)
+    for group, (start, end) in enumerate(GROUP_BOUNDS[: _num_groups(width)]):
+        shift = NUM_RANKS * (3 - group)
+        for column in range(start, end):
+            bits = np.left_shift(1, ranks[:, column] + shift)
+            np.add.at(signatures, (np.arange(n), suits[:, column]), bits)
+
+    # Stable sort on the negated signatures matches sorted(..., reverse=True)
+    order = np.argsort(-signatures, axis=1, kind="stable")
+    new_suit = np.empty_like(order)
+    np.put_along_axis(new_suit, order, np.arange(4)[None, :], axis=1)
+    relabelled = np.take_along_axis(new_suit, suits, axis=1) * NUM_RANKS + ranks
+
+    codes = np.zeros(n, dtype=np.int64)
+    for start, end in GROUP_BOUNDS[: _num_groups(width)]:
+        for column in np.sort(relabelled[:, start:end], axis=1).T:
+            codes = (codes << 6) | (column + 1)
+    return codes
+
+
+def _num_groups(width):
+    return {2: 1, 5: 2, 6: 3, 7: 4}[width]
+
+
+def decode_codes(codes, width):
+    """Turn canonical codes back into an (N, width) array of representative cards."""
+    codes = np.asarray(codes, dtype=np.int64)
+    cards = np.empty((len(codes), width), dtype=np.int64)
+    for column in range(width - 1, -1, -1):
+        cards[:, column] = (codes & 63) - 1
+        codes = codes >> 6
+    return cards
+
+
+def _slot_hash(keys, bits):
+    """Multiplicative hash of non-zero uint64 keys down to `bits` bits."""
+    mixed = np.asarray(keys, dtype=np.uint64) * np.uint64(HASH_MULTIPLIER)
+    return mixed >> np.uint64(64 - bits)
+
+
+def _extend(cards, count):
+    """Extend each row of an (N, width) card array by every combination of `count` unseen cards."""
+    n, width = cards.shape
+    known = np.zeros((n, NUM_CARDS), dtype=bool)
+    np.put_along_axis(known, cards, True, axis=1)
+    unseen = np.nonzero(~known)[1].reshape(n, NUM_CARDS - width)
+    picks = np.array(list(combinations(range(NUM_CARDS - width), count)))
+    added = unseen[:, picks]  # (N, combos, count)
+    base = np.broadcast_to(cards[:, None, :], (n, len(picks), width))
+    return np.concatenate([base, added], axis=2).reshape(-1, width + count)
+
+
+def enumerate_canonical(street, processes=1):
+    """Representative cards of every canonical hand on a street."""
+    hands = np.array(list(combinations(range(NUM_CARDS), 2)), dtype=np.int64)
+    codes = np.unique(canonical_codes(hands))
+    width = 2
+    for next_street in STREETS[1 : STREETS.index(street) + 1]:
+        # Every class on the next street extends a canonical representative
+        reps = decode_codes(codes, width)
+        count = STREET_CARDS[next_street]
+        chunks = np.array_split(reps, max(1, len(reps) // 2000))
+        with Pool(processes) as pool:
+            parts = pool.map(_extend_and_canonicalise, [(c, count) for c in chunks])
+        codes = np.unique(np.concatenate(parts))
+        width += count
+    return decode_codes(codes, width)
+
+
+def _extend_and_canonicalise(args):
+    cards, count = args
+    return np.unique(canonical_codes(_extend(cards, count)))
+
+
+def sample_canonical(street, count, seed=None):
+    """Representative cards of up to `count` distinct canonical hands from random deals."""
+    rng = np.random.default_rng(seed)
+    width = 2 + BOARD_SIZES[street]
+    deals = np.argsort(rng.random((count, NUM_CARDS)), axis=1)[:, :width]
+    codes = np.unique(canonical_codes(deals))
+    return decode_codes(codes, width)
+
+
+def hand_features(
+    cards, rollouts=ROLLOUTS, opponents=OPPONENT_SAMPLES, bins=HISTOGRAM_BINS, seed=None
+):
+    """
+    Equity features for an (H, 2 + board size) card array.
+    Before the river: the cumulative histogram of river equity over `rollouts`
+    random runouts, which makes Euclidean distance track earth mover's distance.
+    On the river: the hand's equity (averaged over every sample) as a single feature.
+    """
+    rng = np.random.default_rng(seed)
+    cards = np.asarray(cards, dtype=np.int64)
+    h, width = cards.shape
+    board_needed = 7 - width
+
+    # One random permutation of the unseen cards per (hand, rollout): the first
+    # cards complete the board, the next pairs are opponent hands
+    keys = rng.random((h, rollouts, NUM_CARDS))
+    known = np.zeros((h, NUM_CARDS), dtype=bool)
+    np.put_along_axis(known, cards, True, axis=1)
+    keys[np.broadcast_to(known[:, None, :], keys.shape)] = 2.0
+    order = np.argsort(keys, axis=2)
+
+    board = np.concatenate(
+        [
+            np.broadcast_to(cards[:, None, 2:], (h, rollouts, width - 2)),
+            order[..., :board_needed],
+        ],
+        axis=2,
+    ).reshape(h * rollouts, 5)
+    hero = evaluate_batch(np.hstack([np.repeat(cards[:, :2], rollouts, axis=0), board]))
+
+    equity = np.zeros(h * rollouts)
+    for i in range(opponents):
+        start = board_needed + 2 * i
+        opponent_cards = order[..., start : start + 2].reshape(h * rollouts, 2)
+        opponent = evaluate_batch(np.hstack([opponent_cards, board]))
+        equity += (hero > opponent) + 0.5 * (hero == opponent)
+    equity = (equity / opponents).reshape(h, rollouts)
+
+    if board_needed == 0:
+        return equity.mean(axis=1, keepdims=True)
+    bin_index = np.minimum((equity * bins).astype(np.int64), bins - 1)
+    histogram = np.zeros((h, bins))
+    np.add.at(histogram, (np.arange(h)[:, None], bin_index), 1.0)
+    return np.cumsum(histogram / rollouts, axis=1)
+
+
+def _features_worker(args):
+    cards, rollouts, opponents, bins, seed = args
+    return hand_features(cards, rollouts, opponents, bins, seed)
+
+
+def kmeans(features, k, iterations=25, seed=None, chunk_size=65536):
+    """Cluster rows of `features` into k groups; returns (centroids, labels)."""
+    rng = np.random.default_rng(seed)
+    features = np.asarray(features, dtype=np.float64)
+    n = len(features)
+    k = min(k, n)
+
+    # k-means++ seeding on a sample keeps initialisation cheap for large inputs
+    sample = features[rng.choice(n, size=min(n, 50 * k), replace=False)]
+    centroids = [sample[rng.integers(len(sample))]]
+    distances = np.square(sample - centroids[0]).sum(axis=1)
+    for _ in range(1, k):
+        total = distances.sum()
+        if total > 0:
+            index = rng.choice(len(sample), p=distances / total)
+        else:
+            index = rng.integers(len(sample))
+        centroids.append(sample[index])
+        distances = np.minimum(distances, np.square(sample - sample[index]).sum(axis=1))
+    centroids = np.array(centroids)
+
+    labels = np.zeros(n, dtype=np.int64)
+    for _ in range(iterations):
+        for start in range(0, n, chunk_size):
+            labels[start : start + chunk_size] = nearest_centroid(
+                features[start : start + chunk_size], centroids
+            )
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, features)
+        counts = np.bincount(labels, minlength=k)
+        occupied = counts > 0
+        centroids[occupied] = sums[occupied] / counts[occupied, None]
+    return centroids, labels
+
+
+def nearest_centroid(features, centroids):
+    distances = (
+        np.square(features).sum(axis=1)[:, None]
+        - 2 * features @ centroids.T
+        + np.square(centroids).sum(axis=1)[None, :]
+    )
+    return np.argmin(distances, axis=1)
+
+
+def build_street(
+    street,
+    num_buckets,
+    max_hands=None,
+    processes=1,
+    rollouts=ROLLOUTS,
+    opponents=OPPONENT_SAMPLES,
+    bins=HISTOGRAM_BINS,
+    seed=None,
+):
+    """Cluster one street; returns (canonical codes, bucket ids, centroids)."""
+    if max_hands is None:
+        hands = enumerate_canonical(street, processes)
+    else:
+        hands = sample_canonical(street, max_hands, seed)
+
+    chunks = [hands[i : i + CHUNK_SIZE] for i in range(0, len(hands), CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [(chunk, rollouts, opponents, bins, s) for chunk, s in zip(chunks, seeds)]
+    with Pool(processes) as pool:
+        features = np.vstack(pool.map(_features_worker, tasks))
+
+    centroids, labels = kmeans(features, num_buckets, seed=seed)
+    return canonical_codes(hands), labels, centroids
+
+
+def build_abstraction(
+    path,
+    buckets=DEFAULT_BUCKETS,
+    max_hands=DEFAULT_MAX_HANDS,
+    processes=None,
+    rollouts=ROLLOUTS,
+    opponents=OPPONENT_SAMPLES,
+    bins=HISTOGRAM_BINS,
+    seed=None,
+):
+    """Build bucket tables for every street and write them to the directory `path`."""
+    os.makedirs(path, exist_ok=True)
+    processes = processes or os.cpu_count()
+    for street in STREETS:
+        codes, labels, centroids = build_street(
+            street,
+            buckets[street],
+            max_hands.get(street),
+            processes,
+            rollouts,
+            opponents,
+            bins,
+            seed,
+        )
+        _write_table(path, street, codes, labels, centroids)
+        print(f"{street}: {len(codes)} hands in {len(centroids)} buckets")
+
+    meta = {"rollouts": rollouts, "opponents": opponents, "bins": bins}
+    with open(os.path.join(path, META_FILE), "w") as f:
+        json.dump(meta, f)
+
+
+def _write_table(path, street, codes, labels, centroids):
+    """Store codes -> bucket ids as an open-addressing table (keys = code + 1)."""
+    bits = max(4, int(np.ceil(np.log2(len(codes) / MAX_LOAD_FACTOR))))
+    keys = np.zeros(1 << bits, dtype=np.uint64)
+    buckets = np.zeros(1 << bits, dtype=np.uint16)
+    fps = codes.astype(np.uint64) + np.uint64(1)
+    slots = probe_insert(keys, fps, _slot_hash(fps, bits))
+    buckets[slots] = labels
+    np.save(os.path.join(path, f"{street}_keys.npy"), keys)
+    np.save(os.path.join(path, f"{street}_buckets.npy"), buckets)
+    np.save(os.path.join(path, f"{street}_centroids.npy"), centroids)
+
+
+class Abstraction:
+    """Read-only bucket lookup over tables written by build_abstraction."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.tables = {}
+        for street in STREETS:
+            keys = np.load(os.path.join(path, f"{street}_keys.npy"), mmap_mode="r")
+            buckets = np.load(
+                os.path.join(path, f"{street}_buckets.npy"), mmap_mode="r"
+            )
+            centroids = np.load(os.path.join(path, f"{street}_centroids.npy"))
+            bits = len(keys).bit_length() - 1
+            self.tables[BOARD_SIZES[street]] = (keys, buckets, centroids, bits)
+        self.misses = {}  # Buckets computed for hands missing from a table, by key
+
+    def bucket(self, hand, community_cards=()):
+        """Bucket id of a hand on the current board."""
+        keys, buckets, centroids, bits = self.tables[len(community_cards)]
+        key = canonical_code(hand, community_cards) + 1
+        mask = len(keys) - 1
+        slot = ((key * HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) >> (64 - bits)
+        while True:
+            stored = int(keys[slot])
+            if stored == key:
+                return int(buckets[slot])
+            if stored == 0:
+                break
+            slot = (slot + 1) & mask
+
+        # Hands left out of a sampled street fall back to the nearest centroid.
+        # Rollouts are seeded from the canonical code, so every hand in a class
+        # gets the same bucket on every call, and the result is memoised.
+        if key not in self.misses:
+            cards = decode_codes([key - 1], 2 + len(community_cards))
+            features = hand_features(
+                cards,
+                self.meta["rollouts"],
+                self.meta["opponents"],
+                self.meta["bins"],
+                seed=key,
+            )
+            self.misses[key] = int(nearest_centroid(features, centroids)[0])
+        return self.misses[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build card abstraction buckets.")
+    parser.add_argument("--output", default="abstraction")
+    parser.add_argument(
+        "--buckets",
+        type=int,
+        nargs=4,
+        default=[DEFAULT_BUCKETS[street] for street in STREETS],
+        metavar=("PRE_FLOP", "FLOP", "TURN", "RIVER"),
+    )
+    parser.add_argument(
+        "--max-hands",
+        type=int,
+        nargs=4,
+        default=[DEFAULT_MAX_HANDS[street] or 0 for street in STREETS],
+        metavar=("PRE_FLOP", "FLOP", "TURN", "RIVER"),
+        help="Hands to sample per street (0 enumerates every canonical hand)",
+    )
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--rollouts", type=int, default=ROLLOUTS)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    build_abstraction(
+        args.output,
+        buckets=dict(zip(STREETS, args.buckets)),
+        max_hands={s: n or None for s, n in zip(STREETS, args.max_hands)},
+        processes=args.processes,
+        rollouts=args.rollouts,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
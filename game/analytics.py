@@ -0,0 +1,270 @@
+"""
+Columnar hand-history analytics.
+
+build_store() converts hand history files (see hand_history.py) into a
+directory of flat NumPy columns, once. HandStore memory-maps the columns, and
+every query is a handful of vectorised mask/bincount operations over them, so
+statistics over tens of millions of hands come back in seconds without a
+Python loop per hand.
+
+There are two tables:
+
+    hands  one row per hand: end_stage (STAGES index of the stage the hand
+           was won uncontested in, or SHOWDOWN), seats
+    seats  one row per player per hand: hand (row in hands), player (index
+           into names), position (0 = small blind, 1 = big blind, ...),
+           profit in chips, vpip, pfr, showdown (reached showdown), won
+
+Win rates are in milli-big-blinds per hand (mbb/hand), as in tournament.py.
+
+    python analytics.py build hand_history.phh --store history_store
+    python analytics.py report --store history_store
+"""
+
+import argparse
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from engine import BIG_BLIND, PRE_FLOP
+from equity import Z_95
+from hand_history import STAGES, read_hands
+
+STORE_DIR = "history_store"
+META_FILE = "meta.json"
+CHUNK_HANDS = 100_000  # Hands converted in memory before columns are appended
+SHOWDOWN = len(STAGES)  # end_stage of hands decided at showdown
+MBB = 1000 / BIG_BLIND  # Chips to milli-big-blinds
+
+HAND_COLUMNS = {"end_stage": np.uint8, "seats": np.uint8}
+SEAT_COLUMNS = {
+    "hand": np.int64,
+    "player": np.uint16,
+    "position": np.uint8,
+    "profit": np.int32,
+    "vpip": np.bool_,
+    "pfr": np.bool_,
+    "showdown": np.bool_,
+    "won": np.bool_,
+}
+
+PlayerStats = namedtuple(
+    "PlayerStats",
+    ["hands", "mbb_per_hand", "ci95", "vpip", "pfr", "showdown", "won_at_showdown"],
+)
+
+
+def _hand_rows(hand, hand_index, player_ids):
+    """The hands row and seats rows for one HandRecord."""
+    seats = len(hand.stacks)
+    vpip = [False] * seats
+    pfr = [False] * seats
+    folded = [not cards for cards in hand.hole_cards]  # Sitting out counts as folded
+    end_stage = SHOWDOWN
+    for seat, stage, action, _ in hand.actions:
+        if action == "fold":
+            folded[seat] = True
+            if folded.count(False) == 1:
+                end_stage = STAGES.index(stage)
+        elif stage == PRE_FLOP and action != "check":
+            vpip[seat] = True
+            pfr[seat] = pfr[seat] or action == "bet"
+
+    seat_rows = []
+    for seat in range(seats):
+        if not hand.hole_cards[seat]:
+            continue  # Sat the hand out
+        profit = hand.final_stacks[seat] - hand.stacks[seat]
+        showdown = end_stage == SHOWDOWN and not folded[seat]
+        seat_rows.append(
+            (
+                hand_index,
+                player_ids.setdefault(hand.names[seat], len(player_ids)),
+                (seat - hand.small_blind_index) % seats,
+                profit,
+                vpip[seat],
+                pfr[seat],
+                showdown,
+                profit > 0,
+            )
+        )
+    return (end_stage, seats), seat_rows
+
+
+def _append_columns(directory, columns, rows):
+    if not rows:
+        return
+    for (name, dtype), values in zip(columns.items(), zip(*rows)):
+        with open(os.path.join(directory, name + ".bin"), "ab") as f:
+            np.asarray(values, dtype=dtype).tofile(f)
+
+
+def build_store(paths, directory=STORE_DIR, chunk_hands=CHUNK_HANDS):
+    """
+    Convert hand history files into a column store in `directory`, replacing
+    any store already there. Returns the number of hands converted.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name in list(HAND_COLUMNS) + list(SEAT_COLUMNS):
+        open(os.path.join(directory, name + ".bin"), "wb").close()
+
+    player_ids = {}
+    hand_rows, seat_rows = [], []
+    hands = seat_count = 0
+    for hand in read_hands(paths):
+        hand_row, rows = _hand_rows(hand, hands, player_ids)
+        hand_rows.append(hand_row)
+        seat_rows.extend(rows)
+        hands += 1
+        if len(hand_rows) >= chunk_hands:
+            _append_columns(directory, HAND_COLUMNS, hand_rows)
+            _append_columns(directory, SEAT_COLUMNS, seat_rows)
+            seat_count += len(seat_rows)
+            hand_rows, seat_rows = [], []
+    _append_columns(directory, HAND_COLUMNS, hand_rows)
+    _append_columns(directory, SEAT_COLUMNS, seat_rows)
+    seat_count += len(seat_rows)
+
+    with open(os.path.join(directory, META_FILE), "w") as f:
+        json.dump(
+            {"hands": hands, "seats": seat_count, "names": list(player_ids)},
+            f,
+            indent=2,
+        )
+    return hands
+
+
+class HandStore:
+    """Read-only, memory-mapped view of a column store written by build_store."""
+
+    def __init__(self, directory=STORE_DIR):
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        self.names = meta["names"]
+        self.hands = self._map(directory, HAND_COLUMNS, meta["hands"])
+        self.seats = self._map(directory, SEAT_COLUMNS, meta["seats"])
+        self.num_hands = meta["hands"]
+
+    @staticmethod
+    def _map(directory, columns, rows):
+        mapped = {}
+        for name, dtype in columns.items():
+            path = os.path.join(directory, name + ".bin")
+            # np.memmap cannot map an empty file
+            if rows:
+                mapped[name] = np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+            else:
+                mapped[name] = np.zeros(0, dtype=dtype)
+        return mapped
+
+    def player_mask(self, name):
+        """Boolean mask over seat rows for one player."""
+        return self.seats["player"] == self.names.index(name)
+
+    def player_stats(self):
+        """{name: PlayerStats} for every player in the store."""
+        seats = self.seats
+        players = seats["player"]
+        size = len(self.names)
+
+        def per_player(weights=None):
+            return np.bincount(players, weights=weights, minlength=size)
+
+        hands = per_player()
+        profit = seats["profit"].astype(np.float64)
+        total = per_player(profit)
+        total_sq = per_player(profit * profit)
+        vpip = per_player(seats["vpip"])
+        pfr = per_player(seats["pfr"])
+        showdowns = per_player(seats["showdown"])
+        won = per_player(seats["showdown"] & seats["won"])
+
+        stats = {}
+        for i, name in enumerate(self.names):
+            n = hands[i]
+            mean = total[i] / n
+            variance = max(total_sq[i] / n - mean * mean, 0.0)
+            stats[name] = PlayerStats(
+                int(n),
+                mean * MBB,
+                Z_95 * (variance / n) ** 0.5 * MBB,
+                vpip[i] / n,
+                pfr[i] / n,
+                showdowns[i] / n,
+                won[i] / showdowns[i] if showdowns[i] else 0.0,
+            )
+        return stats
+
+    def win_rate_by_position(self, name):
+        """{position: (hands, mbb/hand)} for one player."""
+        mask = self.player_mask(name)
+        return self._grouped(self.seats["position"][mask], self.seats["profit"][mask])
+
+    def win_rate_by_stage(self, name):
+        """
+        {end stage: (hands, mbb/hand)} for one player, by the stage each hand
+        was decided in ("showdown" for hands that reached one).
+        """
+        mask = self.player_mask(name)
+        stages = self.hands["end_stage"][self.seats["hand"][mask]]
+        grouped = self._grouped(stages, self.seats["profit"][mask])
+        labels = STAGES + ("showdown",)
+        return {labels[stage]: value for stage, value in grouped.items()}
+
+    def showdown_frequency(self):
+        """Fraction of all hands that reached a showdown."""
+        if not self.num_hands:
+            return 0.0
+        return float(np.mean(self.hands["end_stage"] == SHOWDOWN))
+
+    @staticmethod
+    def _grouped(groups, profit):
+        counts = np.bincount(groups)
+        totals = np.bincount(groups, weights=profit)
+        return {
+            group: (int(counts[group]), totals[group] / counts[group] * MBB)
+            for group in np.flatnonzero(counts)
+        }
+
+
+def report(store):
+    print(f"{store.num_hands} hands, {store.showdown_frequency():.1%} to showdown\n")
+    print(
+        f"{'player':20s} {'hands':>9s} {'mbb/hand':>18s} "
+        f"{'VPIP':>6s} {'PFR':>6s} {'WTSD':>6s} {'W$SD':>6s}"
+    )
+    for name, stats in store.player_stats().items():
+        print(
+            f"{name:20s} {stats.hands:9d} {stats.mbb_per_hand:+9.1f} ± {stats.ci95:6.1f} "
+            f"{stats.vpip:6.1%} {stats.pfr:6.1%} {stats.showdown:6.1%} "
+            f"{stats.won_at_showdown:6.1%}"
+        )
+    for name in store.names:
+        print(f"\n{name} by position:")
+        for position, (hands, mbb) in store.win_rate_by_position(name).items():
+            print(f"  {position:<10d} {hands:9d} {mbb:+9.1f} mbb/hand")
+        print(f"{name} by the stage the hand ended:")
+        for stage, (hands, mbb) in store.win_rate_by_stage(name).items():
+            print(f"  {stage:10s} {hands:9d} {mbb:+9.1f} mbb/hand")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hand history statistics.")
+    parser.add_argument("command", choices=["build", "report"])
+    parser.add_argument("paths", nargs="*", help="Hand history files (for build)")
+    parser.add_argument("--store", default=STORE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not args.paths:
+            parser.error("build needs at least one hand history file")
+        hands = build_store(args.paths, args.store)
+        print(f"Converted {hands} hands into {args.store}")
+    else:
+        report(HandStore(args.store))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+On-demand image loading for the GUI, optionally from a pre-packed bundle.
+
+Images are loaded the first time they are asked for, not at import or window
+creation. If an asset bundle exists, images come from it instead of their PNG
+files. A bundle is a single file holding every card sprite and the table
+background as raw RGB(A) pixels (the background pre-shrunk to BUNDLE_MAX_SIZE),
+so loading one is a memory copy rather than a PNG decode.
+
+    python assets.py    # write assets.bundle from the PNGs
+"""
+
+import json
+import mmap
+import os
+import struct
+
+import pygame
+
+from cards import DECK, card_filename
+
+BUNDLE_FILE = "assets.bundle"
+BUNDLE_MAGIC = b"PKRASSET"
+BUNDLE_VERSION = 1
+BUNDLE_HEADER = struct.Struct("<8sII")  # magic, version, index length
+BUNDLE_MAX_SIZE = (1920, 1080)  # Larger images are shrunk to fit when bundled
+
+BACKGROUND_IMAGE = os.path.join("images", "poker-table.png")
+CARD_DIR = "cards"
+CARD_BACK_IMAGE = os.path.join(CARD_DIR, "card_back.png")
+
+
+def bundled_images():
+    """Every image the GUI can ask for, as paths relative to the game directory."""
+    cards = [os.path.join(CARD_DIR, card_filename(card)) for card in DECK]
+    return [BACKGROUND_IMAGE, CARD_BACK_IMAGE] + cards
+
+
+class Assets:
+    def __init__(self, bundle_path=BUNDLE_FILE):
+        """Load from bundle_path when it exists, otherwise from the image files."""
+        self.images = {}  # Path -> Surface converted for the display
+        self.index = {}  # Path -> (width, height, file offset, "RGB"/"RGBA")
+        self.bundle = None
+        if bundle_path and os.path.exists(bundle_path):
+            self._open_bundle(bundle_path)
+
+    def _open_bundle(self, path):
+        with open(path, "rb") as f:
+            self.bundle = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_length = BUNDLE_HEADER.unpack_from(self.bundle)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            raise ValueError(f"{path} is not a version {BUNDLE_VERSION} asset bundle.")
+        start = BUNDLE_HEADER.size
+        index = json.loads(self.bundle[start : start + index_length])
+        data_start = start + index_length
+        self.index = {
+            name: (width, height, data_start + offset, mode)
+            for name, (width, height, offset, mode) in index.items()
+        }
+
+    def image(self, path):
+        """The image at `path`, loaded and converted on first use. Needs a display."""
+        surface = self.images.get(path)
+        if surface is None:
+            surface = self._load(path).convert_alpha()
+            self.images[path] = surface
+        return surface
+
+    def _load(self, path):
+        if path in self.index:
+            width, height, offset, mode = self.index[path]
+            pixels = self.bundle[offset : offset + len(mode) * width * height]
+            return pygame.image.frombytes(pixels, (width, height), mode)
+        return pygame.image.load(path)
+
+
+def build_bundle(path=BUNDLE_FILE, max_size=BUNDLE_MAX_SIZE):
+    """Pack every GUI image into a single bundle file."""
+    index, blobs = {}, []
+    offset = 0  # Pixel data offsets are relative to the end of the index
+    for name in bundled_images():
+        image = pygame.image.load(name)
+        width, height = image.get_size()
+        opaque = pygame.mask.from_surface(image, 254).count() == width * height
+        shrink = min(1.0, max_size[0] / width, max_size[1] / height)
+        if shrink < 1.0:
+            size = (round(width * shrink), round(height * shrink))
+            image = pygame.transform.smoothscale(image, size)
+        # Opaque images are stored without alpha (smoothscale can also nudge
+        # opaque alpha values just below 255)
+        mode = "RGB" if opaque else "RGBA"
+        blob = pygame.image.tobytes(image, mode)
+        index[name] = [image.get_width(), image.get_height(), offset, mode]
+        blobs.append(blob)
+        offset += len(blob)
+
+    encoded = json.dumps(index).encode()
+    with open(path, "wb") as f:
+        f.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(encoded)))
+        f.write(encoded)
+        for blob in blobs:
+            f.write(blob)
+
+
+if __name__ == "__main__":
+    build_bundle()
+    print(f"Wrote {BUNDLE_FILE}")
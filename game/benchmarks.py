@@ -0,0 +1,380 @@
+"""
+Benchmarks for the hot paths: hand evaluation, the engine, the CFR bot and
+trainer, and GUI frame rendering.
+
+Each benchmark runs a fixed, seeded workload a few times and keeps the median,
+so numbers are comparable between revisions on the same machine. Results are
+written to a JSON file; pass --compare with an older results file to see the
+change per benchmark. The exit status is 1 if anything regressed by more than
+--threshold.
+
+Run from the game directory (the frame benchmark loads images relative to it):
+
+    python benchmarks.py --output before.json
+    python benchmarks.py --output after.json --compare before.json
+    python benchmarks.py evaluate_hand cfr_iterations --quick
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+REPEATS = 5
+RESULTS_FILE = "benchmark_results.json"
+DEFAULT_THRESHOLD = 0.10  # Relative change counted as a regression
+
+# name -> (function, unit, higher_is_better); filled in by @benchmark
+BENCHMARKS = {}
+
+
+def benchmark(unit, higher_is_better=True):
+    def register(function):
+        BENCHMARKS[function.__name__] = (function, unit, higher_is_better)
+        return function
+
+    return register
+
+
+def _random_hands(count, size, seed=0):
+    rng = random.Random(seed)
+    return [rng.sample(range(52), size) for _ in range(count)]
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+@benchmark("hands/s")
+def evaluate_hand(scale):
+    from evaluator import evaluate_hand
+
+    hands = _random_hands(20_000 * scale, 7)
+
+    def run():
+        for hand in hands:
+            evaluate_hand(hand)
+
+    return len(hands) / _timed(run)
+
+
+@benchmark("hands/s")
+def evaluate_batch(scale):
+    import numpy as np
+
+    from evaluator import evaluate_batch
+
+    hands = np.array(_random_hands(100_000 * scale, 7), dtype=np.int64)
+    return len(hands) / _timed(evaluate_batch, hands)
+
+
+@benchmark("calls/s")
+def determine_winner(scale):
+    from evaluator import determine_winner
+    from player import Player
+
+    deals = _random_hands(10_000 * scale, 9)
+    players = [Player("A", 0), Player("B", 0)]
+
+    def run():
+        for deal in deals:
+            players[0].hand, players[1].hand = deal[0:2], deal[2:4]
+            determine_winner(players, deal[4:9])
+
+    return len(deals) / _timed(run)
+
+
+@benchmark("hands/s")
+def engine_hands(scale):
+    import numpy as np
+
+    from CFRBot import CFRBot
+    from tournament import play_shard
+
+    hands = 2_000 * scale
+    seed = np.random.SeedSequence(0)
+    return hands / _timed(play_shard, CFRBot, CFRBot, hands, seed)
+
+
+@benchmark("hands/s")
+def engine_full_ring(scale):
+    from CFRBot import CFRBot
+    from engine import BIG_BLIND, MAX_SEATS, GameState
+
+    bots = [CFRBot(f"Bot {i}", 1000, rng=random.Random(i)) for i in range(MAX_SEATS)]
+    game_state = GameState(bots, rng=random.Random(0))
+    hands = 500 * scale
+
+    def run():
+        game_state.start_hand()
+        while game_state.hand_number <= hands:
+            game_state.current_player().act(game_state)
+            if any(bot.chips + bot.total_bet < BIG_BLIND for bot in bots):
+                for bot in bots:
+                    bot.chips = 1000
+                game_state.start_hand()
+
+    return hands / _timed(run)
+
+
+def _mid_hand_state():
+    """A seeded game on the flop with the CFR bot to act."""
+    from CFRBot import CFRBot
+    from engine import GameState
+
+    bots = [CFRBot("A", 1000, rng=random.Random(1)), CFRBot("B", 1000)]
+    game_state = GameState(bots, rng=random.Random(2))
+    game_state.start_hand()
+    game_state.apply_action(game_state.current_player(), "call")
+    game_state.apply_action(game_state.current_player(), "check")
+    return game_state
+
+
+@benchmark("us/call", higher_is_better=False)
+def cfrbot_get_strategy(scale):
+    game_state = _mid_hand_state()
+    bot = game_state.current_player()
+    calls = 20_000 * scale
+
+    def run():
+        for _ in range(calls):
+            bot.get_strategy()
+
+    return _timed(run) / calls * 1e6
+
+
+@benchmark("us/call", higher_is_better=False)
+def cfrbot_choose_action(scale):
+    game_state = _mid_hand_state()
+    bot = game_state.current_player()
+    calls = 20_000 * scale
+
+    def run():
+        for _ in range(calls):
+            bot.choose_action(game_state)
+
+    return _timed(run) / calls * 1e6
+
+
+@benchmark("infosets/s")
+def regret_matching_batch(scale):
+    """Regret matching plus average-strategy accumulation over table rows at once."""
+    import numpy as np
+
+    from infoset_table import InfosetTable
+
+    table = InfosetTable(4, capacity=1 << 17)
+    rng = np.random.default_rng(0)
+    table.regrets[:] = rng.normal(size=table.regrets.shape)
+    rows = rng.integers(0, len(table.regrets), 100_000 * scale)
+    masks = (rng.random((len(rows), 4)) < 0.75).astype(np.float32)
+    masks[:, 3] = 1.0  # At least one legal action
+
+    def run():
+        table.accumulate(rows, strategy_deltas=table.strategies(rows, masks))
+
+    return len(rows) / _timed(run)
+
+
+@benchmark("it/s")
+def cfr_iterations(scale):
+    from cfr_trainer import MCCFRTrainer
+
+    trainer = MCCFRTrainer(seed=0)
+    return trainer.train(200 * scale, report_every=0)
+
+
+@benchmark("nodes/s")
+def hand_state_nodes(scale):
+    """Full betting-tree walks with HandState.apply/undo."""
+    from hand_state import HandState
+
+    state = HandState(((0, 1), (2, 3)), (4, 5, 6, 7, 8), (2000, 2000))
+
+    def walk():
+        if state.is_terminal():
+            return 1
+        nodes = 1
+        for action in state.legal_actions():
+            state.apply(action)
+            nodes += walk()
+            state.undo()
+        return nodes
+
+    start = time.perf_counter()
+    nodes = sum(walk() for _ in range(scale))
+    return nodes / (time.perf_counter() - start)
+
+
+def _gui():
+    """poker_main with its window set up, off-screen unless a display was chosen."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import poker_main
+
+    if poker_main.WIN is None:
+        poker_main.setup()
+    return poker_main
+
+
+@benchmark("ms/frame", higher_is_better=False)
+def frame_time(scale):
+    poker_main = _gui()
+    frames = 200 * scale
+
+    def run():
+        for _ in range(frames):
+            poker_main.draw_frame(poker_main.WIN)
+            poker_main.pygame.display.update()
+
+    return _timed(run) / frames * 1e3
+
+
+@benchmark("us/frame", higher_is_better=False)
+def idle_frame_time(scale):
+    """A frame of the dirty-rect renderer when nothing on the table changed."""
+    poker_main = _gui()
+    frames = 5_000 * scale
+    poker_main.renderer.render(poker_main.WIN)
+
+    def run():
+        for _ in range(frames):
+            poker_main.renderer.render(poker_main.WIN)
+
+    return _timed(run) / frames * 1e6
+
+
+def _time_in_subprocess(code):
+    """Seconds taken by `code` in a fresh interpreter, so nothing is pre-imported."""
+    script = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"{code}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    env = dict(os.environ, SDL_VIDEODRIVER=os.environ.get("SDL_VIDEODRIVER", "dummy"))
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    ).stdout
+    return float(output.split()[-1])
+
+
+@benchmark("ms", higher_is_better=False)
+def import_time(scale):
+    """Importing the headless modules used by tools and training scripts."""
+    return _time_in_subprocess("import engine, evaluator, CFRBot, tournament") * 1e3
+
+
+@benchmark("ms", higher_is_better=False)
+def startup_time(scale):
+    """From launching the GUI to its first frame on screen."""
+    code = (
+        "import poker_main\n"
+        "poker_main.setup()\n"
+        "poker_main.renderer.render(poker_main.WIN)"
+    )
+    return _time_in_subprocess(code) * 1e3
+
+
+def run_benchmarks(names, repeats=REPEATS, scale=1):
+    """Run the named benchmarks and return {name: {"value", "unit", "higher_is_better"}}."""
+    results = {}
+    for name in names:
+        function, unit, higher_is_better = BENCHMARKS[name]
+        value = statistics.median(function(scale) for _ in range(repeats))
+        results[name] = {
+            "value": value,
+            "unit": unit,
+            "higher_is_better": higher_is_better,
+        }
+        print(f"{name:24s} {value:14.2f} {unit}")
+    return results
+
+
+def _revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Print the change against a baseline; return the names that regressed."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old, new = baseline[name]["value"], result["value"]
+        change = (new - old) / old if old else 0.0
+        # Positive means better, whichever direction the unit improves in
+        improvement = change if result["higher_is_better"] else -change
+        flag = ""
+        if improvement < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:24s} {old:14.2f} -> {new:14.2f} {result['unit']:9s} "
+            f"{improvement:+7.1%}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths.")
+    parser.add_argument("names", nargs="*", help="Benchmarks to run (default: all)")
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument(
+        "--scale", type=int, default=1, help="Multiply every workload by this"
+    )
+    parser.add_argument("--quick", action="store_true", help="Run each benchmark once")
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    names = args.names or list(BENCHMARKS)
+    repeats = 1 if args.quick else args.repeats
+    results = run_benchmarks(names, repeats, args.scale)
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "revision": _revision(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        print(f"\nChange against {args.compare}:")
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
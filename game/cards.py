@@ -0,0 +1,94 @@
+import random
+
+# Cards are plain ints 0-51: card = suit * 13 + rank, with rank 0 = deuce and
+# 12 = ace. A set of cards is a 64-bit mask with bit `card` set, so each suit
+# occupies its own 13-bit lane (mask >> (13 * suit)) & RANK_MASK.
+
+RANKS = ["02", "03", "04", "05", "06", "07", "08", "09", "10", "J", "Q", "K", "A"]
+SUITS = ["C", "D", "H", "S"]
+
+NUM_RANKS = 13
+NUM_CARDS = 52
+RANK_MASK = (1 << NUM_RANKS) - 1
+
+# Names used by the card image files, e.g. "Jack_of_hearts.png"
+RANK_IMAGE_NAMES = [
+    "02",
+    "03",
+    "04",
+    "05",
+    "06",
+    "07",
+    "08",
+    "09",
+    "10",
+    "Jack",
+    "Queen",
+    "King",
+    "Ace",
+]
+SUIT_IMAGE_NAMES = ["clubs", "diamonds", "hearts", "spades"]
+
+DECK = list(range(NUM_CARDS))
+
+
+def make_card(rank, suit):
+    """Build a card from a rank index (0-12) and a suit index (0-3)."""
+    return suit * NUM_RANKS + rank
+
+
+def card_rank(card):
+    return card % NUM_RANKS
+
+
+def card_suit(card):
+    return card // NUM_RANKS
+
+
+def card_to_string(card):
+    """Convert a card to its text form, e.g. 47 -> "10S"."""
+    return RANKS[card % NUM_RANKS] + SUITS[card // NUM_RANKS]
+
+
+def string_to_card(text):
+    """Convert a text card such as "10S" or "AH" back to an int."""
+    return make_card(RANKS.index(text[:-1]), SUITS.index(text[-1]))
+
+
+def cards_to_string(cards):
+    return " ".join(card_to_string(card) for card in cards)
+
+
+def card_image_key(card):
+    """Key used by the card image cache, e.g. ("Jack", "hearts")."""
+    return (RANK_IMAGE_NAMES[card % NUM_RANKS], SUIT_IMAGE_NAMES[card // NUM_RANKS])
+
+
+def card_filename(card):
+    rank, suit = card_image_key(card)
+    return f"{rank}_of_{suit}.png"
+
+
+def hand_mask(cards):
+    """Pack a collection of cards into a 64-bit mask."""
+    mask = 0
+    for card in cards:
+        mask |= 1 << card
+    return mask
+
+
+def mask_to_cards(mask):
+    """Unpack a card mask into a sorted list of cards."""
+    cards = []
+    while mask:
+        low_bit = mask & -mask
+        cards.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return cards
+
+
+def shuffled_deck(rng=random):
+    """Return a freshly shuffled list of all 52 cards."""
+    deck = DECK[:]
+    rng.shuffle(deck)
+    return deck
@@ -0,0 +1,267 @@
+"""
+Offline external-sampling Monte Carlo CFR for heads-up hold'em.
+
+The game mirrors engine.GameState: the same blinds, the bot's four actions
+(fold, call, bet, check), fixed raise sizes from engine.BET_SIZES with at most
+MAX_RAISES_PER_STAGE raises per stage, and the big blind acting first after
+the flop. Regrets and average strategies are kept per information set (own
+hole cards, visible board, betting history), keyed exactly as CFRBot looks
+them up during play.
+
+With --abstraction DIR (see abstraction.py), hole cards and board are replaced
+by their bucket id in every key, which keeps the number of information sets
+tractable. Tables are stored in an InfosetTable; pass --checkpoint DIR to keep them in
+memory-mapped files that persist between runs.
+
+A traversal reads each node's strategy from the table's cache of current
+strategies and queues its regret and strategy updates. After the traversal
+they are applied with one InfosetTable.accumulate() call and the touched
+rows' strategies are recomputed with one vectorised regret_matching() call.
+
+    python cfr_trainer.py --iterations 100000 --checkpoint cfr_state --policy cfr_policy.bin
+
+For multi-core training over one shared table, see parallel_cfr.py.
+"""
+
+import argparse
+import functools
+import os
+import random
+import time
+
+import numpy as np
+
+from abstraction import Abstraction
+from CFRBot import ACTIONS, card_key
+from cards import shuffled_deck
+from engine import BIG_BLIND
+from evaluator import evaluate_hand
+from hand_state import BOARD_SIZES, HandState
+from infoset_table import META_FILE, InfosetTable, regret_matching
+from policy_file import freeze_table
+
+NUM_ACTIONS = len(ACTIONS)
+
+# Seat 0 posts the small blind and acts first pre-flop; seat 1 is the big blind
+SMALL_BLIND_SEAT, BIG_BLIND_SEAT = 0, 1
+# Deeper than the most a capped betting sequence can put in, so stacks never bind
+TRAINING_STACK = 100 * BIG_BLIND
+
+_legal_masks = {}  # Tuple of legal actions -> 0/1 list in ACTIONS order
+
+
+def legal_mask(legal):
+    """0/1 list in ACTIONS order marking the actions in `legal`."""
+    mask = _legal_masks.get(tuple(legal))
+    if mask is None:
+        mask = [1.0 if a in legal else 0.0 for a in range(NUM_ACTIONS)]
+        _legal_masks[tuple(legal)] = mask
+    return mask
+
+
+@functools.lru_cache(maxsize=None)
+def decision_nodes():
+    """Decision nodes in the betting tree: the most a traversal can insert."""
+    state = HandState(((0, 1), (2, 3)), (4, 5, 6, 7, 8), (TRAINING_STACK,) * 2)
+
+    def count(state):
+        if state.is_terminal():
+            return 0
+        total = 1
+        for action in state.legal_actions():
+            state.apply(action)
+            total += count(state)
+            state.undo()
+        return total
+
+    return count(state)
+
+
+class MCCFRTrainer:
+    def __init__(self, seed=None, path=None, abstraction=None, table=None):
+        # Regrets and strategy sums per information set; file-backed if path is set.
+        # An existing table (e.g. one shared between processes) can be passed in.
+        if table is None:
+            table = InfosetTable(NUM_ACTIONS, path=path)
+        self.table = table
+        self.abstraction = abstraction  # Optional Abstraction for card buckets
+        self.rng = random.Random(seed)
+        self.iterations = 0
+        # Updates queued by the current traversal, as rows and per-row deltas
+        self.regret_rows, self.regret_deltas, self.regret_masks = [], [], []
+        self.strategy_rows, self.strategy_deltas = [], []
+
+    def get_strategy(self, key, legal):
+        """Current (regret-matching) strategy of an information set."""
+        table = self.table
+        row = table.row(key)
+        strategy = table.current[row].tolist()
+        if not sum(strategy):
+            # Not cached yet: uniform for a row with no regrets, as regret
+            # matching gives, else computed from them
+            regrets = table.regrets[row]
+            mask = legal_mask(legal)
+            if any(regrets.tolist()):
+                strategy = regret_matching(regrets, np.array(mask)).tolist()
+            else:
+                strategy = [m / len(legal) for m in mask]
+        return row, strategy
+
+    def apply_updates(self):
+        """
+        Apply the queued regret and strategy updates in batches and refresh the
+        cached strategies of the rows whose regrets changed. Within a traversal
+        only the traverser's regrets change and each history is visited once,
+        so no row is read after its update and applying them at the end gives
+        the same result as applying each at its node.
+        """
+        table = self.table
+        if self.regret_rows:
+            rows = np.array(self.regret_rows)
+            table.accumulate(rows, regret_deltas=np.array(self.regret_deltas))
+            table.update_current(rows, np.array(self.regret_masks, dtype=np.float32))
+        if self.strategy_rows:
+            table.accumulate(
+                np.array(self.strategy_rows),
+                strategy_deltas=np.array(self.strategy_deltas),
+            )
+        self.regret_rows, self.regret_deltas, self.regret_masks = [], [], []
+        self.strategy_rows, self.strategy_deltas = [], []
+
+    def get_average_strategy(self, key):
+        row = self.table.find(key)
+        if row < 0:
+            return [1.0 / NUM_ACTIONS] * NUM_ACTIONS
+        return self.table.average_strategy(row).tolist()
+
+    def make_deal(self, hands, board):
+        """Per-iteration chance outcome: (hands, board, showdown strengths, card keys)."""
+        strengths = [evaluate_hand(hand + board) for hand in hands]
+        # Card part of each seat's infoset key at every stage, computed once per deal
+        card_keys = [
+            [card_key(hand, board[:size], self.abstraction) for size in BOARD_SIZES]
+            for hand in hands
+        ]
+        return hands, board, strengths, card_keys
+
+    def train(self, iterations, report_every=1000):
+        """Run MCCFR iterations (one traversal per seat each) and return iterations/s."""
+        start = time.perf_counter()
+        last_report, last_count = start, 0
+
+        for i in range(1, iterations + 1):
+            deck = shuffled_deck(self.rng)
+            deal = self.make_deal([deck[0:2], deck[2:4]], deck[4:9])
+
+            state = HandState(
+                deal[0], deal[1], (TRAINING_STACK, TRAINING_STACK), BIG_BLIND_SEAT
+            )
+            state.strengths = deal[2]
+            for traverser in (SMALL_BLIND_SEAT, BIG_BLIND_SEAT):
+                # Rows must not move while updates to them are queued
+                self.table.reserve(decision_nodes())
+                self._traverse(state, deal, traverser)
+                self.apply_updates()
+            self.iterations += 1
+
+            if report_every and i % report_every == 0:
+                now = time.perf_counter()
+                rate = (i - last_count) / (now - last_report)
+                print(
+                    f"Iteration {self.iterations}: {rate:.0f} it/s, "
+                    f"{len(self.table)} information sets"
+                )
+                last_report, last_count = now, i
+
+        return iterations / (time.perf_counter() - start)
+
+    def _traverse(self, state, deal, traverser):
+        """Return the traverser's expected chip utility from this node."""
+        if state.is_terminal():
+            return state.utility(traverser)
+
+        player = state.player
+        legal = state.legal_actions()
+        key = f"{deal[3][player][state.stage]}|{state.history}"
+        row, strategy = self.get_strategy(key, legal)
+
+        if player == traverser:
+            # Explore every action and update regrets against the node value
+            utilities = [0.0] * NUM_ACTIONS
+            node_utility = 0.0
+            for a in legal:
+                state.apply(a)
+                utilities[a] = self._traverse(state, deal, traverser)
+                state.undo()
+                node_utility += strategy[a] * utilities[a]
+            self.regret_rows.append(row)
+            self.regret_deltas.append(
+                [
+                    utilities[a] - node_utility if a in legal else 0.0
+                    for a in range(NUM_ACTIONS)
+                ]
+            )
+            self.regret_masks.append(legal_mask(legal))
+            return node_utility
+
+        # Opponent node: accumulate the average strategy and sample one action
+        self.strategy_rows.append(row)
+        self.strategy_deltas.append(strategy)
+        action = self.rng.choices(range(NUM_ACTIONS), strategy)[0]
+        state.apply(action)
+        utility = self._traverse(state, deal, traverser)
+        state.undo()
+        return utility
+
+    def save(self, path):
+        """Save the full training state to a directory so training can be resumed."""
+        self.table.meta["iterations"] = self.iterations
+        self.table.save(path)
+
+    def load(self, path):
+        """Resume from a saved directory; its files are memory-mapped and updated in place."""
+        self.table = InfosetTable.open(path)
+        self.iterations = self.table.meta.get("iterations", 0)
+
+    def save_policy(self, path):
+        save_policy(self.table, path)
+
+
+def save_policy(table, path):
+    """Write the average strategy as a frozen policy file for CFRBot to load."""
+    freeze_table(table, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a CFR policy for CFRBot.")
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--abstraction", help="Directory written by abstraction.py")
+    parser.add_argument(
+        "--checkpoint", help="Training state to resume from and save to"
+    )
+    parser.add_argument("--policy", default="cfr_policy.bin", help="Output policy file")
+    args = parser.parse_args()
+
+    abstraction = Abstraction(args.abstraction) if args.abstraction else None
+    resume = args.checkpoint and os.path.exists(
+        os.path.join(args.checkpoint, META_FILE)
+    )
+    trainer = MCCFRTrainer(
+        seed=args.seed,
+        path=None if resume else args.checkpoint,
+        abstraction=abstraction,
+    )
+    if resume:
+        trainer.load(args.checkpoint)
+
+    rate = trainer.train(args.iterations)
+    print(f"Trained {args.iterations} iterations at {rate:.0f} it/s")
+
+    if args.checkpoint:
+        trainer.save(args.checkpoint)
+    trainer.save_policy(args.policy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,570 @@
+"""
+Headless Texas Hold'em engine.
+
+Nothing here imports pygame, sleeps or does work at import time, so the same
+betting logic drives the GUI, AI-vs-AI simulation and training loops.
+
+Tables seat MIN_SEATS to MAX_SEATS players. Players with no chips sit out
+(they are dealt no cards and post no blinds); while fewer than MIN_SEATS
+players have chips no hand is dealt and stage is None until someone rebuys
+and start_hand() is called again. During a hand GameState keeps the
+seats still in the hand, the seats all-in, and the seats that have acted since
+the last raise as sets, and the seats able to bet as a ring (next_seat /
+previous_seat), all updated as each action is applied. Finding the next player
+to act, whether the betting round is over and whether one player is left are
+then O(1) per action, however many seats are folded or all-in.
+"""
+
+import random
+
+from cards import shuffled_deck
+from evaluator import determine_winner, evaluate_hand
+
+PRE_FLOP = "pre-flop"
+FLOP = "flop"
+TURN = "turn"
+RIVER = "river"
+
+MIN_SEATS = 2
+MAX_SEATS = 10
+
+# Define blinds
+SMALL_BLIND = 10
+BIG_BLIND = 20
+
+# Fixed raise sizes and a per-stage raise cap used by the bots and the CFR
+# trainer, so a trained "bet" means the same number of chips in live play.
+BET_SIZES = {
+    PRE_FLOP: BIG_BLIND,
+    FLOP: BIG_BLIND,
+    TURN: 2 * BIG_BLIND,
+    RIVER: 2 * BIG_BLIND,
+}
+MAX_RAISES_PER_STAGE = 3
+
+# Betting history tokens, one per action; stages are separated by "/"
+HISTORY_TOKENS = {"fold": "f", "call": "c", "bet": "b", "check": "k"}
+
+
+# Chip amounts for the blinds, a call and a raise, and when a raise is allowed.
+# GameState and hand_state.HandState both use these, so the trainer and search
+# bet exactly as the engine does, short stacks included.
+def posted_blinds(small_blind_chips, big_blind_chips):
+    """Chips the small and big blind post; a short stack posts what it has."""
+    return min(SMALL_BLIND, small_blind_chips), min(BIG_BLIND, big_blind_chips)
+
+
+def call_amount(current_bet, player_bet, chips):
+    """Chips needed to call (capped at the player's stack)."""
+    return max(min(current_bet - player_bet, chips), 0)
+
+
+def raise_amount(stage, current_bet, player_bet, chips):
+    """Chips put in for a standard raise (capped at the player's stack)."""
+    return min(current_bet + BET_SIZES[stage] - player_bet, chips)
+
+
+def can_raise(raises, to_call, chips, opponents_can_act):
+    """
+    Whether a player may raise: the stage is under the raise cap, the player
+    has chips beyond a call, and another player still has chips to answer.
+    """
+    return raises < MAX_RAISES_PER_STAGE and chips > to_call and opponents_can_act
+
+
+# Create and shuffle deck (cards are ints 0-51, see cards.py)
+def create_deck(rng=random):
+    return shuffled_deck(rng)
+
+
+# Deal cards to players
+def deal_cards(deck, num_players, cards_per_player):
+    hands = []
+    for _ in range(num_players):
+        hand = [deck.pop() for _ in range(cards_per_player)]
+        hands.append(hand)
+    return hands
+
+
+class GameState:
+    def __init__(self, players=(), chat_log=None, rng=None, recorder=None):
+        self.pot = 0
+        self.current_bet = 0
+        self.players = []
+        self.current_player_index = 0
+        self.small_blind_index = 0
+        self.big_blind_index = 1
+        self.players_dealt = 0  # Players dealt into the current hand
+        self.community_cards = []
+        self.stage = PRE_FLOP
+        self.players_must_act = True
+        self.deck = []
+        self.hand_number = 0  # Incremented every time a new hand is dealt
+        self.betting_history = [""]  # Action tokens for each stage so far
+        # Per-hand bookkeeping, rebuilt by start_hand(); seats are player indices
+        self.seat_of = {}  # Player -> seat
+        self.active = set()  # Seats that have not folded
+        self.all_in = set()  # Active seats with no chips left
+        self.acted = set()  # Seats able to bet that have acted since the last raise
+        self.next_seat = []  # Ring of seats able to bet, linked both ways
+        self.previous_seat = []
+        self.chat_log = chat_log  # Optional; headless games pass None
+        self.rng = rng if rng is not None else random
+        # Optional hand-history writer (see hand_history.py); told about every
+        # deal, action and result
+        self.recorder = recorder
+
+        for player in players:
+            self.add_player(player)
+
+    def log(self, message, chat_log=None):
+        """Send a message to the given chat log, or the game's own if it has one."""
+        chat_log = chat_log if chat_log is not None else self.chat_log
+        if chat_log is not None:
+            chat_log.add_message(message)
+
+    def rotate_blinds(self):
+        """Rotate the small and big blinds to the next players."""
+        # Increment the small blind index to the next player
+        self.small_blind_index = (self.small_blind_index + 1) % len(self.players)
+
+    def add_player(self, player):
+        if len(self.players) >= MAX_SEATS:
+            raise ValueError(f"A table seats at most {MAX_SEATS} players.")
+        self.players.append(player)
+
+    def current_player(self):
+        return self.players[self.current_player_index]
+
+    def active_players(self):
+        """Players who have not folded this hand."""
+        return [player for player in self.players if not player.has_folded]
+
+    def amount_to_call(self, player):
+        return call_amount(self.current_bet, player.current_bet, player.chips)
+
+    def legal_actions(self, player):
+        """Actions `player` may take now, as in HandState.legal_actions."""
+        to_call = self.amount_to_call(player)
+        actions = ["fold", "call"] if to_call > 0 else ["check"]
+        # The player is one of the players able to act, so any more can answer
+        if can_raise(
+            self.raises_this_stage(),
+            to_call,
+            player.chips,
+            self.able_to_act_count() > 1,
+        ):
+            actions.append("bet")
+        return actions
+
+    def history_string(self):
+        """Betting history of the hand so far, e.g. "cb/kbc/"."""
+        return "/".join(self.betting_history)
+
+    def raises_this_stage(self):
+        return self.betting_history[-1].count(HISTORY_TOKENS["bet"])
+
+    def bet_amount(self, player):
+        """Chips a player puts in for a standard raise (capped at their stack)."""
+        return raise_amount(
+            self.stage, self.current_bet, player.current_bet, player.chips
+        )
+
+    def record_action(self, action, player=None, amount=0):
+        self.betting_history[-1] += HISTORY_TOKENS[action]
+        if self.recorder is not None:
+            self.recorder.record_action(self, player, action, amount)
+
+    def start_hand(self, chat_log=None):
+        """
+        Shuffle, deal hole cards and post blinds for a new hand. Players with
+        no chips sit it out; with fewer than MIN_SEATS players left to deal
+        in, no hand is dealt and stage is None.
+        """
+        if len(self.players) < MIN_SEATS:
+            raise ValueError(f"A hand needs at least {MIN_SEATS} players.")
+        self.hand_number += 1
+        self.deck = create_deck(self.rng)
+        self.pot = 0
+        self.current_bet = 0
+        self.community_cards = []
+        self.stage = PRE_FLOP
+        self.players_must_act = True
+        self.betting_history = [""]
+
+        for player in self.players:
+            player.reset_for_new_round()
+        self._reset_seats()
+
+        if len(self.active) < MIN_SEATS:
+            self.stage = None
+            self.log("Not enough players have chips to deal a hand.", chat_log)
+            return
+
+        # The blinds move on past anyone sitting out
+        self.small_blind_index = self._next_seat_in_hand(self.small_blind_index)
+        self.big_blind_index = self._next_seat_in_hand(self.small_blind_index + 1)
+        self.players_dealt = len(self.active)
+        dealt = [self.players[seat] for seat in sorted(self.active)]
+        hands = deal_cards(self.deck, len(dealt), 2)
+        for player, hand in zip(dealt, hands):
+            player.hand = hand
+
+        if self.recorder is not None:
+            self.recorder.begin_hand(self)  # Stacks as they were before the blinds
+
+        self.log("New round starts!", chat_log)
+        self.post_blinds(chat_log)
+
+    def _reset_seats(self):
+        """Rebuild the per-hand seat bookkeeping; players with no chips sit out."""
+        seats = range(len(self.players))
+        self.seat_of = {player: seat for seat, player in zip(seats, self.players)}
+        self.active = set()
+        for seat, player in zip(seats, self.players):
+            if player.is_all_in():
+                player.hand = []
+                player.fold()  # Sitting out: no cards, no blinds, no share of the pot
+            else:
+                self.active.add(seat)
+        self.all_in = set()
+        self.acted = set()
+        able = sorted(self.active)
+        self.next_seat = list(seats)
+        self.previous_seat = list(seats)
+        for seat, following in zip(able, able[1:] + able[:1]):
+            self.next_seat[seat] = following
+            self.previous_seat[following] = seat
+
+    def _next_seat_in_hand(self, start):
+        """First seat at or after `start` that was dealt into the hand."""
+        for offset in range(len(self.players)):
+            index = (start + offset) % len(self.players)
+            if not self.players[index].has_folded:
+                return index
+        return start % len(self.players)
+
+    def _leave_ring(self, seat):
+        """
+        Take a seat that folded or went all-in out of the ring of seats able to
+        bet. Its own links are left as they are, so next_player() can still
+        step on from it.
+        """
+        following, previous = self.next_seat[seat], self.previous_seat[seat]
+        self.next_seat[previous] = following
+        self.previous_seat[following] = previous
+        self.acted.discard(seat)
+
+    def handle_bet(self, player, amount, chat_log=None):
+        """Handle a bet, call or raise of `amount` more chips from a player."""
+        if player.has_folded:
+            raise ValueError(f"{player.name} has folded and cannot bet.")
+
+        if amount <= 0:
+            raise ValueError(f"{player.name} must bet a positive amount.")
+
+        if amount > player.chips:
+            raise ValueError(
+                f"{player.name} does not have enough chips to bet {amount}."
+            )
+
+        # Anything short of a call is only allowed as an all-in
+        if player.current_bet + amount < self.current_bet and amount < player.chips:
+            raise ValueError(
+                f"{player.name} must bet at least {self.current_bet - player.current_bet} chips to call."
+            )
+
+        is_raise = player.current_bet + amount > self.current_bet
+        self.record_action("bet" if is_raise else "call", player, amount)
+
+        # Deduct chips and update the current bet.
+        player.chips -= amount
+        player.current_bet += amount
+        player.total_bet += amount
+        self.pot += amount
+        player.has_acted = True  # Mark the player as having acted.
+
+        seat = self.seat_of[player]
+        if player.current_bet > self.current_bet:
+            # A raise re-opens the action for everyone else still in the hand
+            self.current_bet = player.current_bet
+            self.acted = {seat}
+        else:
+            self.acted.add(seat)
+        if player.is_all_in():
+            self.all_in.add(seat)
+            self._leave_ring(seat)
+
+        # Log the bet in the chat.
+        self.log(
+            f"{player.name} has bet {amount} chips. Pot is now {self.pot} chips.",
+            chat_log,
+        )
+
+    def handle_call(self, player, chat_log=None):
+        """Call the current bet (or check if there is nothing to call)."""
+        amount = self.amount_to_call(player)
+        if amount > 0:
+            self.handle_bet(player, amount, chat_log)
+        else:
+            self.handle_check(player, chat_log)
+
+    def handle_check(self, player, chat_log=None):
+        """Handle the check action from a player."""
+        player.check(self.current_bet)  # Raises ValueError if there is a bet to call
+        player.has_acted = True
+        self.acted.add(self.seat_of[player])
+        self.record_action("check", player)
+        self.log(f"{player.name} checks.", chat_log)
+
+    def handle_fold(self, player, chat_log=None):
+        """Handle the fold action from a player."""
+        seat = self.seat_of[player]
+        if seat not in self.active:
+            raise ValueError(f"{player.name} has already folded.")
+        player.fold()  # The player folds
+        player.has_acted = True
+        self.active.discard(seat)
+        if seat in self.all_in:
+            self.all_in.discard(seat)
+        else:
+            self._leave_ring(seat)
+        self.record_action("fold", player)
+        self.log(f"{player.name} has folded.", chat_log)
+
+        # Check if only one player is left (this would end the round)
+        if self.only_one_player_left():
+            winner = self.players[next(iter(self.active))]
+            self.log(
+                f"{winner.name} wins the pot of {self.pot} chips by default!",
+                chat_log,
+            )
+            self.distribute_pot_to_winner(winner)
+            self.reset_for_new_round(chat_log)
+
+    def apply_action(self, player, action, amount=0, chat_log=None):
+        """
+        Apply "fold", "check", "call" or "bet" for a player, then move play on:
+        to the next player, the next stage, or a new hand.
+        """
+        if self.stage is None:
+            raise ValueError("No hand is being played.")
+        hand_number = self.hand_number
+        if action == "fold":
+            self.handle_fold(player, chat_log)
+        elif action == "check":
+            self.handle_check(player, chat_log)
+        elif action == "call":
+            self.handle_call(player, chat_log)
+        elif action == "bet":
+            self.handle_bet(player, amount, chat_log)
+        else:
+            raise ValueError(f"Unknown action: {action}")
+
+        if self.hand_number == hand_number:  # A fold may already have ended the hand
+            self.end_turn(chat_log)
+
+    def end_turn(self, chat_log=None):
+        """Advance the stage if the betting round is complete, else pass the turn."""
+        if self.all_players_have_acted():
+            self.advance_stage(chat_log)
+        else:
+            self.next_player(chat_log)
+
+    def only_one_player_left(self):
+        """Returns True if only one player is left in the game."""
+        return len(self.active) == 1
+
+    def players_able_to_act(self):
+        """Players still in the hand who have chips left to bet."""
+        return [
+            self.players[seat]
+            for seat in sorted(self.active)
+            if seat not in self.all_in
+        ]
+
+    def able_to_act_count(self):
+        """Number of players still in the hand who have chips left to bet."""
+        return len(self.active) - len(self.all_in)
+
+    def next_player(self, chat_log=None):
+        """Moves to the next player who can still act and logs it."""
+        self.current_player_index = self.next_seat[self.current_player_index]
+        self.log(f"Next player is {self.current_player().name}", chat_log)
+
+    def _next_seat_to_act(self, start):
+        """
+        First seat at or after `start` whose player has not folded or gone
+        all-in. Only used to find who opens a betting round.
+        """
+        for offset in range(len(self.players)):
+            index = (start + offset) % len(self.players)
+            if index in self.active and index not in self.all_in:
+                return index
+        return start % len(self.players)
+
+    def reset_for_new_round(self, chat_log=None):
+        """Rotates the blinds and deals the next hand."""
+        if self.recorder is not None:
+            self.recorder.end_hand(self)
+        self.rotate_blinds()
+        self.start_hand(chat_log)
+
+    def post_blinds(self, chat_log=None):
+        """Posts the small and big blinds and sets the current bet to the larger one."""
+        small_blind_player = self.players[self.small_blind_index]
+        big_blind_player = self.players[self.big_blind_index]
+
+        # A short-stacked player posts what they have and is all-in
+        blinds = posted_blinds(small_blind_player.chips, big_blind_player.chips)
+        for player, posted, name in zip(
+            (small_blind_player, big_blind_player), blinds, ("small", "big")
+        ):
+            player.chips -= posted
+            player.current_bet = posted
+            player.total_bet = posted
+            self.pot += posted
+            seat = self.seat_of[player]
+            if player.is_all_in() and seat not in self.all_in:
+                self.all_in.add(seat)
+                self._leave_ring(seat)
+            self.log(
+                f"{player.name} posts the {name} blind of {posted} chips.", chat_log
+            )
+
+        # The bet to call is what was actually posted, which a short big blind
+        # may leave below BIG_BLIND
+        self.current_bet = max(
+            small_blind_player.current_bet, big_blind_player.current_bet
+        )
+
+        # Set the current player to the first one to act (next after big blind)
+        self.current_player_index = self._next_seat_to_act(self.big_blind_index + 1)
+
+        # If the blinds leave at most one player able to bet and nothing for
+        # them to call, deal the rest of the board
+        if self.able_to_act_count() < 2:
+            able = self.players_able_to_act()
+            if all(player.current_bet >= self.current_bet for player in able):
+                self.advance_stage(chat_log)
+
+    def all_players_folded(self):
+        return not self.active
+
+    def should_end_round(self):
+        """True when one player is left or the betting round is complete."""
+        return len(self.active) <= 1 or self.all_players_have_acted()
+
+    def advance_stage(self, chat_log=None):
+        """Advances the stage and deals the community cards for the next stage."""
+        self.log(
+            f"Advancing stage: {self.stage}, Current bet: {self.current_bet}", chat_log
+        )
+
+        if self.stage == RIVER:
+            self.showdown(chat_log)
+            return
+
+        if self.stage == PRE_FLOP:
+            self.stage = FLOP
+            self.community_cards = self.deck[-3:]  # Deal the Flop (3 community cards)
+            del self.deck[-3:]
+            self.log("Dealt the Flop.", chat_log)
+        elif self.stage == FLOP:
+            self.stage = TURN
+            self.community_cards.append(self.deck.pop())  # Deal the Turn
+            self.log("Dealt the Turn.", chat_log)
+        elif self.stage == TURN:
+            self.stage = RIVER
+            self.community_cards.append(self.deck.pop())  # Deal the River
+            self.log("Dealt the River.", chat_log)
+
+        # Reset bets and allow players to act again for the new stage
+        self.betting_history.append("")
+        self.current_bet = 0
+        self.acted = set()
+        for player in self.players:
+            player.current_bet = 0
+            player.has_acted = False
+
+        # Heads-up the big blind acts first after the flop; otherwise the small blind
+        first_seat = (
+            self.big_blind_index if self.players_dealt == 2 else self.small_blind_index
+        )
+        self.current_player_index = self._next_seat_to_act(first_seat)
+
+        # With at most one player able to bet, deal the rest of the board
+        if self.able_to_act_count() < 2:
+            self.advance_stage(chat_log)
+
+    def showdown(self, chat_log=None):
+        """Award the pot (and any side pots) to the best hands, then start a new hand."""
+        self.log(
+            "All community cards have been dealt. Determining the winner...", chat_log
+        )
+        active_players = self.active_players()
+        strengths = {
+            player: evaluate_hand(player.hand + self.community_cards)
+            for player in active_players
+        }
+
+        # Build pots from contribution levels so all-in players only win what they
+        # matched; the last pot takes whatever is left, so no chips are lost
+        remaining = self.pot
+        levels = sorted({p.total_bet for p in active_players if p.total_bet > 0})
+        levels = levels or [0]
+        previous = 0
+        for i, level in enumerate(levels):
+            if i == len(levels) - 1:
+                pot = remaining  # Last pot also collects any uncovered folded chips
+            else:
+                pot = sum(
+                    min(player.total_bet, level) - min(player.total_bet, previous)
+                    for player in self.players
+                )
+            remaining -= pot
+            eligible = [p for p in active_players if p.total_bet >= level]
+            best = max(strengths[p] for p in eligible)
+            winners = [p for p in eligible if strengths[p] == best]
+            self.pot = pot
+            if len(winners) > 1:
+                winner_names = ", ".join(winner.name for winner in winners)
+                self.log(f"It's a tie! The winners are: {winner_names}.", chat_log)
+                self.distribute_pot_to_winner(winners)
+            else:
+                self.log(f"{winners[0].name} wins the pot of {pot} chips!", chat_log)
+                self.distribute_pot_to_winner(winners[0])
+            previous = level
+
+        self.pot = 0
+        self.reset_for_new_round(chat_log)
+
+    def distribute_pot_to_winner(self, winners):
+        """Distributes the pot to the winner or splits it among multiple winners."""
+        if isinstance(winners, list):  # If there are multiple winners (tie)
+            split_pot, remainder = divmod(self.pot, len(winners))
+            for i, winner in enumerate(winners):
+                # Odd chips go to the first winners so no chips are lost
+                winner.chips += split_pot + (1 if i < remainder else 0)
+        else:
+            winners.chips += self.pot
+
+        self.pot = 0  # Reset the pot after distribution
+
+    def evaluate_hands(self):
+        player_hands = {
+            player: player.hand + self.community_cards for player in self.players
+        }
+        evaluated_hands = {
+            player: evaluate_hand(hand) for player, hand in player_hands.items()
+        }
+        return evaluated_hands
+
+    def determine_winner(self):
+        """Determine the winner of the round among players who have not folded."""
+        return determine_winner(self.active_players(), self.community_cards)
+
+    def all_players_have_acted(self):
+        """Checks if every player who can still bet has acted and matched the bet."""
+        # Acting matches the bet, and a raise empties `acted` again
+        return len(self.acted) == self.able_to_act_count()
@@ -0,0 +1,209 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+from cards import DECK
+from evaluator import evaluate_batch
+
+# Exact enumeration is used when the number of (board, opponent hands) outcomes
+# is at most this many; otherwise equity is estimated by Monte Carlo sampling.
+EXACT_LIMIT = 50_000
+
+# Monte Carlo defaults: stop once the 95% confidence half-width of the estimate
+# drops to TARGET_ERROR, or after MAX_SAMPLES samples.
+TARGET_ERROR = 0.01
+MAX_SAMPLES = 200_000
+BATCH_SIZE = 4_000
+Z_95 = 1.96
+
+EquityResult = namedtuple(
+    "EquityResult", ["equity", "win", "tie", "std_error", "samples", "exact"]
+)
+
+
+def _unseen_cards(hole_cards, community_cards):
+    known = set(hole_cards) | set(community_cards)
+    if len(known) != len(hole_cards) + len(community_cards):
+        raise ValueError("Hole cards and community cards must not overlap.")
+    if len(hole_cards) != 2 or len(community_cards) > 5:
+        raise ValueError("Expected 2 hole cards and at most 5 community cards.")
+    return [card for card in DECK if card not in known]
+
+
+def count_outcomes(num_unseen, board_needed, num_opponents):
+    """Number of (board completion, opponent hands) outcomes for exact enumeration."""
+    total = comb(num_unseen, board_needed)
+    remaining = num_unseen - board_needed
+    for _ in range(num_opponents):
+        total *= comb(remaining, 2)
+        remaining -= 2
+    return total
+
+
+def _score(hole_cards, community_cards, runouts, num_opponents):
+    """
+    Score sampled or enumerated runouts.
+    runouts: (N, board_needed + 2 * num_opponents) array; the board completion
+    comes first, then each opponent's two hole cards.
+    Returns the hero's pot share per row (1 win, 1/k for a k-way tie, 0 loss)
+    and a boolean array marking outright wins.
+    """
+    n = len(runouts)
+    board_needed = 5 - len(community_cards)
+    board = np.empty((n, 5), dtype=np.int64)
+    board[:, : len(community_cards)] = community_cards
+    board[:, len(community_cards) :] = runouts[:, :board_needed]
+
+    hero = evaluate_batch(np.hstack([np.tile(hole_cards, (n, 1)), board]))
+    best_opponent = np.zeros(n, dtype=hero.dtype)
+    opponents_tied = np.zeros(n, dtype=np.int64)
+    for i in range(num_opponents):
+        start = board_needed + 2 * i
+        opponent = evaluate_batch(np.hstack([runouts[:, start : start + 2], board]))
+        best_opponent = np.maximum(best_opponent, opponent)
+        opponents_tied += opponent == hero
+
+    wins = hero > best_opponent
+    ties = hero == best_opponent
+    share = wins + ties / (opponents_tied + 1)
+    return share, wins
+
+
+def _enumerate_runouts(unseen, board_needed, num_opponents):
+    """Every board completion combined with every distinct set of opponent hands."""
+    unseen = np.asarray(unseen, dtype=np.int64)
+    board_combos = list(combinations(range(len(unseen)), board_needed))
+    rows = np.array(board_combos, dtype=np.int64).reshape(
+        len(board_combos), board_needed
+    )
+    pairs = np.array(list(combinations(range(len(unseen)), 2)), dtype=np.int64)
+    pair_masks = (1 << pairs[:, 0]) | (1 << pairs[:, 1])
+
+    row_masks = np.zeros(len(rows), dtype=np.int64)
+    for column in rows.T:
+        row_masks |= 1 << column
+    for _ in range(num_opponents):
+        # Cartesian product with every hole-card pair, dropping overlapping cards
+        keep = (row_masks[:, None] & pair_masks[None, :]) == 0
+        row_index, pair_index = np.nonzero(keep)
+        rows = np.hstack([rows[row_index], pairs[pair_index]])
+        row_masks = row_masks[row_index] | pair_masks[pair_index]
+    return unseen[rows]
+
+
+def _sample_batch(hole_cards, community_cards, unseen, num_opponents, size, seed):
+    """Sample `size` runouts and return (sum of shares, sum of squares, wins, ties)."""
+    rng = np.random.default_rng(seed)
+    needed = 5 - len(community_cards) + 2 * num_opponents
+    # A random permutation of the unseen cards per row; take the first `needed`
+    order = np.argsort(rng.random((size, len(unseen))), axis=1)[:, :needed]
+    runouts = np.asarray(unseen, dtype=np.int64)[order]
+    share, wins = _score(hole_cards, community_cards, runouts, num_opponents)
+    ties = (share > 0) & ~wins
+    return (
+        float(share.sum()),
+        float(np.square(share).sum()),
+        int(wins.sum()),
+        int(ties.sum()),
+    )
+
+
+class EquityCalculator:
+    """
+    Computes hand equity against random opponent hands.
+    With processes > 1, Monte Carlo batches are spread across a process pool that
+    stays alive between calls; use it as a context manager or call close().
+    """
+
+    def __init__(
+        self,
+        processes=1,
+        exact_limit=EXACT_LIMIT,
+        target_error=TARGET_ERROR,
+        max_samples=MAX_SAMPLES,
+        batch_size=BATCH_SIZE,
+        seed=None,
+    ):
+        self.processes = processes
+        self.exact_limit = exact_limit
+        self.target_error = target_error
+        self.max_samples = max_samples
+        self.batch_size = batch_size
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.pool = ProcessPoolExecutor(processes) if processes > 1 else None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def calculate(self, hole_cards, community_cards=(), num_opponents=1):
+        """Return an EquityResult for hole_cards on a (possibly empty) board."""
+        hole_cards = list(hole_cards)
+        community_cards = list(community_cards)
+        unseen = _unseen_cards(hole_cards, community_cards)
+        board_needed = 5 - len(community_cards)
+        if board_needed + 2 * num_opponents > len(unseen):
+            raise ValueError(f"Not enough cards left for {num_opponents} opponents.")
+
+        outcomes = count_outcomes(len(unseen), board_needed, num_opponents)
+        if outcomes <= self.exact_limit:
+            return self._exact(hole_cards, community_cards, unseen, num_opponents)
+        return self._monte_carlo(hole_cards, community_cards, unseen, num_opponents)
+
+    def _exact(self, hole_cards, community_cards, unseen, num_opponents):
+        runouts = _enumerate_runouts(unseen, 5 - len(community_cards), num_opponents)
+        share, wins = _score(hole_cards, community_cards, runouts, num_opponents)
+        n = len(share)
+        ties = (share > 0) & ~wins
+        return EquityResult(
+            float(share.mean()), float(wins.mean()), float(ties.mean()), 0.0, n, True
+        )
+
+    def _monte_carlo(self, hole_cards, community_cards, unseen, num_opponents):
+        args = (hole_cards, community_cards, unseen, num_opponents, self.batch_size)
+        total = total_sq = 0.0
+        wins = ties = n = 0
+        std_error = 0.0
+
+        while n < self.max_samples:
+            # One batch per worker per round, each with an independent seed
+            seeds = self.seed_sequence.spawn(self.processes)
+            if self.pool is None:
+                results = [_sample_batch(*args, seeds[0])]
+            else:
+                results = self.pool.map(
+                    _sample_batch, *zip(*[args + (s,) for s in seeds])
+                )
+            for batch_sum, batch_sq, batch_wins, batch_ties in results:
+                total += batch_sum
+                total_sq += batch_sq
+                wins += batch_wins
+                ties += batch_ties
+                n += self.batch_size
+
+            mean = total / n
+            variance = max(total_sq / n - mean * mean, 0.0)
+            std_error = (variance / n) ** 0.5
+            if Z_95 * std_error <= self.target_error:
+                break
+
+        return EquityResult(total / n, wins / n, ties / n, std_error, n, False)
+
+
+def calculate_equity(hole_cards, community_cards=(), num_opponents=1, **options):
+    """Single-process convenience wrapper around EquityCalculator.calculate."""
+    calculator = EquityCalculator(**options)
+    try:
+        return calculator.calculate(hole_cards, community_cards, num_opponents)
+    finally:
+        calculator.close()
@@ -1,4 +1,8 @@
-from collections import Counter
+import threading
+
+import numpy as np
+
+from cards import NUM_CARDS, NUM_RANKS, RANK_MASK
 
 # Define hand rankings
 HAND_RANKINGS = {
@@ -14,101 +18,233 @@ HAND_RANKINGS = {
     "Royal Flush": 10,
 }
 
+# A hand strength is a single integer: the category sits above five 4-bit
+# kicker slots, so comparing two strengths with > / < / == ranks the hands.
+CATEGORY_SHIFT = 20
+
+# One prime per rank; the product of a hand's rank primes identifies its rank
+# multiset regardless of card order (the classic "prime product" hash).
+RANK_PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+
+# Card -> rank prime, so the hot loop needs a single list index per card
+CARD_PRIMES = [RANK_PRIMES[card % NUM_RANKS] for card in range(NUM_CARDS)]
+
+
+def _make_strength(category, ranks):
+    """Pack a category and up to five kicker ranks (2-14) into one integer."""
+    value = 0
+    for i in range(5):
+        value = (value << 4) | (ranks[i] if i < len(ranks) else 0)
+    return (category << CATEGORY_SHIFT) | value
+
+
+def _straight_high(rank_mask):
+    """Return the high card (5-14) of the best straight in a 13-bit rank mask, or 0."""
+    for high in range(12, 3, -1):
+        window = 0b11111 << (high - 4)
+        if rank_mask & window == window:
+            return high + 2
+    if rank_mask & 0b1000000001111 == 0b1000000001111:  # A-2-3-4-5
+        return 5
+    return 0
+
+
+def _flush_strength(rank_mask):
+    """Strength of the best flush or straight flush using the ranks of one suit."""
+    high = _straight_high(rank_mask)
+    if high == 14:
+        return _make_strength(HAND_RANKINGS["Royal Flush"], [high])
+    if high:
+        return _make_strength(HAND_RANKINGS["Straight Flush"], [high])
+    ranks = [r + 2 for r in range(12, -1, -1) if rank_mask & (1 << r)]
+    return _make_strength(HAND_RANKINGS["Flush"], ranks[:5])
+
+
+def _rank_strength(counts):
+    """Strength of the best non-flush 5-card hand for a rank multiset."""
+    # (count, rank) pairs, biggest groups first and higher ranks first within a group
+    groups = sorted(
+        ((count, r + 2) for r, count in enumerate(counts) if count), reverse=True
+    )
+    ranks_desc = [rank for _, rank in sorted(groups, key=lambda g: -g[1])]
+    top_count, top_rank = groups[0]
+
+    def kickers(exclude, n):
+        return [rank for rank in ranks_desc if rank not in exclude][:n]
+
+    if top_count == 4:
+        return _make_strength(
+            HAND_RANKINGS["Four of a Kind"], [top_rank] + kickers({top_rank}, 1)
+        )
+    if top_count == 3 and groups[1][0] >= 2:
+        return _make_strength(HAND_RANKINGS["Full House"], [top_rank, groups[1][1]])
+
+    rank_mask = 0
+    for r, count in enumerate(counts):
+        if count:
+            rank_mask |= 1 << r
+    high = _straight_high(rank_mask)
+    if high:
+        return _make_strength(HAND_RANKINGS["Straight"], [high])
+
+    if top_count == 3:
+        return _make_strength(
+            HAND_RANKINGS["Three of a Kind"], [top_rank] + kickers({top_rank}, 2)
+        )
+    if top_count == 2 and groups[1][0] == 2:
+        pairs = [top_rank, groups[1][1]]
+        return _make_strength(HAND_RANKINGS["Two Pair"], pairs + kickers(set(pairs), 1))
+    if top_count == 2:
+        return _make_strength(
+            HAND_RANKINGS["One Pair"], [top_rank] + kickers({top_rank}, 3)
+        )
+    return _make_strength(HAND_RANKINGS["High Card"], ranks_desc[:5])
+
+
+def _build_tables():
+    """Precompute the flush table (by suit rank mask) and the rank-product table."""
+    flush_table = [0] * (RANK_MASK + 1)
+    for rank_mask in range(RANK_MASK + 1):
+        if bin(rank_mask).count("1") >= 5:
+            flush_table[rank_mask] = _flush_strength(rank_mask)
+
+    rank_table = {}
+    counts = [0] * 13
+
+    # Walk every rank multiset of 5 to 7 cards (at most four cards per rank)
+    def walk(rank, cards_left, product):
+        if rank == 13:
+            if 7 - cards_left >= 5:
+                rank_table[product] = _rank_strength(counts)
+            return
+        for count in range(min(4, cards_left) + 1):
+            counts[rank] = count
+            walk(rank + 1, cards_left - count, product * RANK_PRIMES[rank] ** count)
+        counts[rank] = 0
+
+    walk(0, 7, 1)
+    return flush_table, rank_table
+
+
+class _LazyTable:
+    """
+    Stands in for a lookup table until it is first used, then builds every
+    table and rebinds the module globals, so importing this module is cheap and
+    evaluate_hand pays nothing extra once the real tables exist.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __getitem__(self, key):
+        load_tables()
+        return globals()[self.name][key]
+
+
+FLUSH_TABLE = _LazyTable("FLUSH_TABLE")
+RANK_TABLE = _LazyTable("RANK_TABLE")
+
+# Array copies of the tables for evaluate_batch: the rank table becomes a
+# sorted key column searched with np.searchsorted (products fit in int64).
+_BATCH_CARD_PRIMES = np.array(CARD_PRIMES, dtype=np.int64)
+_BATCH_RANK_KEYS = _BATCH_RANK_VALUES = _BATCH_FLUSH_TABLE = None
+
+_tables_lock = threading.Lock()
+
+
+def load_tables():
+    """Build the evaluation tables now rather than on the first evaluation."""
+    global FLUSH_TABLE, RANK_TABLE
+    global _BATCH_RANK_KEYS, _BATCH_RANK_VALUES, _BATCH_FLUSH_TABLE
+    with _tables_lock:  # The GUI may warm the tables up in a background thread
+        if _BATCH_RANK_KEYS is not None:
+            return
+        flush_table, rank_table = _build_tables()
+        keys = np.array(sorted(rank_table), dtype=np.int64)
+        _BATCH_RANK_VALUES = np.array(
+            [rank_table[key] for key in keys.tolist()], dtype=np.int32
+        )
+        _BATCH_FLUSH_TABLE = np.array(flush_table, dtype=np.int32)
+        FLUSH_TABLE, RANK_TABLE = flush_table, rank_table
+        _BATCH_RANK_KEYS = keys  # Set last: marks the tables as ready
+
 
 def evaluate_hand(hand):
-    rank_map = {
-        "02": 2,
-        "03": 3,
-        "04": 4,
-        "05": 5,
-        "06": 6,
-        "07": 7,
-        "08": 8,
-        "09": 9,
-        "10": 10,
-        "J": 11,
-        "Q": 12,
-        "K": 13,
-        "A": 14,
-    }
-
-    # Extract ranks and suits from the string-based cards (e.g., '2H', 'AS')
-    ranks = [
-        rank_map[card[:-1]] for card in hand
-    ]  # Rank is everything except the last character
-    suits = [card[-1] for card in hand]  # Suit is the last character
-
-    sorted_ranks = sorted(ranks)
-
-    # Handle low-Ace straight (A, 2, 3, 4, 5)
-    if sorted_ranks == [2, 3, 4, 5, 14]:
-        sorted_ranks = [1, 2, 3, 4, 5]  # Treat Ace as 1 for this straight
-
-    is_straight = all(
-        sorted_ranks[i] + 1 == sorted_ranks[i + 1] for i in range(len(sorted_ranks) - 1)
+    """Return the integer strength of the best 5-card hand in 5, 6 or 7 cards."""
+    product = 1
+    mask = 0
+    for card in hand:
+        product *= CARD_PRIMES[card]
+        mask |= 1 << card
+
+    # A flush can never coexist with quads or a full house in 7 cards, so the
+    # best hand is simply the larger of the two table lookups.
+    return max(
+        RANK_TABLE[product],
+        FLUSH_TABLE[mask & RANK_MASK],
+        FLUSH_TABLE[(mask >> 13) & RANK_MASK],
+        FLUSH_TABLE[(mask >> 26) & RANK_MASK],
+        FLUSH_TABLE[mask >> 39],
     )
-    rank_counts = Counter(ranks)
-    is_flush = len(set(suits)) == 1
-
-    if is_straight and is_flush:
-        return (HAND_RANKINGS["Straight Flush"], sorted_ranks[-1])
-    if 4 in rank_counts.values():
-        return (HAND_RANKINGS["Four of a Kind"], max(rank_counts, key=rank_counts.get))
-    if 3 in rank_counts.values() and 2 in rank_counts.values():
-        return (HAND_RANKINGS["Full House"], max(rank_counts, key=rank_counts.get))
-    if is_flush:
-        return (HAND_RANKINGS["Flush"], sorted_ranks[-1])
-    if is_straight:
-        return (HAND_RANKINGS["Straight"], sorted_ranks[-1])
-    if 3 in rank_counts.values():
-        return (HAND_RANKINGS["Three of a Kind"], max(rank_counts, key=rank_counts.get))
-    if list(rank_counts.values()).count(2) == 2:
-        return (HAND_RANKINGS["Two Pair"], max(rank_counts, key=rank_counts.get))
-    if 2 in rank_counts.values():
-        return (HAND_RANKINGS["One Pair"], max(rank_counts, key=rank_counts.get))
-    return (HAND_RANKINGS["High Card"], sorted_ranks[-1])
+
+
+def evaluate_batch(cards):
+    """
+    Vectorised evaluate_hand for many hands at once.
+    cards: (N, k) integer array of cards, 5 <= k <= 7, no duplicates within a row.
+    Returns an (N,) int32 array of strengths comparable with evaluate_hand.
+    """
+    cards = np.asarray(cards, dtype=np.int64)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError(f"Expected an (N, 5-7) card array, got shape {cards.shape}.")
+
+    if _BATCH_RANK_KEYS is None:
+        load_tables()
+
+    products = _BATCH_CARD_PRIMES[cards].prod(axis=1)
+    strengths = _BATCH_RANK_VALUES[np.searchsorted(_BATCH_RANK_KEYS, products)]
+
+    # Cards in a row are distinct, so summing their bits builds the hand mask
+    masks = np.left_shift(1, cards).sum(axis=1)
+    for suit in range(4):
+        suit_masks = (masks >> (NUM_RANKS * suit)) & RANK_MASK
+        np.maximum(strengths, _BATCH_FLUSH_TABLE[suit_masks], out=strengths)
+    return strengths
+
+
+def hand_category(strength):
+    """Return the HAND_RANKINGS value for a strength from evaluate_hand."""
+    return strength >> CATEGORY_SHIFT
+
+
+def hand_name(strength):
+    """Return the display name (e.g. "Full House") for a strength."""
+    category = hand_category(strength)
+    return next(name for name, value in HAND_RANKINGS.items() if value == category)
 
 
 def compare_hands(hand1, hand2):
-    rank1, high_card1 = evaluate_hand(hand1)
-    rank2, high_card2 = evaluate_hand(hand2)
+    strength1 = evaluate_hand(hand1)
+    strength2 = evaluate_hand(hand2)
 
-    if rank1 > rank2:
+    if strength1 > strength2:
         return 1
-    elif rank1 < rank2:
+    elif strength1 < strength2:
         return -1
-    else:
-        # Tie-breaking by high card
-        if high_card1 > high_card2:
-            return 1
-        elif high_card1 < high_card2:
-            return -1
-        else:
-            # Additional tie-breaking for more complex cases
-            sorted_hand1 = sorted([card[:-1] for card in hand1], reverse=True)
-            sorted_hand2 = sorted([card[:-1] for card in hand2], reverse=True)
-            for card1, card2 in zip(sorted_hand1, sorted_hand2):
-                if card1 != card2:
-                    return 1 if card1 > card2 else -1
-            return 0  # Hands are identical
+    return 0  # Hands are identical in strength (split pot)
 
 
 def determine_winner(players, community_cards):
-    best_hand = None
+    best_strength = -1
     winners = []
 
     for player in players:
-        hand = player.hand + community_cards
-        if best_hand is None:
-            best_hand = hand
+        strength = evaluate_hand(player.hand + community_cards)
+        if strength > best_strength:
+            best_strength = strength
             winners = [player]
-        else:
-            comparison = compare_hands(hand, best_hand)
-            if comparison > 0:
-                best_hand = hand
-                winners = [player]
-            elif comparison == 0:
-                winners.append(player)
+        elif strength == best_strength:
+            winners.append(player)
 
     if len(winners) == 1:
         return winners[0]
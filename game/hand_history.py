@@ -0,0 +1,342 @@
+"""
+Append-only binary hand histories.
+
+A HandHistoryWriter passed to engine.GameState(recorder=...) records every
+completed hand: the seats and their stacks, hole cards, the board and each
+bet, call, check and fold with its amount. Records are packed with struct into
+an in-memory buffer and written in large blocks, so recording costs a few
+microseconds per hand. A hand that is abandoned before it finishes (the game
+is closed, or re-dealt) is not written.
+
+read_hands() streams the records back one hand at a time without loading the
+file, and replay() drives them through a GameState, checking that the engine
+reaches the same result.
+
+File layout: FILE_MAGIC, then records of a type byte and a u32 payload length.
+
+    "S"  seat names: count, then (u8 length, UTF-8 name) per seat. Written
+         before the first hand and whenever the names change.
+    "H"  a hand: HAND_HEADER, SEAT per seat (hole cards NO_CARD for a seat
+         sitting out), the board cards, ACTION per action.
+
+    python hand_history.py hand_history.phh    # summarise a file
+"""
+
+import argparse
+import os
+import struct
+from collections import namedtuple
+
+from cards import DECK
+from engine import FLOP, PRE_FLOP, RIVER, TURN, GameState
+from player import Player
+
+HISTORY_FILE = "hand_history.phh"
+FILE_MAGIC = b"PKRHIST\x01"
+BUFFER_SIZE = 1 << 16  # Bytes held in memory before they are written out
+READ_SIZE = 1 << 20
+
+RECORD = struct.Struct("<cI")  # type, payload length
+HAND_HEADER = struct.Struct("<QBBBH")  # hand, seats, small blind, board, actions
+SEAT = struct.Struct("<iiBB")  # starting stack, final stack, hole cards
+NO_CARD = 0xFF  # Hole cards of a seat sitting the hand out
+NO_CARDS = (NO_CARD, NO_CARD)
+ACTION = struct.Struct("<BBI")  # seat, stage << 2 | action, chips
+SEATS_RECORD = b"S"
+HAND_RECORD = b"H"
+
+STAGES = (PRE_FLOP, FLOP, TURN, RIVER)
+ACTIONS = ("fold", "call", "bet", "check")
+STAGE_CODES = {stage: i for i, stage in enumerate(STAGES)}
+ACTION_CODES = {action: i for i, action in enumerate(ACTIONS)}
+
+# actions are (seat, stage, action, amount) with stage and action as engine strings
+HandRecord = namedtuple(
+    "HandRecord",
+    [
+        "hand_number",
+        "names",
+        "small_blind_index",
+        "stacks",
+        "final_stacks",
+        "hole_cards",
+        "board",
+        "actions",
+    ],
+)
+
+
+class HandHistoryWriter:
+    def __init__(self, path=HISTORY_FILE, buffer_size=BUFFER_SIZE):
+        """Append to `path`, starting it with FILE_MAGIC if it is new or empty."""
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(FILE_MAGIC)
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        self.names = None  # Seat names last written
+        self.hand = None  # [header values, seats, actions] of the hand in play
+        self.hands_written = 0
+
+    def begin_hand(self, game_state):
+        """Start recording a freshly dealt hand (replaces any unfinished one)."""
+        players = game_state.players
+        self.hand = [
+            game_state.hand_number,
+            game_state.small_blind_index,
+            [(player.chips, player.hand) for player in players],
+            [],
+        ]
+
+    def record_action(self, game_state, player, action, amount):
+        if self.hand is None:
+            return
+        self.hand[3].append(
+            ACTION.pack(
+                game_state.seat_of[player],
+                STAGE_CODES[game_state.stage] << 2 | ACTION_CODES[action],
+                amount,
+            )
+        )
+
+    def end_hand(self, game_state):
+        """Write the hand that has just been settled."""
+        if self.hand is None:
+            return
+        hand_number, small_blind_index, seats, actions = self.hand
+        self.hand = None
+
+        names = tuple(player.name for player in game_state.players)
+        if names != self.names:
+            self._write_names(names)
+
+        board = game_state.community_cards
+        parts = [
+            HAND_HEADER.pack(
+                hand_number, len(seats), small_blind_index, len(board), len(actions)
+            )
+        ]
+        for (stack, hole_cards), player in zip(seats, game_state.players):
+            parts.append(SEAT.pack(stack, player.chips, *(hole_cards or NO_CARDS)))
+        parts.append(bytes(board))
+        parts.extend(actions)
+        self._write_record(HAND_RECORD, b"".join(parts))
+        self.hands_written += 1
+
+    def _write_names(self, names):
+        self.names = names
+        payload = bytearray([len(names)])
+        for name in names:
+            encoded = name.encode()[:255]
+            payload.append(len(encoded))
+            payload += encoded
+        self._write_record(SEATS_RECORD, payload)
+
+    def _write_record(self, kind, payload):
+        self.buffer += RECORD.pack(kind, len(payload))
+        self.buffer += payload
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _parse_names(payload):
+    names, offset = [], 1
+    for _ in range(payload[0]):
+        length = payload[offset]
+        names.append(bytes(payload[offset + 1 : offset + 1 + length]).decode())
+        offset += 1 + length
+    return tuple(names)
+
+
+def _parse_hand(payload, names):
+    hand_number, seats, small_blind_index, board_size, action_count = (
+        HAND_HEADER.unpack_from(payload)
+    )
+    offset = HAND_HEADER.size
+    stacks, final_stacks, hole_cards = [], [], []
+    for _ in range(seats):
+        stack, final_stack, first, second = SEAT.unpack_from(payload, offset)
+        stacks.append(stack)
+        final_stacks.append(final_stack)
+        hole_cards.append((first, second) if first != NO_CARD else ())
+        offset += SEAT.size
+    board = tuple(payload[offset : offset + board_size])
+    offset += board_size
+    actions = []
+    for seat, code, amount in ACTION.iter_unpack(
+        payload[offset : offset + action_count * ACTION.size]
+    ):
+        actions.append((seat, STAGES[code >> 2], ACTIONS[code & 3], amount))
+    return HandRecord(
+        hand_number,
+        names,
+        small_blind_index,
+        tuple(stacks),
+        tuple(final_stacks),
+        tuple(hole_cards),
+        board,
+        actions,
+    )
+
+
+def _read_records(path):
+    """Yield (type, payload) for every complete record in a file, a block at a time."""
+    with open(path, "rb") as f:
+        if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f"{path} is not a hand history file.")
+        data = b""
+        while True:
+            block = f.read(READ_SIZE)
+            if not block:
+                return  # A truncated last record (e.g. after a crash) is dropped
+            data = data[offset:] + block if data else block
+            view = memoryview(data)
+            offset = 0
+            while offset + RECORD.size <= len(data):
+                kind, length = RECORD.unpack_from(data, offset)
+                end = offset + RECORD.size + length
+                if end > len(data):
+                    break
+                yield kind, view[offset + RECORD.size : end]
+                offset = end
+            view.release()
+
+
+def read_hands(paths):
+    """Stream the HandRecords in a file (or in each of a list of files)."""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    for path in paths:
+        names = ()
+        for kind, payload in _read_records(path):
+            if kind == HAND_RECORD:
+                yield _parse_hand(payload, names)
+            elif kind == SEATS_RECORD:
+                names = _parse_names(payload)
+
+
+class _ReplayRandom:
+    """Stands in for GameState.rng so the next shuffle deals a recorded hand."""
+
+    def __init__(self):
+        self.hand = None
+
+    def shuffle(self, deck):
+        hand, self.hand = self.hand, None
+        if hand is None:
+            return  # The engine dealing ahead after a hand; replaced before play
+        # Hole cards are popped from the end of the deck seat by seat, then the
+        # flop is the last three cards and the turn and river are popped
+        dealt = [card for cards in hand.hole_cards for card in cards]
+        board = list(hand.board)
+        known = set(dealt) | set(board)
+        deck[:] = (
+            [card for card in DECK if card not in known]
+            + board[3:][::-1]
+            + board[:3]
+            + dealt[::-1]
+        )
+
+
+class _ReplayResult:
+    """Recorder for replay(): keeps the stacks each hand was settled with."""
+
+    def __init__(self):
+        self.final_stacks = None
+
+    def begin_hand(self, game_state):
+        pass
+
+    def record_action(self, game_state, player, action, amount):
+        pass
+
+    def end_hand(self, game_state):
+        # Only the first hand settled counts; the engine may deal ahead and,
+        # with short stacks, even play out the next hand on its own
+        if self.final_stacks is None:
+            self.final_stacks = tuple(player.chips for player in game_state.players)
+
+
+def replay(hands, players=None):
+    """
+    Play HandRecords (e.g. from read_hands) through a GameState and yield each
+    one once the engine has settled it. Raises ValueError if an action is out
+    of turn or a final stack differs from the recording. `players` defaults to
+    plain Players named after the seats.
+    """
+    rng = _ReplayRandom()
+    result = _ReplayResult()
+    game_state = None
+    for hand in hands:
+        if game_state is None or len(game_state.players) != len(hand.stacks):
+            seats = players or [Player(name, 0) for name in hand.names]
+            game_state = GameState(seats, rng=rng, recorder=result)
+
+        for player, stack in zip(game_state.players, hand.stacks):
+            player.chips = stack
+        game_state.small_blind_index = hand.small_blind_index
+        rng.hand = hand
+        result.final_stacks = None
+        game_state.start_hand()
+
+        hand_number = game_state.hand_number
+        for seat, stage, action, amount in hand.actions:
+            if game_state.hand_number != hand_number:
+                raise ValueError(f"Hand {hand.hand_number} ended before all actions.")
+            if seat != game_state.current_player_index or stage != game_state.stage:
+                raise ValueError(
+                    f"Hand {hand.hand_number}: seat {seat} cannot act in the "
+                    f"{stage} now."
+                )
+            game_state.apply_action(game_state.players[seat], action, amount)
+
+        final_stacks = result.final_stacks
+        if final_stacks is None or final_stacks != hand.final_stacks:
+            raise ValueError(
+                f"Hand {hand.hand_number} replayed to {final_stacks}, "
+                f"recorded {hand.final_stacks}."
+            )
+        yield hand
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise hand history files.")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument(
+        "--replay", action="store_true", help="Also replay every hand to check it"
+    )
+    args = parser.parse_args()
+
+    hands = read_hands(args.paths)
+    if args.replay:
+        hands = replay(hands)
+    count = 0
+    profit = {}
+    for hand in hands:
+        count += 1
+        for name, stack, final_stack in zip(hand.names, hand.stacks, hand.final_stacks):
+            profit[name] = profit.get(name, 0) + final_stack - stack
+
+    print(f"{count} hands")
+    for name, chips in sorted(profit.items()):
+        print(f"{name:20s} {chips:+d} chips")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Compact heads-up hand state for search and tree traversal.
+
+HandState holds one hand of the game the CFR trainer and CFRBot play (the
+engine's blinds, fixed bet sizes and per-stage raise cap, with stacks) in a
+dozen __slots__ of ints, tuples and a history string. apply() plays an action
+in O(1) and pushes the few fields it changes onto an undo stack, so a
+traversal walks the tree with apply()/undo() instead of copying objects, and
+clone() is a shallow copy of those fields. Blind, call and raise amounts come
+from the engine's posted_blinds(), call_amount() and raise_amount(), and raises
+are allowed by its can_raise(), so short stacks bet exactly as in GameState.
+
+Actions are indices into CFRBot.ACTIONS (FOLD, CALL, BET, CHECK); stages are
+indices into STAGES, with SHOWDOWN once the betting is over.
+"""
+
+from CFRBot import ACTIONS
+from engine import (
+    FLOP,
+    HISTORY_TOKENS,
+    PRE_FLOP,
+    RIVER,
+    TURN,
+    call_amount,
+    can_raise,
+    posted_blinds,
+    raise_amount,
+)
+from evaluator import evaluate_hand
+
+FOLD, CALL, BET, CHECK = (
+    ACTIONS.index(action) for action in ("fold", "call", "bet", "check")
+)
+TOKENS = [HISTORY_TOKENS[action] for action in ACTIONS]
+
+STAGES = [PRE_FLOP, FLOP, TURN, RIVER]
+SHOWDOWN = len(STAGES)
+BOARD_SIZES = [0, 3, 4, 5]  # Community cards visible at each stage
+
+
+class HandState:
+    __slots__ = (
+        "hands",  # Hole cards per seat
+        "board",  # All five community cards (only some are visible before the river)
+        "strengths",  # Showdown hand strengths, evaluated on first use
+        "big_blind_seat",  # Acts first after the flop
+        "stage",
+        "player",  # Seat to act
+        "bets",  # Chips put in this stage, per seat
+        "totals",  # Chips put in this hand, per seat
+        "stacks",  # Chips left behind, per seat
+        "acted",  # Actions taken this stage
+        "raises",  # Bets made this stage
+        "history",  # Betting history as in GameState.history_string()
+        "folded",  # Seat that folded, or -1
+        "undo_stack",
+    )
+
+    def __init__(self, hands, board, stacks, big_blind_seat=1):
+        """A new hand with the blinds posted from `stacks` (chips before the blinds)."""
+        small_blind_seat = 1 - big_blind_seat
+        blinds = [0, 0]
+        blinds[small_blind_seat], blinds[big_blind_seat] = posted_blinds(
+            stacks[small_blind_seat], stacks[big_blind_seat]
+        )
+
+        self.hands = hands
+        self.board = board
+        self.strengths = None
+        self.big_blind_seat = big_blind_seat
+        self.stage = 0
+        self.player = small_blind_seat
+        self.bets = tuple(blinds)
+        self.totals = tuple(blinds)
+        self.stacks = (stacks[0] - blinds[0], stacks[1] - blinds[1])
+        self.acted = 0
+        self.raises = 0
+        self.history = ""
+        self.folded = -1
+        self.undo_stack = []
+
+        # As in GameState.post_blinds: an all-in small blind passes the action
+        # to the big blind, and if the blinds leave nobody a bet to make or
+        # call the board is run out
+        if self.stacks[small_blind_seat] == 0:
+            self.player = big_blind_seat
+        able = [seat for seat in (0, 1) if self.stacks[seat] > 0]
+        if len(able) < 2 and all(self.bets[seat] >= max(self.bets) for seat in able):
+            self.stage = SHOWDOWN
+
+    @classmethod
+    def from_game_state(cls, game_state, hands=None, board=None):
+        """
+        The current hand of a heads-up engine.GameState. Cards the caller cannot
+        see (the opponent's hand, the rest of the board) are taken from `hands`
+        and `board` when given, so a search can fill them in with samples.
+        """
+        if len(game_state.players) != 2:
+            raise ValueError("HandState only models heads-up hands.")
+        if game_state.stage is None:
+            raise ValueError("No hand is being played.")
+        players = game_state.players
+        state = cls.__new__(cls)
+        state.hands = hands or tuple(tuple(player.hand) for player in players)
+        state.board = board or tuple(game_state.community_cards)
+        state.strengths = None
+        state.big_blind_seat = game_state.big_blind_index
+        state.stage = STAGES.index(game_state.stage)
+        state.player = game_state.current_player_index
+        state.bets = tuple(player.current_bet for player in players)
+        state.totals = tuple(player.total_bet for player in players)
+        state.stacks = tuple(player.chips for player in players)
+        state.acted = len(game_state.betting_history[-1])
+        state.raises = game_state.raises_this_stage()
+        state.history = game_state.history_string()
+        state.folded = -1
+        state.undo_stack = []
+        return state
+
+    def clone(self):
+        """An independent copy of the current position (with an empty undo stack)."""
+        other = HandState.__new__(HandState)
+        other.hands = self.hands
+        other.board = self.board
+        other.strengths = self.strengths
+        other.big_blind_seat = self.big_blind_seat
+        other.stage = self.stage
+        other.player = self.player
+        other.bets = self.bets
+        other.totals = self.totals
+        other.stacks = self.stacks
+        other.acted = self.acted
+        other.raises = self.raises
+        other.history = self.history
+        other.folded = self.folded
+        other.undo_stack = []
+        return other
+
+    def is_terminal(self):
+        return self.folded >= 0 or self.stage == SHOWDOWN
+
+    def visible_board(self):
+        return self.board[: BOARD_SIZES[self.stage]]
+
+    def to_call(self):
+        bets = self.bets
+        return call_amount(max(bets), bets[self.player], self.stacks[self.player])
+
+    def legal_actions(self):
+        """Actions the player to act may take, in ACTIONS order."""
+        player = self.player
+        to_call = self.to_call()
+        actions = [FOLD, CALL] if to_call > 0 else [CHECK]
+        if can_raise(
+            self.raises, to_call, self.stacks[player], self.stacks[1 - player] > 0
+        ):
+            actions.append(BET)
+        return actions
+
+    def apply(self, action):
+        """Play an action for the player to act. Undo it with undo()."""
+        self.undo_stack.append(
+            (
+                self.stage,
+                self.player,
+                self.bets,
+                self.totals,
+                self.stacks,
+                self.acted,
+                self.raises,
+                self.history,
+                self.folded,
+            )
+        )
+        player = self.player
+        opponent = 1 - player
+        self.history += TOKENS[action]
+
+        if action == FOLD:
+            self.folded = player
+            return
+
+        if action == BET or action == CALL:
+            bets, stacks = self.bets, self.stacks
+            # The bet to match is the larger one, which a short big blind may
+            # leave with the player to act
+            current_bet = max(bets)
+            if action == BET:
+                self.raises += 1
+                added = raise_amount(
+                    STAGES[self.stage], current_bet, bets[player], stacks[player]
+                )
+            else:
+                added = call_amount(current_bet, bets[player], stacks[player])
+            if player == 0:
+                self.bets = (bets[0] + added, bets[1])
+                self.totals = (self.totals[0] + added, self.totals[1])
+                self.stacks = (stacks[0] - added, stacks[1])
+            else:
+                self.bets = (bets[0], bets[1] + added)
+                self.totals = (self.totals[0], self.totals[1] + added)
+                self.stacks = (stacks[0], stacks[1] - added)
+
+        self.acted += 1
+        # After a check or call the round goes on only if the opponent has yet
+        # to act and still has chips to act with
+        if action == BET or (self.acted < 2 and self.stacks[opponent] > 0):
+            self.player = opponent
+            return
+
+        # Betting round over; with a player all-in the board is simply run out
+        if self.stage == SHOWDOWN - 1 or 0 in self.stacks:
+            self.stage = SHOWDOWN
+            return
+        self.stage += 1
+        self.history += "/"
+        self.bets = (0, 0)
+        self.acted = 0
+        self.raises = 0
+        self.player = self.big_blind_seat
+
+    def undo(self):
+        """Take back the last applied action."""
+        (
+            self.stage,
+            self.player,
+            self.bets,
+            self.totals,
+            self.stacks,
+            self.acted,
+            self.raises,
+            self.history,
+            self.folded,
+        ) = self.undo_stack.pop()
+
+    def utility(self, seat):
+        """Chips `seat` wins (or loses) in a terminal state, relative to the hand's start."""
+        if self.folded >= 0:
+            lost = self.totals[self.folded]
+            return -lost if seat == self.folded else lost
+
+        if self.strengths is None:
+            board = list(self.board)
+            self.strengths = tuple(
+                evaluate_hand(list(hand) + board) for hand in self.hands
+            )
+        ours, theirs = self.strengths[seat], self.strengths[1 - seat]
+        if ours == theirs:
+            return 0
+        # Chips beyond what the other player matched are returned
+        matched = min(self.totals)
+        return matched if ours > theirs else -matched
@@ -0,0 +1,289 @@
+"""
+Array-backed regret and strategy storage for CFR.
+
+Information sets are identified by a stable 64-bit fingerprint of their key
+string and placed in an open-addressing hash index (linear probing). Row i of
+the float32 `regrets`, `strategy_sum` and `current` arrays belongs to the
+fingerprint in slot i of `keys`, so the whole table is four flat arrays. Tables
+can live in memory or in a directory of .npy files that are memory-mapped,
+which lets the training state exceed RAM and be shared by several processes.
+
+`current` caches each row's regret-matching strategy. Regret and strategy
+updates are applied to many rows at once with accumulate(), and
+update_current() then recomputes the cached strategy of those rows in one
+vectorised regret_matching() call, so a traversal reads a node's strategy
+instead of recomputing it. A row whose cache is all zeros has not been
+computed yet.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+MAX_LOAD_FACTOR = 0.7
+DEFAULT_CAPACITY = 1 << 16
+
+KEYS_FILE = "keys.npy"
+REGRETS_FILE = "regrets.npy"
+STRATEGY_FILE = "strategy_sum.npy"
+CURRENT_FILE = "current.npy"
+META_FILE = "meta.json"
+
+
+def fingerprint(key):
+    """Stable non-zero 64-bit fingerprint of an information set key string."""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1  # 0 marks an empty slot
+
+
+def probe_insert(slot_keys, keys, start_slots):
+    """
+    Vectorised linear-probing insert of distinct non-zero keys into slot_keys
+    (0 = empty; len(slot_keys) a power of two). Each round, the first key aiming
+    at an empty slot claims it and the rest probe the next slot.
+    Returns the slot of every key.
+    """
+    mask = np.uint64(len(slot_keys) - 1)
+    slots = np.asarray(start_slots, dtype=np.uint64) & mask
+    result = np.empty(len(keys), dtype=np.int64)
+    pending = np.arange(len(keys))
+    while len(pending):
+        free = slot_keys[slots] == 0
+        _, first = np.unique(slots, return_index=True)
+        claim = np.zeros(len(slots), dtype=bool)
+        claim[first] = True
+        claim &= free
+        slot_keys[slots[claim]] = keys[pending[claim]]
+        result[pending[claim]] = slots[claim]
+        pending = pending[~claim]
+        slots = (slots[~claim] + np.uint64(1)) & mask
+    return result
+
+
+def regret_matching(regrets, legal_mask):
+    """
+    Current strategy by regret matching, for one row of regrets or a 2-D batch
+    of rows: positive regrets normalised over the legal actions (a 0/1 mask of
+    the same shape, or one row broadcast over the batch), or uniform over them
+    where no legal action has positive regret.
+    """
+    positive = np.maximum(regrets, 0.0) * legal_mask
+    totals = positive.sum(axis=-1, keepdims=True)
+    uniform = legal_mask / legal_mask.sum(axis=-1, keepdims=True)
+    return np.where(totals > 0, positive / np.where(totals > 0, totals, 1.0), uniform)
+
+
+def _new_array(path, name, shape, dtype):
+    """A zeroed array, memory-mapped to path/name when a path is given."""
+    if path is None:
+        return np.zeros(shape, dtype=dtype)
+    return np.lib.format.open_memmap(
+        os.path.join(path, name), mode="w+", dtype=dtype, shape=shape
+    )
+
+
+class InfosetTable:
+    def __init__(self, num_actions, capacity=DEFAULT_CAPACITY, path=None):
+        """
+        Create an empty table. capacity is rounded up to a power of two.
+        If path is given the arrays are created as memory-mapped files in that
+        directory; otherwise they are held in memory.
+        """
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        self.num_actions = num_actions
+        self.path = path
+        self.count = 0
+        self.meta = {}  # Extra values persisted with the table, e.g. iterations
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.mask = capacity - 1
+        shape = (capacity, self.num_actions)
+        self.keys = _new_array(self.path, KEYS_FILE, (capacity,), np.uint64)
+        self.regrets = _new_array(self.path, REGRETS_FILE, shape, np.float32)
+        self.strategy_sum = _new_array(self.path, STRATEGY_FILE, shape, np.float32)
+        self.current = _new_array(self.path, CURRENT_FILE, shape, np.float32)
+        self.grow_at = MAX_LOAD_FACTOR * capacity  # Count past which row() grows
+
+    @classmethod
+    def open(cls, path, mode="r+"):
+        """Memory-map a table saved in `path`. Use mode="r" for read-only access."""
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+
+        table = cls.__new__(cls)
+        table.num_actions = meta.pop("num_actions")
+        table.count = meta.pop("count")
+        table.meta = meta
+        table.path = path
+        table.keys = np.load(os.path.join(path, KEYS_FILE), mmap_mode=mode)
+        table.regrets = np.load(os.path.join(path, REGRETS_FILE), mmap_mode=mode)
+        table.strategy_sum = np.load(os.path.join(path, STRATEGY_FILE), mmap_mode=mode)
+        table.capacity = len(table.keys)
+        table.mask = table.capacity - 1
+        table.grow_at = MAX_LOAD_FACTOR * table.capacity
+        if os.path.exists(os.path.join(path, CURRENT_FILE)):
+            table.current = np.load(os.path.join(path, CURRENT_FILE), mmap_mode=mode)
+        else:
+            # Saved before strategies were cached: every row is recomputed on use
+            writable = None if mode == "r" else path
+            table.current = _new_array(
+                writable, CURRENT_FILE, table.regrets.shape, np.float32
+            )
+        return table
+
+    def __len__(self):
+        return self.count
+
+    def _slot(self, fp):
+        """Slot holding fingerprint fp, or the empty slot where it would go."""
+        keys = self.keys
+        slot = fp & self.mask
+        while True:
+            stored = int(keys[slot])
+            if stored == fp or stored == 0:
+                return slot
+            slot = (slot + 1) & self.mask
+
+    def find(self, key):
+        """Row of an information set, or -1 if it has never been stored."""
+        fp = fingerprint(key)
+        slot = self._slot(fp)
+        return slot if self.keys[slot] == fp else -1
+
+    def row(self, key):
+        """
+        Row of an information set, inserting it if needed. Inserting may grow
+        the table and replace its arrays, so call this before indexing them.
+        """
+        fp = fingerprint(key)
+        slot = self._slot(fp)
+        if self.keys[slot] != fp:
+            if self.count + 1 > self.grow_at:
+                self._grow()
+                slot = self._slot(fp)
+            self.keys[slot] = fp
+            self.count += 1
+        return slot
+
+    def reserve(self, count):
+        """Grow now, if needed, so `count` more inserts leave every row where it is."""
+        while self.count + count > self.grow_at:
+            self._grow()
+
+    def _grow(self):
+        """Double the capacity and re-insert every stored fingerprint."""
+        old_keys, old_regrets, old_strategy, old_current = (
+            np.array(self.keys),
+            np.array(self.regrets),
+            np.array(self.strategy_sum),
+            np.array(self.current),
+        )
+        self._allocate(self.capacity * 2)
+
+        old_slots = np.flatnonzero(old_keys)
+        fps = old_keys[old_slots]
+        slots = probe_insert(self.keys, fps, fps & np.uint64(self.mask))
+        self.regrets[slots] = old_regrets[old_slots]
+        self.strategy_sum[slots] = old_strategy[old_slots]
+        self.current[slots] = old_current[old_slots]
+
+    def average_strategy(self, row):
+        """Normalised average strategy for a row (uniform if it was never reached)."""
+        strategy_sum = self.strategy_sum[row]
+        total = strategy_sum.sum()
+        if total > 0:
+            return strategy_sum / total
+        return np.full(self.num_actions, 1.0 / self.num_actions, dtype=np.float32)
+
+    def strategies(self, rows, legal_masks):
+        """Regret-matching strategies for a batch of rows (see regret_matching)."""
+        return regret_matching(self.regrets[rows], legal_masks)
+
+    def accumulate(self, rows, regret_deltas=None, strategy_deltas=None):
+        """Add per-row regret and/or strategy updates; rows may repeat."""
+        if regret_deltas is not None:
+            np.add.at(self.regrets, rows, regret_deltas)
+        if strategy_deltas is not None:
+            np.add.at(self.strategy_sum, rows, strategy_deltas)
+
+    def update_current(self, rows, legal_masks):
+        """Recompute the cached current strategy of rows from their regrets."""
+        self.current[rows] = self.strategies(rows, legal_masks)
+
+    def stored_rows(self):
+        """Indices of the rows that hold an information set."""
+        return np.flatnonzero(self.keys)
+
+    def _write_meta(self, path):
+        meta = dict(self.meta, num_actions=self.num_actions, count=self.count)
+        with open(os.path.join(path, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+    def flush(self):
+        """Write memory-mapped arrays and metadata to disk."""
+        if self.path is None:
+            raise ValueError("This table is not backed by files; use save().")
+        for array in (self.keys, self.regrets, self.strategy_sum, self.current):
+            array.flush()
+        self._write_meta(self.path)
+
+    def save(self, path):
+        """Write the table to `path` so it can be reopened with InfosetTable.open."""
+        if path == self.path:
+            self.flush()
+            return
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, KEYS_FILE), self.keys)
+        np.save(os.path.join(path, REGRETS_FILE), self.regrets)
+        np.save(os.path.join(path, STRATEGY_FILE), self.strategy_sum)
+        np.save(os.path.join(path, CURRENT_FILE), self.current)
+        self._write_meta(path)
+
+
+class SharedInfosetTable(InfosetTable):
+    """
+    An InfosetTable attached to by several processes at once (see parallel_cfr).
+    Capacity is fixed. Lookups and regret updates are lock-free (concurrent
+    float adds may occasionally lose an update, and a cached strategy may then
+    lag its regrets until the row is next updated, which sampled CFR tolerates);
+    inserting a new information set takes the shared insert lock and bumps a
+    shared counter so the table can refuse to overfill.
+    """
+
+    @classmethod
+    def attach(cls, path, insert_lock, shared_count):
+        table = cls.open(path, "r+")
+        table.insert_lock = insert_lock
+        table.shared_count = shared_count  # multiprocessing.Value guarded by the lock
+        return table
+
+    def __len__(self):
+        return self.shared_count.value
+
+    def reserve(self, count):
+        pass  # Capacity is fixed; row() refuses to overfill instead
+
+    def row(self, key):
+        """Row of an information set, inserting it under the insert lock if needed."""
+        fp = fingerprint(key)
+        slot = self._slot(fp)
+        if self.keys[slot] == fp:
+            return slot
+
+        with self.insert_lock:
+            # Another process may have inserted it since the lock-free probe
+            slot = self._slot(fp)
+            if self.keys[slot] != fp:
+                if self.shared_count.value + 1 > MAX_LOAD_FACTOR * self.capacity:
+                    raise RuntimeError(
+                        "Shared infoset table is full; restart with a larger capacity."
+                    )
+                self.keys[slot] = fp
+                self.shared_count.value += 1
+        return slot
@@ -0,0 +1,219 @@
+"""
+Latency instrumentation for the hot paths.
+
+enable() wraps a fixed set of functions (TARGETS) with timers that record
+every call into a per-operation histogram, and instrument() adds others (the
+GUI instruments its frame this way, since it runs as __main__):
+
+    bot.decide               a bot choosing its action (CFRBot, RuleBot)
+    engine.apply_action      one engine step, including any showdown it causes
+    engine.showdown          settling a hand at showdown
+    engine.evaluate_hand     one hand evaluation at showdown
+    gui.frame                drawing and presenting one GUI frame
+
+disable() puts the original functions back, so while instrumentation is off
+nothing is wrapped and it costs nothing. snapshot() returns the count, mean,
+p50, p99 and max of each operation, and start_dump() writes a snapshot to a
+JSON file every few seconds for watching a running server or game:
+
+    python table_server.py --metrics metrics.json
+    python poker_main.py --metrics metrics.json
+
+Timings cover the current process only. Histograms are
+updated without a lock, so under heavy threading a count may occasionally be
+lost; that is accepted to keep the timer cheap.
+"""
+
+import functools
+import importlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+DUMP_INTERVAL = 10.0  # Seconds between snapshots written by start_dump()
+
+# Histogram buckets are spaced evenly on a log scale, BUCKETS_PER_OCTAVE per
+# doubling, so percentiles are within about 9% of the true value from 1 ns up
+# to 2**MAX_OCTAVES ns (about 18 minutes)
+BUCKETS_PER_OCTAVE = 8
+MAX_OCTAVES = 40
+NUM_BUCKETS = BUCKETS_PER_OCTAVE * MAX_OCTAVES
+
+# (module, attribute path, operation)
+TARGETS = [
+    ("CFRBot", "CFRBot.decide", "bot.decide"),
+    ("RuleBot", "RuleBot.decide", "bot.decide"),
+    ("engine", "GameState.apply_action", "engine.apply_action"),
+    ("engine", "GameState.showdown", "engine.showdown"),
+    ("engine", "evaluate_hand", "engine.evaluate_hand"),
+]
+
+
+class Histogram:
+    """Call count, total, maximum and log-scale latency buckets for one operation."""
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns):
+        index = int(math.log2(ns) * BUCKETS_PER_OCTAVE) if ns > 1 else 0
+        self.counts[min(index, NUM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile, in nanoseconds."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(2 ** ((index + 1) / BUCKETS_PER_OCTAVE), self.max_ns)
+        return float(self.max_ns)
+
+    def summary(self):
+        """Snapshot of this histogram with times in microseconds."""
+        count = self.count
+        return {
+            "count": count,
+            "total_ms": self.total_ns / 1e6,
+            "mean_us": self.total_ns / count / 1e3 if count else 0.0,
+            "p50_us": self.percentile(50) / 1e3,
+            "p99_us": self.percentile(99) / 1e3,
+            "max_us": self.max_ns / 1e3,
+        }
+
+
+histograms = {}  # operation -> Histogram
+_patched = []  # (owner, attribute, original) for everything wrapped
+_dumper = None
+
+
+def _timed(function, histogram):
+    perf_counter_ns = time.perf_counter_ns
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        start = perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            histogram.add(perf_counter_ns() - start)
+
+    return timed
+
+
+def is_enabled():
+    return bool(_patched)
+
+
+def instrument(owner, attribute, operation):
+    """Time calls to owner.attribute (a function or method) as `operation`."""
+    original = getattr(owner, attribute)
+    histogram = histograms.setdefault(operation, Histogram())
+    setattr(owner, attribute, _timed(original, histogram))
+    _patched.append((owner, attribute, original))
+
+
+def enable(targets=TARGETS):
+    """Start timing the operations in `targets` (a no-op if already enabled)."""
+    if _patched:
+        return
+    for module_name, path, operation in targets:
+        *owners, attribute = path.split(".")
+        owner = importlib.import_module(module_name)
+        for name in owners:
+            owner = getattr(owner, name)
+        instrument(owner, attribute, operation)
+
+
+def disable():
+    """Put back every function enable() and instrument() wrapped. Recorded timings are kept."""
+    while _patched:
+        owner, attribute, original = _patched.pop()
+        setattr(owner, attribute, original)
+
+
+def reset():
+    """Forget all recorded timings."""
+    for histogram in histograms.values():
+        histogram.__init__()
+
+
+def record(operation, seconds):
+    """Add one timing by hand, for code that is not in TARGETS."""
+    histograms.setdefault(operation, Histogram()).add(int(seconds * 1e9))
+
+
+def snapshot():
+    """{operation: {count, total_ms, mean_us, p50_us, p99_us, max_us}}."""
+    return {
+        operation: histogram.summary()
+        for operation, histogram in sorted(histograms.items())
+    }
+
+
+def dump(path):
+    """Write a snapshot to `path` as JSON, replacing the file atomically."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump({"time": time.time(), "operations": snapshot()}, f, indent=2)
+    os.replace(temporary, path)
+
+
+def start_dump(path, interval=DUMP_INTERVAL):
+    """Dump a snapshot to `path` every `interval` seconds from a daemon thread."""
+    global _dumper
+    stop_dump()
+    stopped = threading.Event()
+
+    def run():
+        while not stopped.wait(interval):
+            dump(path)
+
+    thread = threading.Thread(target=run, daemon=True)
+    _dumper = (thread, stopped, path)
+    thread.start()
+
+
+def stop_dump():
+    """Stop the periodic dump, writing one last snapshot."""
+    global _dumper
+    if _dumper is None:
+        return
+    thread, stopped, path = _dumper
+    _dumper = None
+    stopped.set()
+    thread.join()
+    dump(path)
+
+
+def format_snapshot(operations):
+    lines = [
+        f"{'operation':22s} {'count':>9s} {'mean us':>10s} {'p50 us':>10s} "
+        f"{'p99 us':>10s} {'max us':>10s}"
+    ]
+    for operation, stats in operations.items():
+        lines.append(
+            f"{operation:22s} {stats['count']:9d} {stats['mean_us']:10.1f} "
+            f"{stats['p50_us']:10.1f} {stats['p99_us']:10.1f} {stats['max_us']:10.1f}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # Print a dump file written by start_dump()
+    with open(sys.argv[1] if len(sys.argv) > 1 else "metrics.json") as f:
+        print(format_snapshot(json.load(f)["operations"]))
@@ -0,0 +1,215 @@
+"""
+Multi-process MCCFR training over one shared set of regret tables.
+
+Every worker runs the same sampled traversals as cfr_trainer.MCCFRTrainer, but
+all of them read and update a single memory-mapped InfosetTable, so each
+iteration improves the shared strategy instead of a private copy. Regret and
+strategy updates are lock-free (Hogwild-style: an occasional lost float add is
+harmless for sampled CFR); only inserting a new information set takes a lock.
+The table cannot grow while shared, so give it enough --capacity up front.
+
+The coordinator hands out batches of iterations, reports the combined
+iterations/s and checkpoints the table at a fixed cadence. Put --table on a
+RAM-backed filesystem such as /dev/shm to keep the shared arrays out of disk I/O.
+
+    python parallel_cfr.py --processes 8 --iterations 1000000 --capacity 16777216 \\
+        --table /dev/shm/cfr_state --checkpoint cfr_state --policy cfr_policy.bin
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import time
+
+import numpy as np
+
+from abstraction import Abstraction
+from cfr_trainer import NUM_ACTIONS, MCCFRTrainer, save_policy
+from infoset_table import META_FILE, InfosetTable, SharedInfosetTable
+
+DEFAULT_CAPACITY = 1 << 22
+BATCH_ITERATIONS = 500  # Iterations per work unit handed to a worker
+CHECKPOINT_EVERY = 100_000
+REPORT_EVERY = 10_000
+
+
+def _worker(path, abstraction_path, seed, insert_lock, shared_count, tasks, results):
+    """Train batches from `tasks` against the shared table until a None arrives."""
+    abstraction = Abstraction(abstraction_path) if abstraction_path else None
+    table = SharedInfosetTable.attach(path, insert_lock, shared_count)
+    trainer = MCCFRTrainer(seed=seed, abstraction=abstraction, table=table)
+
+    while True:
+        batch = tasks.get()
+        if batch is None:
+            break
+        start = time.perf_counter()
+        try:
+            trainer.train(batch, report_every=0)
+        except Exception as error:
+            results.put(error)
+            break
+        results.put((batch, time.perf_counter() - start))
+
+
+class ParallelMCCFRTrainer:
+    def __init__(
+        self,
+        path,
+        processes=None,
+        capacity=DEFAULT_CAPACITY,
+        abstraction_path=None,
+        seed=None,
+    ):
+        """
+        Create (or resume) the shared table in directory `path`. capacity is the
+        fixed number of slots; at most MAX_LOAD_FACTOR of them can be filled.
+        """
+        self.processes = processes or os.cpu_count()
+        self.abstraction_path = abstraction_path
+        self.seed_sequence = np.random.SeedSequence(seed)
+
+        if os.path.exists(os.path.join(path, META_FILE)):
+            self.table = InfosetTable.open(path)
+        else:
+            self.table = InfosetTable(NUM_ACTIONS, capacity, path=path)
+            self.table.flush()
+        self.iterations = self.table.meta.get("iterations", 0)
+
+        # The number of stored information sets, guarded by insert_lock
+        self.insert_lock = mp.Lock()
+        self.shared_count = mp.Value("q", self.table.count, lock=False)
+
+    def train(
+        self,
+        iterations,
+        checkpoint_path=None,
+        checkpoint_every=CHECKPOINT_EVERY,
+        batch_size=BATCH_ITERATIONS,
+        report_every=REPORT_EVERY,
+    ):
+        """Run iterations across the worker processes and return the combined it/s."""
+        tasks, results = mp.Queue(), mp.Queue()
+        for start in range(0, iterations, batch_size):
+            tasks.put(min(batch_size, iterations - start))
+        for _ in range(self.processes):
+            tasks.put(None)
+
+        # Independent random streams per worker
+        seeds = [
+            int(s.generate_state(1)[0])
+            for s in self.seed_sequence.spawn(self.processes)
+        ]
+        workers = [
+            mp.Process(
+                target=_worker,
+                args=(
+                    self.table.path,
+                    self.abstraction_path,
+                    seed,
+                    self.insert_lock,
+                    self.shared_count,
+                    tasks,
+                    results,
+                ),
+                daemon=True,
+            )
+            for seed in seeds
+        ]
+        for worker in workers:
+            worker.start()
+
+        start = time.perf_counter()
+        done = 0
+        next_report = report_every
+        next_checkpoint = self.iterations + checkpoint_every
+        try:
+            while done < iterations:
+                try:
+                    result = results.get(timeout=1.0)
+                except queue.Empty:
+                    if not any(worker.is_alive() for worker in workers):
+                        raise RuntimeError("All training workers exited early.")
+                    continue
+                if isinstance(result, Exception):
+                    raise result
+
+                batch, _ = result
+                done += batch
+                self.iterations += batch
+
+                if report_every and done >= next_report:
+                    rate = done / (time.perf_counter() - start)
+                    print(
+                        f"Iteration {self.iterations}: {rate:.0f} it/s over "
+                        f"{self.processes} processes, "
+                        f"{self.shared_count.value} information sets"
+                    )
+                    next_report += report_every
+                if checkpoint_every and self.iterations >= next_checkpoint:
+                    self.checkpoint(checkpoint_path)
+                    next_checkpoint += checkpoint_every
+        finally:
+            for worker in workers:
+                if done < iterations:
+                    worker.terminate()
+                worker.join()
+
+        rate = done / (time.perf_counter() - start)
+        self.checkpoint(checkpoint_path)
+        return rate
+
+    def checkpoint(self, path=None):
+        """
+        Flush the shared table, and copy it to `path` if given. Workers keep
+        training during the copy, so it is a consistent-enough snapshot rather
+        than an exact one.
+        """
+        self.table.count = self.shared_count.value
+        self.table.meta["iterations"] = self.iterations
+        self.table.flush()
+        if path and os.path.abspath(path) != os.path.abspath(self.table.path):
+            self.table.save(path)
+
+    def save_policy(self, path):
+        save_policy(self.table, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train a CFR policy for CFRBot across several processes."
+    )
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY)
+    parser.add_argument("--abstraction", help="Directory written by abstraction.py")
+    parser.add_argument(
+        "--table",
+        default="cfr_state",
+        help="Shared table directory (resumed if present)",
+    )
+    parser.add_argument("--checkpoint", help="Directory to copy checkpoints to")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY)
+    parser.add_argument("--policy", default="cfr_policy.bin", help="Output policy file")
+    args = parser.parse_args()
+
+    trainer = ParallelMCCFRTrainer(
+        args.table,
+        processes=args.processes,
+        capacity=args.capacity,
+        abstraction_path=args.abstraction,
+        seed=args.seed,
+    )
+    rate = trainer.train(
+        args.iterations,
+        checkpoint_path=args.checkpoint,
+        checkpoint_every=args.checkpoint_every,
+    )
+    print(f"Trained {args.iterations} iterations at {rate:.0f} it/s")
+    trainer.save_policy(args.policy)
+
+
+if __name__ == "__main__":
+    main()
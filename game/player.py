@@ -2,7 +2,9 @@ class Player:
     def __init__(self, name, chips):
         self.name = name
         self.chips = chips
-        self.current_bet = 0
+        self.hand = []  # Hole cards as ints 0-51 (see cards.py)
+        self.current_bet = 0  # Chips put in during the current stage
+        self.total_bet = 0  # Chips put in during the whole hand (for side pots)
         self.has_folded = False
         self.has_acted = False
 
@@ -26,6 +28,7 @@ class Player:
     def reset_for_new_round(self):
         # Reset bet and folded status at the start of a new round.
         self.current_bet = 0
+        self.total_bet = 0
         self.has_folded = False
         self.has_acted = False
 
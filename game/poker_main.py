@@ -1,30 +1,28 @@
+import argparse
+import math
 import pygame
-import os
+import sys
+import threading
+import instrumentation
+from collections import namedtuple
+from assets import BACKGROUND_IMAGE, BUNDLE_FILE, Assets
+from sprites import BACK, SpriteCache
+from text_cache import render_text
+from hand_history import HISTORY_FILE, HandHistoryWriter
 from evaluator import *
 from player import *
+from CFRBot import CFRBot
 from game_state import *
 
-# Initialize Pygame
-pygame.init()
-
-# Initialize the font module
-pygame.font.init()
-
-clock = pygame.time.Clock()
-
-
-chat_font = pygame.font.Font(None, 20)
-chat_log = ChatLog(chat_font, max_messages=10)
-
-# Now, you can use `chat_log` in other modules
-
-
+# Everything that needs pygame (the window, fonts, images, the game itself) is
+# created by setup(), so importing this module does no work
 WIDTH, HEIGHT = 1000, 800
-WIN = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
-pygame.display.set_caption("Poker by Kenneth Chen")
-
-# Load and convert the background image
-BACKGROUND_ORIG = pygame.image.load("images/poker-table.png").convert_alpha()
+WIN = None
+BACKGROUND_ORIG = BACKGROUND = None
+assets = card_sprites = None
+clock = chat_font = chat_log = font = seat_font = None
+game_state = bet_text_box = None
+hand_history = None  # Records every hand played at the table
 
 
 def scale_background():
@@ -33,10 +31,6 @@ def scale_background():
     )  # Scale based on new window dimensions
 
 
-# Initial scaling of the background image
-BACKGROUND = scale_background()
-
-
 def draw_bg():
     WIN.blit(BACKGROUND, (0, 0))
 
@@ -46,57 +40,14 @@ def resize_window(width, height):
     WIDTH, HEIGHT = width, height
     WIN = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
     BACKGROUND = scale_background()  # Rescale background
+    card_sprites.resize(WIDTH, HEIGHT)  # Switch to card sprites for this size
 
     # Update button positions based on the new window dimensions
     for button in buttons:
         button.update_position(WIDTH, HEIGHT)
 
     bet_text_box.update_position(WIDTH, HEIGHT)
-
-
-def load_card_images():
-    card_images = {}
-    suits = ["hearts", "diamonds", "clubs", "spades"]
-    ranks = [
-        "02",
-        "03",
-        "04",
-        "05",
-        "06",
-        "07",
-        "08",
-        "09",
-        "10",
-        "Jack",
-        "Queen",
-        "King",
-        "Ace",
-    ]
-
-    for suit in suits:
-        for rank in ranks:
-            card_name = f"{rank}_of_{suit}.png"
-            image_path = os.path.join("cards", card_name)
-            print(f"Loading image: {image_path}")  # Debug information
-            if not os.path.exists(image_path):
-                print(f"File not found: {image_path}")  # Debug information
-            else:
-                try:
-                    card_images[(rank, suit)] = pygame.image.load(
-                        image_path
-                    ).convert_alpha()
-                except pygame.error as e:
-                    print(f"Error loading image: {image_path} - {e}")
-
-    # Load the card back image
-    card_images["back"] = pygame.image.load(
-        os.path.join("cards", "card_back.png")
-    ).convert_alpha()
-
-    return card_images
-
-
-card_images = load_card_images()
+    renderer.invalidate()  # The new window surface needs a full redraw
 
 
 class Button:
@@ -114,7 +65,7 @@ class Button:
         else:
             pygame.draw.rect(screen, self.color, self.rect)
 
-        text_surface = font.render(self.text, True, (0, 0, 0))
+        text_surface = render_text(font, self.text, (0, 0, 0))
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
 
@@ -175,49 +126,26 @@ class TextBox:
         pygame.draw.rect(screen, self.color, self.rect, 2)
 
 
-# Main loop
-running = True
-
-clock = pygame.time.Clock()
 FPS = 60
 
 
-def draw_pot(screen, pot, font):
+def draw_pot(screen, pot, font, rect):
     """Displays the total pot amount on the screen."""
-    pot_text = font.render(
-        f"Total Pot: {pot} chips", True, (255, 255, 255)
+    pot_text = render_text(
+        font, f"Total Pot: {pot} chips", (255, 255, 255)
     )  # White text color
-    pot_rect = pot_text.get_rect(
-        center=(screen.get_width() // 2, 160)
-    )  # Display at the top center of the screen
+    pot_rect = pot_text.get_rect(center=rect.center)  # Centered in the pot's area
     screen.blit(pot_text, pot_rect)
 
 
 def draw_cards(screen, cards, stage):
-    card_width = 70
-    card_height = 100
-    spacing = 20
+    scale = card_sprites.scale
+    card_width = round(70 * scale)
+    card_height = round(100 * scale)
+    spacing = round(20 * scale)
     start_x = (screen.get_width() - (card_width + spacing) * len(cards)) // 2
     y = screen.get_height() // 2 - card_height // 2
 
-    # Map ranks and suits to their display names for image filenames
-    rank_map = {
-        "02": "02",
-        "03": "03",
-        "04": "04",
-        "05": "05",
-        "06": "06",
-        "07": "07",
-        "08": "08",
-        "09": "09",
-        "10": "10",
-        "J": "Jack",
-        "Q": "Queen",
-        "K": "King",
-        "A": "Ace",
-    }
-    suit_map = {"C": "clubs", "D": "diamonds", "H": "hearts", "S": "spades"}
-
     # Display only the number of cards appropriate for the current stage
     if stage == PRE_FLOP:
         cards_to_display = 0
@@ -227,223 +155,153 @@ def draw_cards(screen, cards, stage):
         cards_to_display = 4
     elif stage == RIVER:
         cards_to_display = 5
+    else:
+        cards_to_display = 0  # No hand is being played
 
     # Loop through the community cards and display them on the screen
     for i, card in enumerate(cards[:cards_to_display]):
-        rank = rank_map.get(card[:-1], card[:-1])  # Extract rank from the card string
-        suit = suit_map.get(card[-1], card[-1])  # Extract suit from the card string
-        card_key = (rank, suit)
-
-        if card_key in card_images:
-            card_image = card_images[card_key]
-            x = start_x + i * (card_width + spacing)
-            screen.blit(card_image, (x, y))
-        else:
-            print(f"Card image for {card_key} not found.")
-
+        x = start_x + i * (card_width + spacing)
+        screen.blit(card_sprites.get(card), (x, y))
 
-# Font for buttons
-font = pygame.font.Font(None, 36)
 
-# Assign blinds at the start of the round
-assign_blinds(chat_log)
+STARTING_CHIPS = 1000  # Stacks at the local table, and after a rebuy
 
-# Create the TextBox instance
-bet_text_box = TextBox(0.63125, 0.8333, 0.175, 0.0533, font)
+# Pause before the bot acts at the start of a hand so the last result can be read
+HAND_PAUSE_MS = 2000
+NETWORK_EVENT = pygame.USEREVENT + 1  # Posted when a table server sends something
 
 # Define button actions
 
 
 def fold_action(chat_log):
-    current_player = game_state.players[game_state.current_player_index]
+    current_player = game_state.current_player()
     try:
-        game_state.handle_fold(current_player, chat_log)  # Added chat_log
-        print(f"{current_player.name} has folded.")
-        game_state.next_player(deck, chat_log)  # Pass both deck and chat_log
+        game_state.apply_action(current_player, "fold", chat_log=chat_log)
     except ValueError as e:
         chat_log.add_message(f"Error: {str(e)}")
 
 
 def call_action(chat_log):
-    current_player = game_state.players[game_state.current_player_index]
+    current_player = game_state.current_player()
     try:
-        amount_to_call = game_state.current_bet - current_player.current_bet
-        if amount_to_call > 0:
-            game_state.handle_bet(current_player, amount_to_call, chat_log)
-            chat_log.add_message(
-                f"{current_player.name} has called with {amount_to_call} chips. Pot is now {game_state.pot} chips."
-            )
-        else:
-            chat_log.add_message(f"{current_player.name} has checked.")
-
-        # Check if all players have acted (use updated check)
-        if game_state.all_players_have_acted():
-            game_state.advance_stage(deck, chat_log)  # Pass chat_log here
-        else:
-            game_state.next_player(deck, chat_log)  # Pass chat_log here as well
+        game_state.apply_action(current_player, "call", chat_log=chat_log)
     except ValueError as e:
         chat_log.add_message(f"Error: {str(e)}")
 
 
 def bet_any_amount_action(chat_log):
-    current_player = game_state.players[game_state.current_player_index]
+    current_player = game_state.current_player()
     try:
         amount_to_bet = int(
             bet_text_box.text
         )  # This can raise an error if bet_text_box.text is empty or invalid
-        game_state.handle_bet(current_player, amount_to_bet, chat_log)  # Added chat_log
-        chat_log.add_message(f"{current_player.name} has bet {amount_to_bet} chips.")
-        game_state.next_player(
-            deck, chat_log
-        )  # Pass the deck and chat_log as arguments
+        game_state.apply_action(current_player, "bet", amount_to_bet, chat_log)
     except ValueError as e:
         chat_log.add_message(f"Error: {str(e)}")
 
 
 def check_action(chat_log):
-    """Handles the check action and advances the stage if all players have checked."""
-    current_player = game_state.players[game_state.current_player_index]
-
+    """Handles the check action; the engine advances the stage once everyone has acted."""
+    current_player = game_state.current_player()
     try:
-        game_state.handle_check(current_player, chat_log)  # Pass chat_log here
-        chat_log.add_message(f"{current_player.name} has checked.")
-
-        # Move to the next player or advance the stage if all players have acted
-        if game_state.all_players_have_acted():
-            game_state.advance_stage(deck, chat_log)
-        else:
-            game_state.next_player(deck, chat_log)
+        game_state.apply_action(current_player, "check", chat_log=chat_log)
     except ValueError as e:
         chat_log.add_message(f"Error: {str(e)}")
 
 
-def display_cards(screen, players):
-    """Displays player cards on the screen."""
-    rank_map = {
-        "02": "02",
-        "03": "03",
-        "04": "04",
-        "05": "05",
-        "06": "06",
-        "07": "07",
-        "08": "08",
-        "09": "09",
-        "10": "10",
-        "J": "jack",
-        "Q": "queen",
-        "K": "king",
-        "A": "ace",
-    }
-    suit_map = {"C": "clubs", "D": "diamonds", "H": "hearts", "S": "spades"}
-
-    # Define positions for Player 1 (bottom-center) and Player 2 (top-center)
-    card_width = 70
-    spacing = -20
-    num_cards = 2  # Each player has 2 cards
+# Opponents at tables of three or more sit on an ellipse around the board,
+# clockwise from the human's left to their right (angles in degrees, y down)
+RING_RADII = (0.40, 0.34)  # Fractions of the window width and height
+RING_ARC = (150, 390)
+LABEL_WIDTH = 200  # Room for a ring seat's chip count
 
-    screen_width = screen.get_width()
+# hands and labels: a rect per seat for its hole cards and its chip count;
+# pot: the rect the pot is centered in
+TableLayout = namedtuple("TableLayout", ["hands", "labels", "pot"])
 
-    # Calculate horizontal starting positions to center the cards
-    player1_start_x = (
-        screen_width - (num_cards * (card_width + spacing) - spacing)
-    ) // 2  # Centered bottom
-    player2_start_x = (
-        screen_width - (num_cards * (card_width + spacing) - spacing)
-    ) // 2  # Centered top
 
-    player_positions = [
-        (player1_start_x, screen.get_height() - 140),  # Player 1 (center-bottom)
-        (player2_start_x, 40),  # Player 2 (center-top)
-    ]
+def seat_layout(width, height, seats):
+    """
+    Where everything at a table of `seats` players is drawn. Seat 0 (the human)
+    sits at the bottom; heads-up the opponent sits at the top and the pot
+    between them, otherwise the opponents go round RING_ARC and the pot sits
+    just above the board.
+    """
+    scale = card_sprites.scale
+    card_step = round(70 * scale) + round(-20 * scale)  # The two cards overlap
+    sprite_width, sprite_height = card_sprites.card_size
+    hand_size = (
+        max(card_step + round(70 * scale), card_step + sprite_width),
+        max(round(100 * scale), sprite_height),
+    )
+
+    def hand_rect(center_x, top):
+        return pygame.Rect(center_x - hand_size[0] // 2, top, *hand_size)
+
+    hands = [hand_rect(width // 2, height - round(140 * scale))]
+    labels = [pygame.Rect(50, height - 100, width // 2 - 50, 40)]
+    if seats == 2:
+        hands.append(hand_rect(width // 2, round(40 * scale)))
+        labels.append(pygame.Rect(50, 50, width // 2 - 50, 40))
+        return TableLayout(hands, labels, pygame.Rect(0, 140, width, 40))
+
+    first, last = RING_ARC
+    for seat in range(1, seats):
+        angle = math.radians(first + (last - first) * (seat - 1) / (seats - 2))
+        x = width // 2 + round(RING_RADII[0] * width * math.cos(angle))
+        y = height // 2 + round(RING_RADII[1] * height * math.sin(angle))
+        hand = hand_rect(x, y - hand_size[1] // 2)
+        hands.append(hand)
+        label = pygame.Rect(x - LABEL_WIDTH // 2, hand.bottom + 2, LABEL_WIDTH, 24)
+        labels.append(label.clamp(pygame.Rect(0, 0, width, height)))
+    board_top = height // 2 - round(100 * scale) // 2
+    return TableLayout(hands, labels, pygame.Rect(0, board_top - 45, width, 40))
+
+
+def display_cards(screen, players, layout):
+    """Displays player cards on the screen: the human's face up, the others' backs."""
+    scale = card_sprites.scale
+    card_step = round(70 * scale) + round(-20 * scale)
+    num_cards = 2  # Each player has 2 cards
 
-    # Loop through players and display their cards at specific positions
-    for i, player in enumerate(players):
-        player_pos_x, player_pos_y = player_positions[
-            i
-        ]  # Get the x and y coordinates for the player's cards
+    for i, (player, rect) in enumerate(zip(players, layout.hands)):
+        if i > 0 and player.has_folded:
+            continue  # Folded opponents have no cards in front of them
+        if i == 0 and not player.hand:
+            continue  # Sitting out, or no hand dealt yet
 
         for j in range(num_cards):
-            if i == 1:  # Player 2, opponent
+            if i > 0:  # An opponent
                 # Show the card back for the opponent
-                card_image = card_images["back"]
+                card_image = card_sprites.get(BACK)
             else:
                 # Show the actual card for Player 1 (bottom)
-                card = player.hand[j]
-                if len(card) < 2:
-                    print(f"Error: Unexpected card format: {card}")
-                    continue
-
-                rank = rank_map.get(card[:-1])
-                if rank is None:
-                    print(f"Error: Rank '{card[:-1]}' not found in rank_map.")
-                    continue
-
-                suit = suit_map.get(card[-1])
-                if suit is None:
-                    print(f"Error: Suit '{card[-1]}' not found in suit_map.")
-                    continue
-
-                card_filename = f"{rank}_of_{suit}.png"
-                card_path = os.path.join("cards", card_filename)
-                if not os.path.isfile(card_path):
-                    print(f"Error: File '{card_path}' not found.")
-                    continue
-
-                card_image = pygame.image.load(card_path)
-
-            # Display the card (or card back) with spacing between them
-            screen.blit(
-                card_image, (player_pos_x + j * (card_width + spacing), player_pos_y)
-            )
-
-
-def display_chip_count(screen, players, player_positions):
-    """
-    Displays player chip counts on the screen, positioned based on player_positions.
-    player_positions: List of tuples, where each tuple contains the (x, y) position for each player's chip count.
-    """
-    font = pygame.font.Font(None, 36)
-
-    # Loop through players and display their chips at specific positions
-    for i, player in enumerate(players):
-        chip_text = font.render(
-            f"{player.name}: {player.chips} chips", True, (255, 255, 255)
-        )  # White text color
-
-        # Get the x and y position for the player from player_positions
-        chip_x, chip_y = player_positions[i]
-
-        # Display the chip count at the specified position
-        screen.blit(chip_text, (chip_x, chip_y))
-
-
-def draw_game_state(screen, players):
-    # Define player chip positions
-    player_positions = [
-        (50, HEIGHT - 100),  # Adjust based on the new height
-        (50, 50),  # Player 2 chip position (top-left)
-    ]
-
-    # Display player chips using the defined positions
-    display_chip_count(screen, players, player_positions)
+                card_image = card_sprites.get(player.hand[j])
 
-    # (You can also call display_cards() or other functions here)
-    display_cards(screen, players)
+            # Display the card (or card back), overlapping the one before it
+            screen.blit(card_image, (rect.x + j * card_step, rect.y))
 
 
-# Function to distribute the pot to the winner
-def distribute_pot_to_winner(winner):
-    winner.chips += game_state.pot
-    game_state.pot = 0
+def display_chip_count(screen, players, layout):
+    """Displays each player's name and chip count in its seat's label rect."""
+    for i, (player, rect) in enumerate(zip(players, layout.labels)):
+        if i > 0 and len(players) > 2:
+            # Round the ring, a smaller font centred under the seat's cards
+            chip_text = render_text(
+                seat_font, f"{player.name}: {player.chips}", (255, 255, 255)
+            )
+            screen.blit(chip_text, chip_text.get_rect(midtop=rect.midtop))
+            continue
+        chip_text = render_text(
+            font, f"{player.name}: {player.chips} chips", (255, 255, 255)
+        )  # White text color, with the same font as the buttons
+        screen.blit(chip_text, rect.topleft)
 
 
-def simulate_game_utility(bot, game_state):
-    # Example of calculating utility based on chips won/lost
-    initial_chips = bot.chips
-    current_chips = (
-        bot.chips
-    )  # At the end of the round, update this with the final chip count
-    return current_chips - initial_chips  # The
+def draw_game_state(screen, players, layout):
+    # Display player chips and cards at their seats
+    display_chip_count(screen, players, layout)
+    display_cards(screen, players, layout)
 
 
 class Button:
@@ -484,9 +342,9 @@ class Button:
         else:
             pygame.draw.rect(screen, self.color, self.rect)
 
-        text_surface = font.render(
-            self.text, True, (0, 0, 0)
-        )  # Render the button label
+        text_surface = render_text(
+            font, self.text, (0, 0, 0)
+        )  # Render the button label (cached)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
 
@@ -544,70 +402,346 @@ buttons = [
 ]
 
 
+def draw_frame(screen):
+    """Draw one complete frame of the table (also timed by benchmarks.py)."""
+    # Draw the game state (background, players, chips, etc.)
+    layout = seat_layout(
+        screen.get_width(), screen.get_height(), len(game_state.players)
+    )
+    draw_bg()
+    draw_game_state(screen, game_state.players, layout)
+
+    # Draw the community cards based on the current stage
+    draw_cards(screen, game_state.community_cards, game_state.stage)
+
+    # Draw the buttons (for human player)
+    for button in buttons:
+        button.draw(screen, font)
+
+    # Draw the total pot amount on the screen
+    draw_pot(screen, game_state.pot, font, layout.pot)
+
+    chat_log.draw(screen)
+
+    # Draw the text box (for human player)
+    bet_text_box.draw(screen)
+
+
+# Only redraw regions whose state changed, and sleep on events while waiting for
+# the human; set either to False to go back to full redraws at a steady FPS
+DIRTY_RECTS = True
+IDLE_WAIT = True
+MAX_DIRTY_RECTS = 4  # Beyond this many changed regions, update their union instead
+
+
+class DirtyRectRenderer:
+    """
+    Retained-mode drawing. Each frame, a small signature of every screen region
+    (pot, chips, cards, chat, each button, text box) is compared with the one
+    last drawn; only changed regions are redrawn, clipped to their rects, and
+    only those rects are pushed to the display.
+    """
+
+    def __init__(self):
+        self.signatures = {}
+        self.size = None  # Window size of the last full redraw
+
+    def invalidate(self):
+        """Force a full redraw on the next frame."""
+        self.size = None
+
+    def regions(self, screen):
+        """(name, signature, rects) for every independently redrawn region."""
+        width, height = screen.get_size()
+        scale = card_sprites.scale
+        players = game_state.players
+        mouse_pos = pygame.mouse.get_pos()
+        card_height = round(100 * scale)
+        layout = seat_layout(width, height, len(players))
+
+        regions = [
+            (
+                "board",
+                (game_state.stage, tuple(game_state.community_cards)),
+                [pygame.Rect(0, height // 2 - card_height // 2, width, card_height)],
+            ),
+            ("pot", game_state.pot, [layout.pot]),
+            (
+                "hands",
+                (
+                    game_state.hand_number,
+                    tuple(players[0].hand),
+                    tuple(player.has_folded for player in players),
+                ),
+                layout.hands,
+            ),
+            (
+                "chips",
+                tuple((player.name, player.chips) for player in players),
+                layout.labels,
+            ),
+            (
+                "chat",
+                chat_log.revision,
+                [pygame.Rect(0, 10, width, 20 * chat_log.max_messages)],
+            ),
+            (
+                "text_box",
+                (bet_text_box.text, bet_text_box.active),
+                [bet_text_box.rect.inflate(4, 4)],
+            ),
+        ]
+        for i, button in enumerate(buttons):
+            hovered = button.rect.collidepoint(mouse_pos)
+            regions.append((f"button{i}", hovered, [button.rect]))
+        return regions
+
+    def render(self, screen):
+        """Draw whatever changed and update the display; returns the updated rects."""
+        regions = self.regions(screen)
+        if screen.get_size() != self.size:
+            # First frame or a resize: draw everything
+            self.size = screen.get_size()
+            self.signatures = {name: signature for name, signature, _ in regions}
+            draw_frame(screen)
+            pygame.display.update()
+            return [screen.get_rect()]
+
+        dirty = []
+        for name, signature, rects in regions:
+            if self.signatures.get(name) != signature:
+                self.signatures[name] = signature
+                dirty.extend(rects)
+        if len(dirty) > MAX_DIRTY_RECTS:
+            dirty = [dirty[0].unionall(dirty[1:])]
+
+        for rect in dirty:
+            # Redraw the whole scene, but only pixels inside this rect change
+            screen.set_clip(rect)
+            draw_frame(screen)
+        screen.set_clip(None)
+        if dirty:
+            pygame.display.update(dirty)
+        return dirty
+
+
+renderer = DirtyRectRenderer()
+
+
+def present_frame(screen):
+    """Draw the frame and put it on the display (timed as gui.frame)."""
+    if DIRTY_RECTS:
+        renderer.render(screen)
+    else:
+        draw_frame(screen)
+        pygame.display.update()
+
+
+def wait_for_events(timeout):
+    """
+    Events to handle this frame. With a timeout of None, sleep until an event
+    arrives; otherwise wait at most `timeout` milliseconds.
+    """
+    if timeout is None:
+        event = pygame.event.wait()
+    elif timeout > 0:
+        event = pygame.event.wait(timeout)
+    else:
+        return pygame.event.get()
+    events = [] if event.type == pygame.NOEVENT else [event]
+    return events + pygame.event.get()
+
+
 # In the main game loop, handle the CFR bot's actions and regret updates
 
 
-def main():
-    global WIN, clock, game_state, deck
+def setup(bundle_path=BUNDLE_FILE, server=None, seats=2):
+    """
+    Initialise pygame, open the window and deal the first hand. Images are
+    loaded when first drawn, from the asset bundle if one has been built.
+    Locally the human plays `seats` - 1 CFR bots; with server=(host, port,
+    table, name), take a seat at a table_server.py table instead.
+    """
+    global WIN, BACKGROUND_ORIG, BACKGROUND, assets, card_sprites
+    global clock, chat_font, chat_log, font, seat_font, game_state, bet_text_box
+    global hand_history
+
+    pygame.init()
+    clock = pygame.time.Clock()
+    chat_font = pygame.font.Font(None, 20)
+    chat_log = ChatLog(chat_font, max_messages=10)
+    font = pygame.font.Font(None, 36)  # Font for buttons, chips and the pot
+    seat_font = pygame.font.Font(None, 26)  # Chip counts round a bigger table
 
-    # Initial button position setup
+    WIN = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption("Poker by Kenneth Chen")
+
+    assets = Assets(bundle_path)
+    BACKGROUND_ORIG = assets.image(BACKGROUND_IMAGE)
+    BACKGROUND = scale_background()
+    card_sprites = SpriteCache(assets)
+    card_sprites.resize(WIDTH, HEIGHT)
+
+    if server is not None:
+        from table_server import TableClient  # Only needed when playing online
+
+        # Stands in for the engine: mirrors the table and sends our actions
+        host, port, table, name = server
+        game_state = TableClient(
+            host, port, table, name, chat_log=chat_log, on_message=wake
+        )
+    else:
+        # The GUI is a client of one engine instance: one human player and CFR bots
+        hand_history = HandHistoryWriter(HISTORY_FILE)
+        if seats == 2:
+            bots = [CFRBot("CFR Bot", STARTING_CHIPS)]
+        else:
+            bots = [CFRBot(f"CFR Bot {i}", STARTING_CHIPS) for i in range(1, seats)]
+        game_state = GameState(
+            [Player("Player 1", STARTING_CHIPS)] + bots,
+            chat_log=chat_log,
+            recorder=hand_history,
+        )
+        game_state.start_hand()
+
+    bet_text_box = TextBox(0.63125, 0.8333, 0.175, 0.0533, font)
     for button in buttons:
         button.update_position(WIDTH, HEIGHT)
+    bet_text_box.update_position(WIDTH, HEIGHT)
 
-    running = True
-    while running:
-        for event in pygame.event.get():
+
+def rebuy_if_bust():
+    """
+    After a local hand: bust bots sit out, but once the human is bust or no
+    one is left to play, every stack is refilled and the hand re-dealt.
+    """
+    human = game_state.players[0]
+    if game_state.stage is None or human.chips + human.total_bet == 0:
+        for player in game_state.players:
+            player.chips = STARTING_CHIPS
+        chat_log.add_message(f"Everyone rebuys for {STARTING_CHIPS} chips.")
+        game_state.start_hand()
+
+
+def wait_for_table():
+    """
+    Show a waiting screen until the table server sends the table's first
+    state (once every seat is taken). Returns False if the window is closed.
+    """
+    while game_state.hand_number == 0:
+        # Errors from the server (e.g. a full table) end up in the chat log
+        message = (
+            chat_log.messages[-1][0]
+            if chat_log.messages
+            else "Waiting for the table to start..."
+        )
+        draw_bg()
+        text = render_text(font, message, (255, 255, 255))
+        WIN.blit(text, text.get_rect(center=WIN.get_rect().center))
+        pygame.display.update()
+
+        for event in wait_for_events(None):
             if event.type == pygame.QUIT:
-                running = False
+                return False
             elif event.type == pygame.VIDEORESIZE:
                 resize_window(event.w, event.h)
+        game_state.poll()
+    return True
 
-            # Human player actions
-            if game_state.players[game_state.current_player_index].name == "Player 1":
-                for button in buttons:
-                    button.is_clicked(event)
-                bet_text_box.handle_event(event)
 
-        # CFRBot takes action automatically when it's Player 2's turn
-        if game_state.players[game_state.current_player_index].name == "CFR Bot":
-            bot = game_state.players[game_state.current_player_index]
-            action = bot.choose_action(game_state)
-            bot.act(game_state, deck, chat_log)
+def wake():
+    """Wake the main loop from another thread (e.g. when the server sends news)."""
+    pygame.event.post(pygame.event.Event(NETWORK_EVENT))
 
-            # Simulate the outcome of the game and calculate utility
-            game_utility = simulate_game_utility(bot, game_state)
-
-            # Update regrets after the action is taken
-            bot.update_regret(action, game_utility, baseline_value=0)
-
-            # Move to the next player or advance stage if all have acted
-            if game_state.all_players_have_acted():
-                game_state.advance_stage(deck, chat_log)
-            else:
-                game_state.next_player(deck, chat_log)
 
-        # Draw the game state (background, players, chips, etc.)
-        draw_bg()
-        draw_game_state(WIN, game_state.players)
+def main():
+    global WIN, clock
+
+    parser = argparse.ArgumentParser(description="Play poker against the CFR bot.")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="Join a table server")
+    parser.add_argument("--table", type=int, default=0)
+    parser.add_argument("--name", default="Player 1")
+    parser.add_argument(
+        "--seats",
+        type=int,
+        default=2,
+        choices=range(MIN_SEATS, MAX_SEATS + 1),
+        help="Players at the local table, including you",
+    )
+    parser.add_argument(
+        "--metrics", metavar="FILE", help="Dump latency metrics to FILE periodically"
+    )
+    args = parser.parse_args()
+
+    if args.metrics:
+        instrumentation.enable()
+        instrumentation.instrument(sys.modules[__name__], "present_frame", "gui.frame")
+        instrumentation.start_dump(args.metrics)
+
+    server = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        server = (host or "127.0.0.1", int(port), args.table, args.name)
+    setup(server=server, seats=args.seats)
+    online = server is not None
+    running = wait_for_table() if online else True
+    renderer.render(WIN)  # First frame
+
+    # Build the hand evaluator's tables while the player looks at the first frame
+    threading.Thread(target=load_tables, daemon=True).start()
+
+    hand_number = game_state.hand_number
+    bot_ready_at = 0
 
-        # Draw the community cards based on the current stage
-        draw_cards(WIN, game_state.community_cards, game_state.stage)
+    while running:
+        if online:
+            game_state.poll()  # Apply what the server has sent
 
-        # Draw the buttons (for human player)
-        for button in buttons:
-            button.draw(WIN, font)
+        if IDLE_WAIT:
+            # Nothing moves on the table until an event arrives or the bot acts
+            if isinstance(game_state.current_player(), CFRBot):
+                events = wait_for_events(bot_ready_at - pygame.time.get_ticks())
+            else:
+                events = wait_for_events(None)
+        else:
+            events = pygame.event.get()
 
-        # Draw the total pot amount on the screen
-        draw_pot(WIN, game_state.pot, font)
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.VIDEORESIZE:
+                resize_window(event.w, event.h)
 
-        chat_log.draw(WIN)
+            # Human player actions (the human is always players[0])
+            if game_state.current_player() is game_state.players[0]:
+                for button in buttons:
+                    button.is_clicked(event)
+                bet_text_box.handle_event(event)
 
-        # Draw the text box (for human player)
-        bet_text_box.draw(WIN)
+        # Hold the bot back briefly whenever a new hand has been dealt
+        if game_state.hand_number != hand_number:
+            if not online:
+                rebuy_if_bust()
+            hand_number = game_state.hand_number
+            bot_ready_at = pygame.time.get_ticks() + HAND_PAUSE_MS
 
-        pygame.display.update()
+        # CFRBot takes action automatically when it's Player 2's turn
+        if (
+            isinstance(game_state.current_player(), CFRBot)
+            and pygame.time.get_ticks() >= bot_ready_at
+        ):
+            # The bot plays its trained policy; nothing is learned during play
+            game_state.current_player().act(game_state, chat_log)
+
+        present_frame(WIN)
         clock.tick(FPS)
 
+    instrumentation.stop_dump()
+    chat_log.close()
+    if online:
+        game_state.close()
+    else:
+        hand_history.close()
     pygame.quit()
 
 
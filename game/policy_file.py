@@ -0,0 +1,128 @@
+"""
+Frozen CFR policy files.
+
+A frozen policy is a read-only snapshot of the trained average strategy laid
+out so it can be memory-mapped and queried without being parsed:
+
+    header        64 bytes: magic, format version, number of actions, count
+    fingerprints  count x uint64, sorted (infoset_table.fingerprint of each key)
+    probabilities count x num_actions uint8, each row quantised to sum to ~255
+
+Opening one only maps the file; rows are read on demand with a binary search,
+so bots start instantly and every process using the same file shares one copy
+in the page cache.
+
+    python policy_file.py cfr_policy.pkl cfr_policy.bin   # convert a pickled policy
+"""
+
+import argparse
+import pickle
+import struct
+
+import numpy as np
+
+MAGIC = b"CFRPOL\x00\x01"
+VERSION = 1
+HEADER = struct.Struct("<8sHHQ")
+HEADER_SIZE = 64  # Padded so the fingerprint array is 8-byte aligned
+QUANT_LEVELS = 255
+
+
+def quantise(probabilities):
+    """Scale rows of probabilities to uint8 levels."""
+    return np.rint(np.asarray(probabilities) * QUANT_LEVELS).astype(np.uint8)
+
+
+def write_policy(path, fingerprints, probabilities):
+    """Write a frozen policy from parallel arrays of fingerprints and probability rows."""
+    fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    order = np.argsort(fingerprints)
+    count, num_actions = probabilities.shape
+
+    header = HEADER.pack(MAGIC, VERSION, num_actions, count)
+    with open(path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\x00"))
+        f.write(fingerprints[order].tobytes())
+        f.write(quantise(probabilities[order]).tobytes())
+
+
+def freeze_table(table, path):
+    """Write the average strategy of every visited row of an InfosetTable."""
+    rows = table.stored_rows()
+    strategy_sum = np.asarray(table.strategy_sum[rows], dtype=np.float64)
+    totals = strategy_sum.sum(axis=1)
+    visited = totals > 0
+    write_policy(
+        path,
+        table.keys[rows[visited]],
+        strategy_sum[visited] / totals[visited, None],
+    )
+
+
+def is_frozen_policy(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class FrozenPolicy:
+    """A memory-mapped frozen policy; get() mirrors dict.get on {fingerprint: probs}."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, num_actions, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} frozen policy.")
+
+        self.path = path
+        self.num_actions = num_actions
+        self.count = count
+        self.fingerprints = np.memmap(
+            path, dtype=np.uint64, mode="r", offset=HEADER_SIZE, shape=(count,)
+        )
+        self.probabilities = np.memmap(
+            path,
+            dtype=np.uint8,
+            mode="r",
+            offset=HEADER_SIZE + 8 * count,
+            shape=(count, num_actions),
+        )
+
+    def __len__(self):
+        return self.count
+
+    def find(self, fp):
+        """Row of fingerprint fp, or -1 if the policy has no entry for it."""
+        index = int(np.searchsorted(self.fingerprints, np.uint64(fp)))
+        if index < self.count and self.fingerprints[index] == fp:
+            return index
+        return -1
+
+    def __contains__(self, fp):
+        return self.find(fp) >= 0
+
+    def get(self, fp, default=None):
+        """Average strategy for fingerprint fp as a list of probabilities."""
+        index = self.find(fp)
+        if index < 0:
+            return default
+        levels = self.probabilities[index].astype(np.float64)
+        return (levels / levels.sum()).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert a pickled {fingerprint: probabilities} policy to a frozen one."
+    )
+    parser.add_argument("source", help="Pickled policy")
+    parser.add_argument("destination", help="Frozen policy file to write")
+    args = parser.parse_args()
+
+    with open(args.source, "rb") as f:
+        policy = pickle.load(f)
+    write_policy(args.destination, list(policy.keys()), list(policy.values()))
+    print(f"Wrote {len(policy)} information sets to {args.destination}")
+
+
+if __name__ == "__main__":
+    main()
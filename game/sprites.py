@@ -0,0 +1,74 @@
+"""
+Card sprites for the GUI.
+
+Card faces and the card back come from an assets.Assets loader, which reads
+each image once, on first use, and converts it to the display's pixel format.
+Copies scaled for the current window size are likewise built on demand (the
+last few sizes are kept, so resizing back and forth does not rescale again),
+which makes drawing a card a dict lookup and a blit with no file I/O or
+per-pixel format conversion.
+"""
+
+import os
+from collections import OrderedDict
+
+import pygame
+
+from assets import CARD_BACK_IMAGE, CARD_DIR
+from cards import card_filename
+
+BACK = "back"  # Sprite key for the card back; card faces are keyed by card int
+
+# Window size the layout was designed for; sprites are drawn at file size there
+BASE_WINDOW_SIZE = (1000, 800)
+MAX_VARIANTS = 4  # Scaled sprite sets kept for recently used window sizes
+
+
+def window_scale(width, height):
+    """Factor by which the table layout is scaled for a window size."""
+    return min(width / BASE_WINDOW_SIZE[0], height / BASE_WINDOW_SIZE[1])
+
+
+def sprite_path(key):
+    if key == BACK:
+        return CARD_BACK_IMAGE
+    return os.path.join(CARD_DIR, card_filename(key))
+
+
+class SpriteCache:
+    def __init__(self, assets):
+        self.assets = assets
+        self.variants = OrderedDict()  # Sprite size -> {key: scaled Surface}
+        self.scale = 1.0
+        self.size = None  # Sprite size for the current window
+        self.sprites = {}
+
+    @property
+    def card_size(self):
+        return self.size
+
+    def resize(self, width, height):
+        """Select the sprites for a window size; they are scaled as they are used."""
+        self.scale = window_scale(width, height)
+        base_width, base_height = self.assets.image(CARD_BACK_IMAGE).get_size()
+        self.size = (
+            max(1, round(base_width * self.scale)),
+            max(1, round(base_height * self.scale)),
+        )
+        if self.size in self.variants:
+            self.variants.move_to_end(self.size)
+        else:
+            self.variants[self.size] = {}
+            if len(self.variants) > MAX_VARIANTS:
+                self.variants.popitem(last=False)
+        self.sprites = self.variants[self.size]
+
+    def get(self, key):
+        """Sprite for a card int, or for BACK, at the current window scale."""
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.assets.image(sprite_path(key))
+            if sprite.get_size() != self.size:
+                sprite = pygame.transform.smoothscale(sprite, self.size)
+            self.sprites[key] = sprite
+        return sprite
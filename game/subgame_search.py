@@ -0,0 +1,155 @@
+"""
+Real-time, depth-limited subgame search for CFRBot.
+
+At each decision the bot re-solves the rest of the current betting round (or
+`depth` rounds) from the live position: pot, bets, stacks, stage, history and
+its own cards. Each iteration samples the opponent's hole cards and the
+unseen board, then runs one external-sampling MCCFR pass per seat over the
+subgame, as cfr_trainer does for the full game. Nodes where the subgame stops
+are valued by playing the hand out with the blueprint (the bot's trained
+policy) for both seats, so the search refines the blueprint rather than
+ignoring it; opponent information sets start from the blueprint strategy too.
+
+Iterations run until the time budget is spent (at least one always runs), so
+a decision takes about `budget` seconds whatever the position. The bot then
+plays from the average strategy at the root.
+"""
+
+import time
+
+from CFRBot import card_key
+from hand_state import BOARD_SIZES, SHOWDOWN, HandState
+from infoset_table import fingerprint
+
+DEFAULT_BUDGET = 0.2  # Seconds per decision
+DEFAULT_DEPTH = 1  # Betting rounds solved before handing over to the blueprint
+NUM_ACTIONS = 4
+
+
+class SubgameSearch:
+    def __init__(self, policy=None, abstraction=None, rng=None, depth=DEFAULT_DEPTH):
+        self.policy = policy  # Blueprint: policy.get(fingerprint) -> probabilities
+        self.abstraction = abstraction
+        self.rng = rng
+        self.depth = depth
+        self.last_stage = SHOWDOWN  # Stage at which the subgame hands over to rollouts
+        self.nodes = {}  # Information set key -> [regrets, strategy sum]
+        self.iterations = 0  # Iterations run for the last decision
+
+    def blueprint(self, key, legal):
+        """Blueprint strategy at an information set, restricted to legal actions."""
+        probabilities = self.policy.get(fingerprint(key)) if self.policy else None
+        strategy = [0.0] * NUM_ACTIONS
+        total = sum(probabilities[a] for a in legal) if probabilities else 0.0
+        for a in legal:
+            strategy[a] = probabilities[a] / total if total > 0 else 1.0 / len(legal)
+        return strategy
+
+    def solve(self, game_state, player, budget=DEFAULT_BUDGET):
+        """
+        Search from `player`'s decision in a heads-up game_state for about
+        `budget` seconds and return the average root strategy as a list of
+        probabilities in CFRBot.ACTIONS order.
+        """
+        deadline = time.perf_counter() + budget
+        seat = game_state.players.index(player)
+        root = HandState.from_game_state(game_state)
+        self.last_stage = min(root.stage + self.depth, SHOWDOWN)
+        self.nodes = {}
+
+        seen = set(player.hand) | set(game_state.community_cards)
+        unseen = [card for card in range(52) if card not in seen]
+        board = list(game_state.community_cards)
+        missing = 5 - len(board)
+
+        self.iterations = 0
+        while True:
+            cards = self.rng.sample(unseen, 2 + missing)
+            hands = [None, None]
+            hands[seat] = tuple(player.hand)
+            hands[1 - seat] = tuple(cards[:2])
+            full_board = tuple(board + cards[2:])
+            state = root.clone()
+            state.hands, state.board = hands, full_board
+            # Card part of each seat's information set keys, per stage
+            card_keys = [
+                [
+                    card_key(hand, full_board[:size], self.abstraction)
+                    for size in BOARD_SIZES
+                ]
+                for hand in hands
+            ]
+            for traverser in (seat, 1 - seat):
+                self._traverse(state, card_keys, traverser)
+            self.iterations += 1
+            if time.perf_counter() >= deadline:
+                break
+
+        root_key = f"{card_keys[seat][root.stage]}|{root.history}"
+        strategy_sum = self.nodes[root_key][1]
+        total = sum(strategy_sum)
+        legal = root.legal_actions()
+        if total <= 0:
+            return [1.0 / len(legal) if a in legal else 0.0 for a in range(NUM_ACTIONS)]
+        return [value / total for value in strategy_sum]
+
+    def _strategy(self, key, legal):
+        """Regret matching at a subgame node, starting from the blueprint."""
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = [[0.0] * NUM_ACTIONS, [0.0] * NUM_ACTIONS]
+        regrets = node[0]
+        total_positive_regret = sum(max(0.0, regrets[a]) for a in legal)
+        if total_positive_regret <= 0:
+            return node, self.blueprint(key, legal)
+        strategy = [0.0] * NUM_ACTIONS
+        for a in legal:
+            strategy[a] = max(0.0, regrets[a]) / total_positive_regret
+        return node, strategy
+
+    def _traverse(self, state, card_keys, traverser):
+        if state.is_terminal():
+            return state.utility(traverser)
+        if state.stage >= self.last_stage:
+            return self._rollout(state, card_keys, traverser)
+
+        player = state.player
+        legal = state.legal_actions()
+        key = f"{card_keys[player][state.stage]}|{state.history}"
+        node, strategy = self._strategy(key, legal)
+
+        if player == traverser:
+            utilities = [0.0] * NUM_ACTIONS
+            node_utility = 0.0
+            for a in legal:
+                state.apply(a)
+                utilities[a] = self._traverse(state, card_keys, traverser)
+                state.undo()
+                node_utility += strategy[a] * utilities[a]
+            regrets = node[0]
+            for a in legal:
+                regrets[a] += utilities[a] - node_utility
+            return node_utility
+
+        strategy_sum = node[1]
+        for a in legal:
+            strategy_sum[a] += strategy[a]
+        action = self.rng.choices(range(NUM_ACTIONS), strategy)[0]
+        state.apply(action)
+        utility = self._traverse(state, card_keys, traverser)
+        state.undo()
+        return utility
+
+    def _rollout(self, state, card_keys, traverser):
+        """Leaf value: play the hand out with the blueprint for both seats."""
+        applied = 0
+        while not state.is_terminal():
+            legal = state.legal_actions()
+            key = f"{card_keys[state.player][state.stage]}|{state.history}"
+            strategy = self.blueprint(key, legal)
+            state.apply(self.rng.choices(range(NUM_ACTIONS), strategy)[0])
+            applied += 1
+        utility = state.utility(traverser)
+        for _ in range(applied):
+            state.undo()
+        return utility
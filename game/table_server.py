@@ -0,0 +1,457 @@
+"""
+Asyncio server hosting many poker tables in one process.
+
+Every Table owns its own engine.GameState, players and random stream, and runs
+as a task on one event loop. Bot decisions run in a thread pool, off the
+event loop, so slow bots (e.g. with subgame search) do not hold up other
+tables or network traffic. The pool only overlaps bot turns with I/O: bots
+are pure Python, so the GIL keeps all of their work on one core. The engine
+state of a table is mutated in place and shared with its remote players'
+connections, so it cannot be shipped to a process pool per batch; to use more
+cores, run one server per core on different ports. Humans connect over TCP and
+take an open seat; poker_main.py can attach as a client with --connect.
+
+The protocol is one JSON object per line. After connecting, a client is sent
+{"type": "tables", ...}. It then sends {"type": "join", "table": id, "name": name}
+and, whenever it is to act, {"type": "action", "action": "bet", "amount": 40}.
+The server sends {"type": "state", ...} after every change, {"type": "log", ...}
+for each engine message and {"type": "error", ...} for rejected actions and
+malformed messages, which leave the connection open.
+
+    python table_server.py --tables 1 --human-seats 1     # one human vs CFR bot
+    python table_server.py --tables 200 --hands 500       # bots only; prints hands/s
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+from engine import BIG_BLIND, HISTORY_TOKENS, MAX_SEATS, MIN_SEATS, GameState
+from player import Player
+from tournament import BOT_TYPES, STARTING_STACK
+
+HOST = "127.0.0.1"
+PORT = 8765
+BOT_BATCH_HANDS = 20  # Hands a bots-only table plays per trip to the worker pool
+
+
+class RemotePlayer(Player):
+    """A seat played by a connected client."""
+
+    def __init__(self, name, chips, connection):
+        super().__init__(name, chips)
+        self.connection = connection
+        self.actions = asyncio.Queue()  # (action, amount) sent by the client
+
+    def disconnect(self):
+        self.connection = None
+        self.actions.put_nowait(None)
+
+
+class Connection:
+    def __init__(self, writer):
+        self.writer = writer
+        self.player = None
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps(message).encode() + b"\n")
+
+
+class TableLog:
+    """
+    Chat log for a table. Engine messages are collected (possibly on a pool
+    thread) and sent to the table's remote players by flush(), on the loop.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.messages = []
+
+    def add_message(self, message):
+        self.messages.append(message)
+
+    def flush(self):
+        messages, self.messages = self.messages, []
+        for message in messages:
+            self.table.broadcast({"type": "log", "message": message})
+
+
+class Table:
+    def __init__(self, table_id, seats, executor, stack=STARTING_STACK, seed=None):
+        """
+        seats holds a bot factory (called as factory(name, chips, rng=rng)) for
+        each bot seat and None for each seat left open for a remote player.
+        """
+        self.table_id = table_id
+        self.executor = executor
+        self.stack = stack
+        self.rng = random.Random(seed)
+        self.players = [None] * len(seats)
+        for i, factory in enumerate(seats):
+            if factory is not None:
+                rng = random.Random(self.rng.getrandbits(64))
+                self.players[i] = factory(f"Bot {i + 1}", stack, rng=rng)
+        self.seated = asyncio.Event()
+        if None not in self.players:
+            self.seated.set()
+        self.game_state = None
+        self.log = TableLog(self)
+        self.hands_played = 0
+
+    def remote_players(self):
+        return [p for p in self.players if isinstance(p, RemotePlayer)]
+
+    def describe(self):
+        return {
+            "table": self.table_id,
+            "seats": len(self.players),
+            "open": self.players.count(None),
+        }
+
+    def seat(self, name, connection):
+        """Seat a remote player in the first open seat; raises ValueError if full."""
+        if None not in self.players:
+            raise ValueError(f"Table {self.table_id} is full.")
+        player = RemotePlayer(name, self.stack, connection)
+        self.players[self.players.index(None)] = player
+        if None not in self.players:
+            self.seated.set()
+        return player
+
+    def broadcast(self, message):
+        for player in self.remote_players():
+            if player.connection is not None:
+                player.connection.send(message)
+
+    def send_state(self):
+        for player in self.remote_players():
+            if player.connection is not None:
+                player.connection.send(state_message(self, player))
+
+    async def run(self, hands=None):
+        """Play hands (forever, or `hands` of them) once every seat is taken."""
+        await self.seated.wait()
+        loop = asyncio.get_running_loop()
+        chat_log = self.log if self.remote_players() else None
+        self.game_state = game_state = GameState(
+            self.players, chat_log=chat_log, rng=self.rng
+        )
+        game_state.start_hand()
+        self.send_state()
+
+        while hands is None or self.hands_played < hands:
+            player = game_state.current_player()
+            if isinstance(player, RemotePlayer):
+                hand_number = game_state.hand_number
+                self.play_remote(player, await player.actions.get())
+                finished = int(game_state.hand_number != hand_number)
+                if finished:
+                    self.rebuy()
+            else:
+                # Bot turns go to the pool in runs, not one trip per decision;
+                # tables without remote players play several hands per trip
+                batch = 1 if self.remote_players() else BOT_BATCH_HANDS
+                if hands is not None:
+                    batch = min(batch, hands - self.hands_played)
+                finished = await loop.run_in_executor(
+                    self.executor, self.play_bots, batch
+                )
+            self.hands_played += finished
+            self.log.flush()
+            self.send_state()
+            remote = self.remote_players()
+            if remote and all(p.connection is None for p in remote):
+                break  # Everyone who was playing here has left
+
+    def play_bots(self, max_hands):
+        """
+        Let bots act until a remote player is to act or `max_hands` hands have
+        finished; returns the number of hands finished.
+        """
+        game_state = self.game_state
+        finished = 0
+        while finished < max_hands:
+            player = game_state.current_player()
+            if isinstance(player, RemotePlayer):
+                break
+            hand_number = game_state.hand_number
+            action, amount = player.decide(game_state)
+            game_state.apply_action(player, action, amount)
+            if game_state.hand_number != hand_number:
+                finished += 1
+                self.rebuy()
+        return finished
+
+    def rebuy(self):
+        """After a hand: if anyone is (nearly) bust, refill every stack and re-deal."""
+        # The engine has already dealt the next hand and posted its blinds
+        if any(p.chips + p.total_bet < BIG_BLIND for p in self.players):
+            for player in self.players:
+                player.chips = self.stack
+            self.game_state.start_hand()
+
+    def play_remote(self, player, decision):
+        game_state = self.game_state
+        if decision is None or player.connection is None:
+            # Gone: check when possible, otherwise fold
+            to_call = game_state.amount_to_call(player)
+            decision = ("fold" if to_call > 0 else "check", 0)
+            player.actions.put_nowait(None)  # Keep answering for them
+        action, amount = decision
+        try:
+            game_state.apply_action(player, action, amount)
+        except ValueError as e:
+            if player.connection is not None:
+                player.connection.send({"type": "error", "message": str(e)})
+
+
+def state_message(table, viewer):
+    """What `viewer` may see of a table: everything but the other hole cards."""
+    game_state = table.game_state
+    return {
+        "type": "state",
+        "table": table.table_id,
+        "seat": table.players.index(viewer),
+        "hand": game_state.hand_number,
+        "stage": game_state.stage,
+        "pot": game_state.pot,
+        "current_bet": game_state.current_bet,
+        "board": game_state.community_cards,
+        "to_act": game_state.current_player_index,
+        "players": [
+            {
+                "name": player.name,
+                "chips": player.chips,
+                "current_bet": player.current_bet,
+                "folded": player.has_folded,
+                "cards": player.hand if player is viewer else [],
+            }
+            for player in game_state.players
+        ],
+    }
+
+
+class TableServer:
+    def __init__(self, tables):
+        self.tables = {table.table_id: table for table in tables}
+
+    async def handle_client(self, reader, writer):
+        connection = Connection(writer)
+        connection.send(
+            {
+                "type": "tables",
+                "tables": [table.describe() for table in self.tables.values()],
+            }
+        )
+        try:
+            async for line in reader:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    connection.send({"type": "error", "message": "Invalid JSON."})
+                    continue
+                self.handle_message(connection, message)
+        except (ConnectionError, ValueError):  # ValueError: line over the limit
+            pass
+        finally:
+            if connection.player is not None:
+                connection.player.disconnect()
+            writer.close()
+
+    def handle_message(self, connection, message):
+        """Act on one client message; a malformed one gets an error reply."""
+        try:
+            if not isinstance(message, dict):
+                raise ValueError("Messages must be JSON objects.")
+            kind = message.get("type")
+            if kind == "join" and connection.player is None:
+                table_id = message.get("table")
+                name = message.get("name", "Player")
+                if not isinstance(name, str):
+                    raise ValueError("The name must be a string.")
+                table = self.tables.get(table_id) if isinstance(table_id, int) else None
+                if table is None:
+                    raise ValueError(f"No table {table_id!r}.")
+                connection.player = table.seat(name, connection)
+            elif kind == "action" and connection.player is not None:
+                action = message.get("action")
+                amount = message.get("amount", 0)
+                if not isinstance(action, str) or action not in HISTORY_TOKENS:
+                    raise ValueError(f"Unknown action {action!r}.")
+                # bool is an int subclass, but true is not a chip count
+                if isinstance(amount, bool) or not isinstance(amount, int):
+                    raise ValueError(f"Invalid amount {amount!r}.")
+                connection.player.actions.put_nowait((action, amount))
+            else:
+                raise ValueError(f"Unexpected {kind!r}.")
+        except ValueError as e:
+            connection.send({"type": "error", "message": str(e)})
+
+    async def serve(self, host=HOST, port=PORT, hands=None):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        async with server:
+            await asyncio.gather(*(table.run(hands) for table in self.tables.values()))
+
+
+def make_tables(count, seats, human_seats, executor, bot_type="cfr", seed=None):
+    factory = BOT_TYPES[bot_type]
+    layout = [None] * human_seats + [factory] * (seats - human_seats)
+    seeds = random.Random(seed)
+    return [
+        Table(i, layout, executor, seed=seeds.getrandbits(64)) for i in range(count)
+    ]
+
+
+class TableClient:
+    """
+    Blocking client for one seat, with the attributes the GUI draws from
+    (players, community_cards, stage, pot, hand_number, current_player()).
+    A reader thread queues what the server sends; poll() applies it on the
+    caller's thread. The local seat is always players[0], and apply_action()
+    sends the action to the server instead of applying it.
+    """
+
+    def __init__(self, host, port, table, name, chat_log=None, on_message=None):
+        self.chat_log = chat_log
+        self.on_message = (
+            on_message  # Called from the reader thread, e.g. to wake a GUI
+        )
+        self.players = [Player(name, 0)]
+        self.community_cards = []
+        self.stage = None
+        self.pot = 0
+        self.current_bet = 0
+        self.hand_number = 0
+        self.current_player_index = 0
+        self.seat = 0
+        self.inbox = queue.SimpleQueue()
+        self.socket = socket.create_connection((host, port))
+        self.file = self.socket.makefile("r")
+        self._send({"type": "join", "table": table, "name": name})
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _send(self, message):
+        self.socket.sendall(json.dumps(message).encode() + b"\n")
+
+    def _read(self):
+        try:
+            for line in self.file:
+                self.inbox.put(json.loads(line))
+                if self.on_message is not None:
+                    self.on_message()
+        except (OSError, ValueError):
+            pass
+
+    def poll(self):
+        """Apply every message received since the last call; True if any were."""
+        received = False
+        while not self.inbox.empty():
+            message = self.inbox.get()
+            received = True
+            kind = message["type"]
+            if kind == "state":
+                self._update(message)
+            elif kind in ("log", "error") and self.chat_log is not None:
+                prefix = "Error: " if kind == "error" else ""
+                self.chat_log.add_message(prefix + message["message"])
+        return received
+
+    def _update(self, message):
+        seats = message["players"]
+        self.seat = message["seat"]
+        # Rotate the seats so the local player comes first
+        order = [(self.seat + i) % len(seats) for i in range(len(seats))]
+        while len(self.players) < len(seats):
+            self.players.append(Player("", 0))
+        for player, index in zip(self.players, order):
+            seat = seats[index]
+            player.name = seat["name"]
+            player.chips = seat["chips"]
+            player.current_bet = seat["current_bet"]
+            player.has_folded = seat["folded"]
+            player.hand = seat["cards"]
+        self.community_cards = message["board"]
+        self.stage = message["stage"]
+        self.pot = message["pot"]
+        self.current_bet = message["current_bet"]
+        self.current_player_index = order.index(message["to_act"])
+        self.hand_number = message["hand"]
+
+    def current_player(self):
+        return self.players[self.current_player_index]
+
+    def apply_action(self, player, action, amount=0, chat_log=None):
+        if self.stage is None:
+            raise ValueError("Waiting for the table to start.")
+        if player is not self.players[0] or self.current_player_index != 0:
+            raise ValueError("It is not your turn.")
+        self._send({"type": "action", "action": action, "amount": amount})
+
+    def close(self):
+        self.socket.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host poker tables over TCP.")
+    parser.add_argument("--tables", type=int, default=1)
+    parser.add_argument(
+        "--seats", type=int, default=2, choices=range(MIN_SEATS, MAX_SEATS + 1)
+    )
+    parser.add_argument(
+        "--human-seats", type=int, default=0, help="Open seats per table"
+    )
+    parser.add_argument("--bot", choices=sorted(BOT_TYPES), default="cfr")
+    parser.add_argument("--hands", type=int, help="Stop each table after this many")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Threads for bot turns (they share one core under the GIL)",
+    )
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--metrics", metavar="FILE", help="Dump latency metrics to FILE periodically"
+    )
+    args = parser.parse_args()
+
+    if args.metrics:
+        instrumentation.enable()
+        instrumentation.start_dump(args.metrics)
+
+    with ThreadPoolExecutor(args.workers) as executor:
+        tables = make_tables(
+            args.tables, args.seats, args.human_seats, executor, args.bot, args.seed
+        )
+        server = TableServer(tables)
+        print(f"Serving {args.tables} tables on {args.host}:{args.port}")
+        start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            asyncio.run(server.serve(args.host, args.port, args.hands))
+        except KeyboardInterrupt:
+            pass
+        seconds = time.perf_counter() - start
+        cpu_seconds = time.process_time() - cpu_start
+
+    hands = sum(table.hands_played for table in tables)
+    print(
+        f"{hands} hands in {seconds:.1f} s: {hands / seconds:.0f} hands/s, "
+        f"{hands / cpu_seconds:.0f} hands per CPU-second"
+    )
+    if args.metrics:
+        instrumentation.stop_dump()
+        print(instrumentation.format_snapshot(instrumentation.snapshot()))
+
+
+if __name__ == "__main__":
+    main()
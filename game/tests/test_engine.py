@@ -0,0 +1,132 @@
+import random
+
+import pytest
+
+from engine import MAX_SEATS, MIN_SEATS, GameState
+from player import Player
+
+
+class PotChecker:
+    """Recorder checking how every settled hand's pot was shared out."""
+
+    def __init__(self):
+        self.stacks = None
+        self.won = None  # Chips each player got back from the last pot
+        self.hands = 0
+
+    def begin_hand(self, game_state):
+        self.stacks = [player.chips for player in game_state.players]
+
+    def record_action(self, game_state, player, action, amount):
+        pass
+
+    def end_hand(self, game_state):
+        # Called once the pot is settled and before the next deal, so total_bet
+        # still holds what each player put in
+        players = game_state.players
+        put_in = [player.total_bet for player in players]
+        won = [
+            player.chips - stack + bet
+            for player, stack, bet in zip(players, self.stacks, put_in)
+        ]
+        assert sum(won) == sum(put_in)
+        for player, amount, bet in zip(players, won, put_in):
+            if player.has_folded:
+                assert amount == 0
+            else:
+                # A player can only win what each opponent matched of their bet
+                assert amount <= sum(min(other, bet) for other in put_in)
+        self.won = won
+        self.hands += 1
+
+
+def play_random(stacks, seed, max_actions=3000):
+    """Play random legal actions, checking chips are conserved after each one."""
+    rng = random.Random(seed)
+    players = [Player(f"P{i}", chips) for i, chips in enumerate(stacks)]
+    checker = PotChecker()
+    game_state = GameState(players, rng=random.Random(seed), recorder=checker)
+    game_state.start_hand()
+    total = sum(stacks)
+
+    for _ in range(max_actions):
+        if game_state.stage is None:
+            break
+        player = game_state.current_player()
+        assert not player.has_folded and player.chips > 0
+        assert player.hand and game_state.seat_of[player] in game_state.active
+
+        to_call = game_state.amount_to_call(player)
+        action = rng.choice(
+            ["fold", "call", "bet"] if to_call > 0 else ["check", "bet"]
+        )
+        amount = 0
+        if action == "bet":
+            amount = min(to_call + rng.choice([1, 20, 100]), player.chips)
+        game_state.apply_action(player, action, amount)
+        assert sum(p.chips for p in players) + game_state.pot == total
+    return game_state, checker
+
+
+def test_bust_seats_sit_out_and_chips_are_kept():
+    players = [Player(name, chips) for name, chips in zip("ABCD", [1000, 1000, 0, 0])]
+    game_state = GameState(players, rng=random.Random(1))
+    game_state.start_hand()
+
+    for player in players[2:]:
+        assert player.hand == [] and player.has_folded
+    assert game_state.pot == 30
+    assert {game_state.small_blind_index, game_state.big_blind_index} == {0, 1}
+
+    hand_number = game_state.hand_number
+    game_state.apply_action(game_state.current_player(), "fold")
+    assert game_state.hand_number == hand_number + 1
+    assert sum(player.chips for player in players) + game_state.pot == 2000
+    assert players[2].chips == players[3].chips == 0
+
+
+def test_no_hand_without_two_stacks():
+    players = [Player("A", 1000), Player("B", 0), Player("C", 0)]
+    game_state = GameState(players, rng=random.Random(0))
+    game_state.start_hand()
+    assert game_state.stage is None and game_state.pot == 0
+    with pytest.raises(ValueError):
+        game_state.apply_action(players[0], "check")
+
+
+@pytest.mark.parametrize("stacks", [(1000, 5), (5, 1000), (10, 1000), (10, 10)])
+def test_all_in_blinds_run_out_the_board(stacks):
+    players = [Player("A", stacks[0]), Player("B", stacks[1])]
+    checker = PotChecker()
+    game_state = GameState(players, rng=random.Random(0), recorder=checker)
+    game_state.start_hand()
+    # Nobody can bet after the blinds, so the hand settles without an action
+    assert checker.hands >= 1
+    assert sum(player.chips for player in players) + game_state.pot == sum(stacks)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_games_conserve_chips(seed):
+    rng = random.Random(seed)
+    seats = MIN_SEATS + seed % (MAX_SEATS - MIN_SEATS + 1)
+    stacks = [rng.choice([0, 5, 15, 30, 60, 200, 1000]) for _ in range(seats)]
+    if sum(chips > 0 for chips in stacks) < 2:
+        stacks[0] = stacks[1] = 50
+    game_state, checker = play_random(stacks, seed)
+    assert checker.hands > 0
+
+
+def test_side_pots_with_three_all_ins():
+    for seed in range(300):
+        players = [Player("A", 50), Player("B", 100), Player("C", 300)]
+        checker = PotChecker()
+        game_state = GameState(players, rng=random.Random(seed), recorder=checker)
+        game_state.start_hand()
+        while checker.hands == 0:
+            player = game_state.current_player()
+            game_state.apply_action(player, "bet", player.chips)
+        # A can win the main pot, B also the side pot, and C gets back at
+        # least the 200 nobody could match
+        won = checker.won
+        assert sum(won) == 450
+        assert won[0] <= 150 and won[1] <= 250 and won[2] >= 200
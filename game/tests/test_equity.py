@@ -0,0 +1,110 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from cards import DECK, make_card
+from equity import (
+    Z_95,
+    EquityCalculator,
+    _enumerate_runouts,
+    _unseen_cards,
+    count_outcomes,
+)
+from evaluator import evaluate_hand
+
+
+def direct_equity(hole_cards, community_cards):
+    """(equity, win, tie) against one random hand, by enumerating every outcome."""
+    unseen = [card for card in DECK if card not in hole_cards + community_cards]
+    share = wins = ties = outcomes = 0
+    for completion in combinations(unseen, 5 - len(community_cards)):
+        board = community_cards + list(completion)
+        hero = evaluate_hand(hole_cards + board)
+        rest = [card for card in unseen if card not in completion]
+        for opponent_cards in combinations(rest, 2):
+            opponent = evaluate_hand(list(opponent_cards) + board)
+            outcomes += 1
+            if hero > opponent:
+                share += 1
+                wins += 1
+            elif hero == opponent:
+                share += 0.5
+                ties += 1
+    return share / outcomes, wins / outcomes, ties / outcomes
+
+
+def random_deal(rng, board_size):
+    cards = rng.sample(DECK, 2 + board_size)
+    return cards[:2], cards[2:]
+
+
+@pytest.mark.parametrize("board_size, seed", [(5, 0), (5, 1), (5, 2), (4, 3)])
+def test_exact_equity_matches_direct_enumeration(board_size, seed):
+    hole_cards, community_cards = random_deal(random.Random(seed), board_size)
+    result = EquityCalculator().calculate(hole_cards, community_cards)
+    assert result.exact
+    equity, win, tie = direct_equity(hole_cards, community_cards)
+    assert result.equity == pytest.approx(equity)
+    assert result.win == pytest.approx(win)
+    assert result.tie == pytest.approx(tie)
+
+
+def test_ties_split_the_pot():
+    # A royal flush on the board: every player plays it and splits the pot
+    royal = [make_card(rank, 0) for rank in range(8, 13)]
+    hole_cards = [make_card(0, 1), make_card(1, 2)]
+
+    result = EquityCalculator().calculate(hole_cards, royal)
+    assert result.exact
+    assert (result.equity, result.win, result.tie) == (0.5, 0.0, 1.0)
+
+    for num_opponents in (2, 3):
+        calculator = EquityCalculator(exact_limit=0, max_samples=4000, seed=0)
+        result = calculator.calculate(hole_cards, royal, num_opponents)
+        assert not result.exact
+        assert result.equity == pytest.approx(1 / (num_opponents + 1))
+        assert result.tie == 1.0
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_monte_carlo_is_within_its_confidence_interval(seed):
+    rng = random.Random(seed)
+    hole_cards, community_cards = random_deal(rng, 3)
+    exact = EquityCalculator(exact_limit=2_000_000).calculate(
+        hole_cards, community_cards
+    )
+    assert exact.exact
+
+    estimate = EquityCalculator(target_error=0.005, seed=seed).calculate(
+        hole_cards, community_cards
+    )
+    assert not estimate.exact
+    assert 0 < estimate.std_error and Z_95 * estimate.std_error <= 0.005
+    assert abs(estimate.equity - exact.equity) <= Z_95 * estimate.std_error
+
+
+def test_count_outcomes():
+    assert count_outcomes(45, 0, 1) == 990
+    assert count_outcomes(47, 2, 1) == 1081 * 990
+    assert count_outcomes(45, 0, 2) == 990 * 903
+
+    rng = random.Random(0)
+    for board_size, num_opponents in [(5, 1), (5, 2), (4, 1), (3, 1)]:
+        hole_cards, community_cards = random_deal(rng, board_size)
+        unseen = _unseen_cards(hole_cards, community_cards)
+        board_needed = 5 - board_size
+        runouts = _enumerate_runouts(unseen, board_needed, num_opponents)
+        assert len(runouts) == count_outcomes(len(unseen), board_needed, num_opponents)
+        # Every outcome uses distinct unseen cards
+        assert all(len(set(row)) == len(row) for row in runouts[:: len(runouts) // 500])
+
+
+def test_calculate_rejects_bad_input():
+    calculator = EquityCalculator()
+    with pytest.raises(ValueError):
+        calculator.calculate([0, 0], [1, 2, 3])
+    with pytest.raises(ValueError):
+        calculator.calculate([0, 1], [1, 2, 3])
+    with pytest.raises(ValueError):
+        calculator.calculate([0, 1], [2, 3, 4, 5, 6], num_opponents=23)
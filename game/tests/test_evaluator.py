@@ -0,0 +1,107 @@
+import random
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+from cards import NUM_CARDS, card_rank, card_suit, make_card
+from evaluator import (
+    HAND_RANKINGS,
+    compare_hands,
+    evaluate_batch,
+    evaluate_hand,
+    hand_name,
+)
+
+
+def five_card_strength(cards):
+    """(category, kicker ranks) of exactly five cards, by the textbook rules."""
+    ranks = sorted((card_rank(card) + 2 for card in cards), reverse=True)
+    flush = len({card_suit(card) for card in cards}) == 1
+    straight_high = 0
+    if len(set(ranks)) == 5:
+        if ranks[0] - ranks[4] == 4:
+            straight_high = ranks[0]
+        elif ranks == [14, 5, 4, 3, 2]:
+            straight_high = 5
+
+    # Ranks grouped by count, bigger groups first, then higher ranks
+    groups = sorted(((count, rank) for rank, count in Counter(ranks).items()))[::-1]
+    shape = [count for count, _ in groups]
+    grouped = [rank for _, rank in groups]
+
+    if straight_high and flush:
+        name = "Royal Flush" if straight_high == 14 else "Straight Flush"
+        return HAND_RANKINGS[name], [straight_high]
+    if shape == [4, 1]:
+        return HAND_RANKINGS["Four of a Kind"], grouped
+    if shape == [3, 2]:
+        return HAND_RANKINGS["Full House"], grouped
+    if flush:
+        return HAND_RANKINGS["Flush"], ranks
+    if straight_high:
+        return HAND_RANKINGS["Straight"], [straight_high]
+    if shape == [3, 1, 1]:
+        return HAND_RANKINGS["Three of a Kind"], grouped
+    if shape == [2, 2, 1]:
+        return HAND_RANKINGS["Two Pair"], grouped
+    if shape == [2, 1, 1, 1]:
+        return HAND_RANKINGS["One Pair"], grouped
+    return HAND_RANKINGS["High Card"], ranks
+
+
+def brute_force(hand):
+    """evaluate_hand's packed strength, from the best of every 5-card subset."""
+    category, ranks = max(five_card_strength(five) for five in combinations(hand, 5))
+    value = category
+    for i in range(5):
+        value = (value << 4) | (ranks[i] if i < len(ranks) else 0)
+    return value
+
+
+def cards(text):
+    """Cards from "rank:suit" pairs with ranks 2-14, e.g. "14:0 13:0"."""
+    pairs = (item.split(":") for item in text.split())
+    return [make_card(int(rank) - 2, int(suit)) for rank, suit in pairs]
+
+
+@pytest.mark.parametrize("size", [5, 6, 7])
+def test_random_hands_match_brute_force(size):
+    rng = random.Random(size)
+    for _ in range(3000):
+        hand = rng.sample(range(NUM_CARDS), size)
+        assert evaluate_hand(hand) == brute_force(hand), hand
+
+
+@pytest.mark.parametrize(
+    "hand, name",
+    [
+        ("14:3 13:3 12:3 11:3 10:3 2:0 3:1", "Royal Flush"),
+        ("14:1 2:1 3:1 4:1 5:1 13:2 13:3", "Straight Flush"),
+        ("14:0 2:1 3:2 4:3 5:0 9:1 9:2", "Straight"),
+        ("9:0 9:1 9:2 9:3 5:0 5:1 5:2", "Four of a Kind"),
+        ("9:0 9:1 9:2 5:3 5:0 4:1 4:2", "Full House"),
+        ("2:0 4:0 6:0 8:0 13:0 14:1 14:2", "Flush"),
+        ("7:0 7:1 6:2 6:3 4:0 4:1 14:2", "Two Pair"),
+    ],
+)
+def test_edge_cases_match_brute_force(hand, name):
+    hand = cards(hand)
+    assert evaluate_hand(hand) == brute_force(hand)
+    assert hand_name(evaluate_hand(hand)) == name
+
+
+def test_batch_matches_single_hand():
+    rng = random.Random(0)
+    hands = [rng.sample(range(NUM_CARDS), 7) for _ in range(2000)]
+    assert evaluate_batch(hands).tolist() == [evaluate_hand(hand) for hand in hands]
+
+
+def test_compare_hands_agrees_with_brute_force():
+    rng = random.Random(1)
+    for _ in range(1000):
+        deck = rng.sample(range(NUM_CARDS), 9)
+        board = deck[4:]
+        first, second = deck[:2] + board, deck[2:4] + board
+        expected = brute_force(first) - brute_force(second)
+        assert compare_hands(first, second) == (expected > 0) - (expected < 0)
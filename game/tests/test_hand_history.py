@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from CFRBot import CFRBot
+from engine import GameState
+from hand_history import HandHistoryWriter, read_hands, replay
+
+STACKS = [5, 15, 35, 80, 1000]
+
+
+class CheckedWriter(HandHistoryWriter):
+    """HandHistoryWriter that also keeps what each written hand should hold."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.expected = []
+        self.dealt = None
+
+    def begin_hand(self, game_state):
+        super().begin_hand(game_state)
+        self.dealt = [tuple(player.hand) for player in game_state.players]
+
+    def end_hand(self, game_state):
+        if self.hand is not None:
+            self.expected.append(
+                (
+                    tuple(self.dealt),
+                    tuple(game_state.community_cards),
+                    tuple(player.chips for player in game_state.players),
+                )
+            )
+        super().end_hand(game_state)
+
+
+def record_games(path, seat_counts, hands_per_table=150):
+    """Record bot games with short and bust stacks; returns the writer."""
+    writer = CheckedWriter(path)
+    for seats in seat_counts:
+        rng = random.Random(seats)
+        bots = [
+            CFRBot(f"Bot {seats}-{i}", 35, rng=random.Random(i)) for i in range(seats)
+        ]
+        game_state = GameState(bots, rng=random.Random(seats), recorder=writer)
+        game_state.start_hand()
+        while game_state.hand_number < hands_per_table:
+            if game_state.stage is None:
+                # Too few stacks left to deal: everyone rebuys for a random amount
+                for bot in bots:
+                    bot.chips = rng.choice(STACKS)
+                game_state.start_hand()
+                continue
+            game_state.current_player().act(game_state)
+    writer.close()
+    return writer
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "hands.phh"
+    writer = record_games(path, (2, 3, 6, 10))
+    hands = list(read_hands(path))
+
+    assert len(hands) == writer.hands_written == len(writer.expected)
+    for hand, (dealt, board, final_stacks) in zip(hands, writer.expected):
+        assert hand.hole_cards == dealt
+        assert hand.board == board
+        assert hand.final_stacks == final_stacks
+    # Seats sitting a hand out are recorded with no hole cards
+    assert any(() in hand.hole_cards for hand in hands)
+
+    assert sum(1 for _ in replay(hands)) == len(hands)
+
+
+def test_appending_to_a_file_keeps_earlier_hands(tmp_path):
+    path = tmp_path / "hands.phh"
+    first = record_games(path, (2,), hands_per_table=20)
+    second = record_games(path, (4,), hands_per_table=20)
+    hands = list(read_hands(path))
+    assert len(hands) == first.hands_written + second.hands_written
+    assert {hand.names for hand in hands} == {
+        tuple(f"Bot {seats}-{i}" for i in range(seats)) for seats in (2, 4)
+    }
+
+
+def test_replay_rejects_a_wrong_result(tmp_path):
+    path = tmp_path / "hands.phh"
+    record_games(path, (3,), hands_per_table=20)
+    hands = list(read_hands(path))
+    last = hands[-1]
+    wrong = last.final_stacks[:-1] + (last.final_stacks[-1] + 1,)
+    hands[-1] = last._replace(final_stacks=wrong)
+    with pytest.raises(ValueError):
+        list(replay(hands))
+
+
+def test_truncated_last_record_is_dropped(tmp_path):
+    path = tmp_path / "hands.phh"
+    writer = record_games(path, (2,), hands_per_table=20)
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])
+    assert len(list(read_hands(path))) == writer.hands_written - 1
@@ -0,0 +1,121 @@
+import random
+
+import pytest
+
+from CFRBot import CFRBot
+from engine import GameState
+from hand_state import BET, CALL, CHECK, FOLD, STAGES, HandState
+from player import Player
+
+ENGINE_ACTIONS = {FOLD: "fold", CALL: "call", BET: "bet", CHECK: "check"}
+STACKS = [5, 10, 15, 20, 25, 40, 60, 150, 1000]
+
+
+class FirstHand:
+    """Recorder keeping the cards, stacks and result of the first hand dealt."""
+
+    def __init__(self):
+        self.stacks = self.hands = self.board = self.final_stacks = None
+
+    def begin_hand(self, game_state):
+        if self.stacks is None:
+            players = game_state.players
+            deck = game_state.deck
+            self.stacks = tuple(player.chips for player in players)
+            self.hands = tuple(tuple(player.hand) for player in players)
+            self.board = tuple(deck[-3:]) + (deck[-4], deck[-5])
+
+    def record_action(self, game_state, player, action, amount):
+        pass
+
+    def end_hand(self, game_state):
+        if self.final_stacks is None:
+            self.final_stacks = tuple(player.chips for player in game_state.players)
+
+
+def play_both(stacks, small_blind_index, seed):
+    """Play one random hand through GameState and HandState side by side."""
+    rng = random.Random(seed)
+    players = [Player("A", stacks[0]), Player("B", stacks[1])]
+    first = FirstHand()
+    game_state = GameState(players, rng=random.Random(seed), recorder=first)
+    game_state.small_blind_index = small_blind_index
+    game_state.start_hand()
+    state = HandState(first.hands, first.board, first.stacks, 1 - small_blind_index)
+
+    while game_state.hand_number == 1:
+        assert not state.is_terminal()
+        player = game_state.current_player()
+        assert state.player == game_state.current_player_index
+        assert STAGES[state.stage] == game_state.stage
+        assert state.history == game_state.history_string()
+        assert state.stacks == tuple(p.chips for p in players)
+        assert state.bets == tuple(p.current_bet for p in players)
+        assert state.to_call() == game_state.amount_to_call(player)
+
+        action = rng.choice(state.legal_actions())
+        amount = game_state.bet_amount(player) if action == BET else 0
+        game_state.apply_action(player, ENGINE_ACTIONS[action], amount)
+        state.apply(action)
+
+    assert state.is_terminal()
+    for seat in (0, 1):
+        assert state.utility(seat) == first.final_stacks[seat] - first.stacks[seat]
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_hand_state_matches_engine(seed):
+    rng = random.Random(seed)
+    stacks = (rng.choice(STACKS), rng.choice(STACKS))
+    play_both(stacks, rng.randrange(2), seed)
+
+
+@pytest.mark.parametrize(
+    "stacks", [(1000, 5), (5, 1000), (1000, 15), (10, 10), (20, 1000), (15, 20)]
+)
+def test_short_blinds_match_engine(stacks):
+    for small_blind_index in (0, 1):
+        play_both(stacks, small_blind_index, seed=sum(stacks))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_bot_legal_actions_match_hand_state(seed):
+    """CFRBot offers the same actions as HandState in random heads-up games."""
+    rng = random.Random(seed)
+    players = [CFRBot(name, rng.choice(STACKS), rng=rng) for name in "AB"]
+    game_state = GameState(players, rng=rng)
+    game_state.start_hand()
+    while game_state.stage is not None and game_state.hand_number <= 20:
+        player = game_state.current_player()
+        legal = HandState.from_game_state(game_state).legal_actions()
+        valid = player.get_valid_actions(game_state)
+        assert sorted(valid) == sorted(ENGINE_ACTIONS[action] for action in legal)
+
+        action = rng.choice(valid)
+        amount = game_state.bet_amount(player) if action == "bet" else 0
+        game_state.apply_action(player, action, amount)
+
+
+def test_from_game_state_needs_a_hand_in_play():
+    players = [Player("A", 1000), Player("B", 0)]
+    game_state = GameState(players, rng=random.Random(0))
+    game_state.start_hand()
+    assert game_state.stage is None
+    with pytest.raises(ValueError, match="No hand is being played"):
+        HandState.from_game_state(game_state)
+
+    # Once the bust player rebuys a hand is dealt and can be modelled
+    players[1].chips = 1000
+    game_state.start_hand()
+    assert HandState.from_game_state(game_state).stage == 0
+
+
+def test_undo_restores_state():
+    state = HandState(((0, 1), (2, 3)), (4, 5, 6, 7, 8), (1000, 1000))
+    before = state.clone()
+    for action in (CALL, BET, BET, CALL, CHECK):
+        state.apply(action)
+    for _ in range(5):
+        state.undo()
+    for name in HandState.__slots__[:-1]:
+        assert getattr(state, name) == getattr(before, name)
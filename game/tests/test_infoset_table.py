@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+import pytest
+
+from cfr_trainer import NUM_ACTIONS, MCCFRTrainer
+from infoset_table import CURRENT_FILE, InfosetTable, regret_matching
+
+
+def scalar_regret_matching(regrets, legal):
+    """Regret matching one action at a time, as the trainer used to."""
+    strategy = [0.0] * len(regrets)
+    total = sum(max(0.0, regrets[a]) for a in legal)
+    for a in legal:
+        strategy[a] = max(0.0, regrets[a]) / total if total > 0 else 1.0 / len(legal)
+    return strategy
+
+
+class ScalarTrainer(MCCFRTrainer):
+    """MCCFRTrainer updating the table at every node, without the batch path."""
+
+    def get_strategy(self, key, legal):
+        row = self.table.row(key)
+        return row, scalar_regret_matching(self.table.regrets[row].tolist(), legal)
+
+    def apply_updates(self):
+        table = self.table
+        for row, deltas in zip(self.regret_rows, self.regret_deltas):
+            table.regrets[row] += deltas
+        for row, strategy in zip(self.strategy_rows, self.strategy_deltas):
+            table.strategy_sum[row] += strategy
+        self.regret_rows, self.regret_deltas, self.regret_masks = [], [], []
+        self.strategy_rows, self.strategy_deltas = [], []
+
+    def _traverse(self, state, deal, traverser):
+        utility = super()._traverse(state, deal, traverser)
+        self.apply_updates()  # Straight away, at the node that queued them
+        return utility
+
+
+def random_rows(rng, count):
+    regrets = rng.normal(size=(count, NUM_ACTIONS)).astype(np.float32)
+    regrets[rng.random(count) < 0.2] = 0.0  # Rows with no regrets yet
+    masks = (rng.random((count, NUM_ACTIONS)) < 0.6).astype(np.float32)
+    masks[np.arange(count), rng.integers(0, NUM_ACTIONS, count)] = 1.0
+    return regrets, masks
+
+
+def test_regret_matching_matches_scalar():
+    rng = np.random.default_rng(0)
+    regrets, masks = random_rows(rng, 2000)
+    batch = regret_matching(regrets, masks)
+    for row, mask, strategy in zip(regrets, masks, batch):
+        legal = np.flatnonzero(mask).tolist()
+        expected = scalar_regret_matching(row.tolist(), legal)
+        np.testing.assert_allclose(strategy, expected, rtol=1e-6)
+        np.testing.assert_allclose(regret_matching(row, mask), expected, rtol=1e-6)
+
+
+def test_accumulate_matches_scalar_updates():
+    rng = np.random.default_rng(1)
+    table = InfosetTable(NUM_ACTIONS, capacity=64)
+    expected = np.zeros_like(table.regrets)
+    rows = rng.integers(0, table.capacity, 500)  # Rows repeat
+    deltas = rng.normal(size=(len(rows), NUM_ACTIONS)).astype(np.float32)
+    for row, delta in zip(rows, deltas):
+        expected[row] += delta
+    table.accumulate(rows, regret_deltas=deltas, strategy_deltas=deltas)
+    np.testing.assert_allclose(table.regrets, expected, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(table.strategy_sum, expected, rtol=1e-5, atol=1e-5)
+
+    # An information set's legal actions never change, so neither does its mask
+    _, row_masks = random_rows(rng, table.capacity)
+    masks = row_masks[rows]
+    table.update_current(rows, masks)
+    np.testing.assert_allclose(
+        table.current[rows], regret_matching(table.regrets[rows], masks)
+    )
+
+
+@pytest.mark.parametrize("capacity", [1 << 16, 16])  # 16 grows mid-traversal
+def test_trainer_matches_scalar_updates(capacity):
+    batched = MCCFRTrainer(seed=3, table=InfosetTable(NUM_ACTIONS, capacity))
+    scalar = ScalarTrainer(seed=3)
+    batched.train(60, report_every=0)
+    scalar.train(60, report_every=0)
+
+    assert len(batched.table) == len(scalar.table)
+    rows = scalar.table.stored_rows()
+    other = [batched.table._slot(int(fp)) for fp in scalar.table.keys[rows]]
+    np.testing.assert_allclose(
+        batched.table.regrets[other], scalar.table.regrets[rows], rtol=1e-4, atol=1e-3
+    )
+    np.testing.assert_allclose(
+        batched.table.strategy_sum[other],
+        scalar.table.strategy_sum[rows],
+        rtol=1e-4,
+        atol=1e-3,
+    )
+
+
+def test_cached_strategies_are_saved(tmp_path):
+    trainer = MCCFRTrainer(seed=4)
+    trainer.train(20, report_every=0)
+    trainer.table.save(tmp_path)
+    table = InfosetTable.open(tmp_path, "r")
+    np.testing.assert_array_equal(table.current, trainer.table.current)
+
+    # Tables saved before strategies were cached still open and train
+    os.remove(tmp_path / CURRENT_FILE)
+    resumed = MCCFRTrainer(seed=4)
+    resumed.load(tmp_path)
+    assert not resumed.table.current.any()
+    resumed.train(5, report_every=0)
+    assert resumed.table.current.any()
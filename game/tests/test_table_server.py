@@ -0,0 +1,87 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from table_server import Table, TableServer
+
+MALFORMED = [
+    b"not json\n",
+    b"[1, 2]\n",
+    b'{"type": "join", "table": null}\n',
+    b'{"type": "join", "table": [0]}\n',
+    b'{"type": "join", "table": 0, "name": ["A"]}\n',
+    b'{"type": "action", "action": "bet", "amount": 40}\n',  # Before joining
+    b'{"type": "dance"}\n',
+]
+MALFORMED_ACTIONS = [
+    b'{"type": "action", "action": "bet", "amount": null}\n',
+    b'{"type": "action", "action": "bet", "amount": [40]}\n',
+    b'{"type": "action", "action": "bet", "amount": "forty"}\n',
+    b'{"type": "action", "action": "bet", "amount": true}\n',
+    b'{"type": "action", "action": "bet", "amount": 40.5}\n',
+    b'{"type": "action", "action": ["bet"], "amount": 40}\n',
+    b'{"type": "action", "action": "shove"}\n',
+]
+
+
+JOIN = b'{"type": "join", "table": 0, "name": "A"}\n'
+
+
+async def exchange(lines, silent=(JOIN,)):
+    """
+    Send each line to a fresh server, reading one reply per line not in
+    `silent`; returns the replies, the player seated in seat 0 and the
+    actions queued for them.
+    """
+    with ThreadPoolExecutor(1) as executor:
+        table = Table(0, [None, None], executor)
+        server = await asyncio.start_server(
+            TableServer([table]).handle_client, "127.0.0.1", 0
+        )
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        assert json.loads(await reader.readline())["type"] == "tables"
+
+        replies = []
+        for line in lines:
+            writer.write(line)
+            await writer.drain()
+            if line in silent:
+                continue
+            replies.append(json.loads(await reader.readline()))
+        player = table.players[0]
+        queued = []
+        while player is not None and not player.actions.empty():
+            queued.append(player.actions.get_nowait())
+
+        # Hang up, and wait for the server to hang up too
+        writer.write_eof()
+        assert await reader.read() == b""
+        writer.close()
+        server.close()
+        await server.wait_closed()
+    return replies, player, queued
+
+
+def test_malformed_messages_get_errors_and_keep_the_connection():
+    lines = MALFORMED + [JOIN] + MALFORMED_ACTIONS + [b'{"type": "join"}\n']
+    replies, player, queued = asyncio.run(exchange(lines))
+
+    assert len(replies) == len(MALFORMED) + len(MALFORMED_ACTIONS) + 1
+    assert all(reply["type"] == "error" for reply in replies)
+    # The connection stayed open: the join after the bad messages seated the
+    # player, and nothing malformed reached the table
+    assert player is not None and player.name == "A"
+    assert queued == []
+    # Hanging up still disconnects the player
+    assert player.connection is None
+
+
+def test_valid_actions_are_queued():
+    bet = b'{"type": "action", "action": "bet", "amount": 40}\n'
+    check = b'{"type": "action", "action": "check"}\n'
+    lines = [JOIN, bet, check, b"[]\n"]
+    replies, _, queued = asyncio.run(exchange(lines, silent=(JOIN, bet, check)))
+
+    assert [reply["type"] for reply in replies] == ["error"]
+    assert queued == [("bet", 40), ("check", 0)]
@@ -0,0 +1,44 @@
+"""
+Rendered text surfaces for the GUI.
+
+Most text on the table (button labels, chip counts, the pot, chat lines) is the
+same from one frame to the next, so rendered surfaces are cached by
+(font, text, colour) and reused. A changed value is simply a new key; the old
+surface ages out of the bounded LRU cache.
+"""
+
+from collections import OrderedDict
+
+MAX_SURFACES = 256
+
+
+class TextCache:
+    def __init__(self, max_surfaces=MAX_SURFACES):
+        self.max_surfaces = max_surfaces
+        self.surfaces = OrderedDict()  # (font, text, colour, antialias) -> Surface
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        """Same as font.render(text, antialias, color), but cached."""
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)  # Least recently used
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+# Shared by every GUI module
+text_cache = TextCache()
+render_text = text_cache.render
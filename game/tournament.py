@@ -0,0 +1,206 @@
+"""
+Headless AI-vs-AI matches for comparing bots.
+
+Two bots play heads-up hands through engine.GameState with no GUI or chat log.
+Every hand starts from fresh stacks and the blinds alternate, so hands are
+independent samples and the win rate is simply their mean. Hands are split
+into shards that run on a process pool, each with its own seeded random
+streams, so a match is reproducible for a given seed and shard size.
+
+Results are reported in milli-big-blinds per hand (mbb/hand) for the first
+bot, with a 95% confidence interval.
+
+    python tournament.py cfr rule --hands 1000000 --processes 8 --policy cfr_policy.bin
+"""
+
+import argparse
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from CFRBot import CFRBot
+from engine import BIG_BLIND, GameState
+from equity import Z_95
+from hand_history import HandHistoryWriter
+from RuleBot import RuleBot
+
+STARTING_STACK = 100 * BIG_BLIND
+SHARD_HANDS = 10_000
+
+# Bots available from the command line; each is called as factory(name, chips, rng=rng)
+BOT_TYPES = {"cfr": CFRBot, "rule": RuleBot}
+
+MatchResult = namedtuple(
+    "MatchResult", ["hands", "mbb_per_hand", "ci95", "std_error", "seconds"]
+)
+
+
+def play_shard(
+    make_first,
+    make_second,
+    hands,
+    seed_sequence,
+    history_path=None,
+    stack=STARTING_STACK,
+):
+    """
+    Play `hands` hands between two bots built by the given factories, with
+    random streams drawn from a numpy SeedSequence. Returns (hands, sum, sum of squares) of the first bot's profit per hand in chips.
+    The hands are recorded to `history_path` if one is given.
+    """
+    first_seed, second_seed, deck_seed = seed_sequence.generate_state(3)
+    players = [
+        make_first("Bot 1", stack, rng=random.Random(int(first_seed))),
+        make_second("Bot 2", stack, rng=random.Random(int(second_seed))),
+    ]
+    hero = players[0]
+    recorder = HandHistoryWriter(history_path) if history_path else None
+    game_state = GameState(
+        players, rng=random.Random(int(deck_seed)), recorder=recorder
+    )
+    game_state.start_hand()
+
+    total = total_sq = 0.0
+    for _ in range(hands):
+        hand_number = game_state.hand_number
+        while game_state.hand_number == hand_number:
+            game_state.current_player().act(game_state)
+
+        # The engine has already dealt the next hand and posted its blinds
+        profit = hero.chips + hero.total_bet - stack
+        total += profit
+        total_sq += profit * profit
+
+        # Refill both stacks and re-deal, so no hand depends on the previous one
+        for player in players:
+            player.chips = stack
+        game_state.start_hand()
+
+    if recorder is not None:
+        recorder.close()
+    return hands, total, total_sq
+
+
+class MatchRunner:
+    """
+    Plays matches between two bot factories (any Player subclass whose
+    constructor accepts name, chips and rng, plus an act(game_state) method).
+    With processes > 1, shards run on a process pool that stays alive between
+    matches; use it as a context manager or call close().
+    """
+
+    def __init__(self, processes=1, shard_hands=SHARD_HANDS, seed=None):
+        self.processes = processes
+        self.shard_hands = shard_hands
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.pool = ProcessPoolExecutor(processes) if processes > 1 else None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run(
+        self, make_first, make_second, hands, stack=STARTING_STACK, history_path=None
+    ):
+        """
+        Play `hands` hands and return a MatchResult for the first bot. With a
+        history_path, shard i records its hands to "<history_path>.<i>".
+        """
+        sizes = [
+            min(self.shard_hands, hands - start)
+            for start in range(0, hands, self.shard_hands)
+        ]
+        seeds = self.seed_sequence.spawn(len(sizes))
+        paths = [
+            f"{history_path}.{i}" if history_path else None for i in range(len(sizes))
+        ]
+        shard = partial(play_shard, make_first, make_second, stack=stack)
+
+        start = time.perf_counter()
+        if self.pool is None:
+            results = map(shard, sizes, seeds, paths)
+        else:
+            results = self.pool.map(shard, sizes, seeds, paths)
+
+        n = 0
+        total = total_sq = 0.0
+        for shard_hands, shard_total, shard_sq in results:
+            n += shard_hands
+            total += shard_total
+            total_sq += shard_sq
+        seconds = time.perf_counter() - start
+
+        # Chips per hand to milli-big-blinds per hand
+        scale = 1000 / BIG_BLIND
+        mean = total / n
+        variance = max(total_sq / n - mean * mean, 0.0)
+        std_error = (variance / n) ** 0.5 * scale
+        return MatchResult(n, mean * scale, Z_95 * std_error, std_error, seconds)
+
+
+def make_bot_factory(
+    bot_type, policy_path=None, abstraction_path=None, search_budget=None
+):
+    """Picklable factory for a bot named on the command line."""
+    if bot_type == "cfr":
+        return partial(
+            CFRBot,
+            policy_path=policy_path,
+            abstraction_path=abstraction_path,
+            search_budget=search_budget,
+        )
+    return BOT_TYPES[bot_type]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play a heads-up match between two bots."
+    )
+    parser.add_argument("first", choices=sorted(BOT_TYPES))
+    parser.add_argument("second", choices=sorted(BOT_TYPES))
+    parser.add_argument("--hands", type=int, default=100_000)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--shard-hands", type=int, default=SHARD_HANDS)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--policy", help="Frozen policy for cfr bots")
+    parser.add_argument("--abstraction", help="Abstraction the policy was trained with")
+    parser.add_argument(
+        "--history", help="Record the hands to hand history files with this prefix"
+    )
+    parser.add_argument(
+        "--search-ms",
+        type=float,
+        help="Real-time subgame search budget per cfr bot decision",
+    )
+    args = parser.parse_args()
+
+    search_budget = args.search_ms / 1000 if args.search_ms else None
+    make_first, make_second = (
+        make_bot_factory(bot_type, args.policy, args.abstraction, search_budget)
+        for bot_type in (args.first, args.second)
+    )
+    with MatchRunner(args.processes, args.shard_hands, args.seed) as runner:
+        result = runner.run(
+            make_first, make_second, args.hands, history_path=args.history
+        )
+
+    print(
+        f"{args.first} vs {args.second}: {result.mbb_per_hand:+.1f} "
+        f"± {result.ci95:.1f} mbb/hand over {result.hands} hands "
+        f"({result.hands / result.seconds:.0f} hands/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()